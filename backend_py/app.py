@@ -1,16 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import base64
 import hashlib
+import json
 import secrets
 import uuid
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from fastapi import Cookie, Depends, FastAPI, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr, Field
 
+import export_jobs
 import storage
+import storage_async
+from codec import CodecJSONResponse
 from models import (
     Commentary,
     OriginEntry,
@@ -21,6 +27,7 @@ from models import (
     Verse,
     Work,
 )
+from session_store import create_session_store
 
 
 class RegisterRequest(BaseModel):
@@ -92,12 +99,56 @@ class RejectRequest(ReviewRequest):
 
 class ExportRequest(BaseModel):
     work_id: str
+    # Rebuild from scratch instead of reusing unchanged records of the last output.
+    full: bool = False
 
 
 class ExportResponse(BaseModel):
     output: str
 
 
+class TrainExportRequest(ExportRequest):
+    # Any of these writes sharded output under export/<work_id>.train/ instead.
+    shard_lines: Optional[int] = Field(default=None, ge=1)
+    shard_mb: Optional[float] = Field(default=None, gt=0)
+    compression: Optional[Literal["gzip", "xz"]] = None
+
+    def shard_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {}
+        if self.shard_lines is not None:
+            options["shard_lines"] = self.shard_lines
+        if self.shard_mb is not None:
+            options["shard_bytes"] = int(self.shard_mb * 1024 * 1024)
+        if self.compression is not None:
+            options["compression"] = self.compression
+        return options
+
+
+class ExportJobRequest(TrainExportRequest):
+    kind: Literal["merge", "clean", "train"]
+
+
+class LibraryExportRequest(BaseModel):
+    kind: Literal["merge", "clean", "train"]
+    full: bool = False
+
+
+class ExportJobStatus(BaseModel):
+    job_id: str
+    work_id: str
+    kind: str
+    full: bool
+    options: Dict[str, Any] = Field(default_factory=dict)
+    state: Literal["queued", "running", "succeeded", "failed"]
+    processed: int
+    total: Optional[int] = None
+    output: Optional[str] = None
+    error: Optional[str] = None
+    submitted_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class AdminUserCreateRequest(BaseModel):
     email: EmailStr
     password: str = Field(min_length=8)
@@ -142,6 +193,9 @@ class SMEAnalyticsResponse(BaseModel):
     work_progress: Dict[str, Dict[str, int]]
 
 
+BULK_ACTIONS = ("approve", "reject", "flag", "rollback")
+
+
 class BulkActionRequest(BaseModel):
     work_id: str
     verse_ids: List[str]
@@ -155,7 +209,6 @@ class SegmentUpdateRequest(BaseModel):
     segments: Dict[str, List[str]]
 
 
-sessions: Dict[str, str] = {}
 csrf_token = secrets.token_urlsafe(32)
 
 ALLOWED_ORIGINS = [
@@ -171,38 +224,19 @@ SESSION_COOKIE_PARAMS = {
     "path": "/",
     "max_age": 60 * 60 * 24,
 }
-
-LANG_FALLBACKS = ["bn", "en", "or", "hi", "as"]
-
-
-def _expected_languages(work: Work) -> List[str]:
-    languages: List[str] = []
-    for lang in (work.langs or []):
-        if lang not in languages:
-            languages.append(lang)
-    for lang in LANG_FALLBACKS:
-        if lang not in languages:
-            languages.append(lang)
-    return languages
-
-
-def _normalize_language_fields(work: Work, verse_dict: Dict[str, Any]) -> Dict[str, Any]:
-    expected = _expected_languages(work)
-    texts = verse_dict.get("texts") or {}
-    segments = verse_dict.get("segments") or {}
-    hashes = verse_dict.get("hash") or {}
-
-    verse_dict["texts"] = {lang: texts.get(lang) for lang in expected}
-    verse_dict["segments"] = {
-        lang: list(segments.get(lang) or []) for lang in expected
-    }
-    verse_dict["hash"] = {lang: hashes.get(lang) for lang in expected}
-    return verse_dict
-
+sessions = create_session_store(max_age=SESSION_COOKIE_PARAMS["max_age"])
 
 def _normalize_verse_model(work: Work, verse: Verse) -> Verse:
-    normalized = _normalize_language_fields(work, verse.dict(by_alias=True))
-    return Verse.parse_obj(normalized)
+    """Bring a verse about to be saved into the work's language shape, in place.
+
+    Verses are stored normalized, so reads serve stored documents as they are.
+    """
+    languages = storage.expected_languages(work)
+    fields = {"texts": verse.texts, "segments": verse.segments, "hash": verse.hash}
+    if not storage.has_language_shape(fields, languages):
+        storage.normalize_language_fields(fields, languages)
+        verse.texts, verse.segments, verse.hash = fields["texts"], fields["segments"], fields["hash"]
+    return verse
 
 
 def hash_password(password: str) -> str:
@@ -214,10 +248,7 @@ def serialize_user(user: User) -> AuthResponse:
 
 
 def get_user_by_email(email: str) -> Optional[User]:
-    for user in storage.load_users():
-        if user.email.lower() == email.lower():
-            return user
-    return None
+    return storage.find_user_by_email(email)
 
 
 def save_user(user: User) -> None:
@@ -246,10 +277,7 @@ def delete_user_by_id(user_id: str) -> bool:
 
 
 def get_user_by_id(user_id: str) -> Optional[User]:
-    for user in storage.load_users():
-        if user.id == user_id:
-            return user
-    return None
+    return storage.find_user(user_id)
 
 
 def is_admin(user: User) -> bool:
@@ -264,6 +292,74 @@ def can_review(user: User) -> bool:
     return "reviewer" in user.roles or "sme" in user.roles or is_admin(user)
 
 
+def encode_queue_cursor(key: storage.PendingKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_queue_cursor(cursor: str) -> storage.PendingKey:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if not (isinstance(key, list) and len(key) == 4 and all(isinstance(part, str) for part in key)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return tuple(key)
+
+
+def encode_log_cursor(position: storage.ReviewLogPosition) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode("utf-8")).decode("ascii")
+
+
+def decode_log_cursor(cursor: str) -> storage.ReviewLogPosition:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if not (
+        isinstance(position, list)
+        and len(position) == 2
+        and isinstance(position[0], str)
+        and isinstance(position[1], int)
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return tuple(position)
+
+
+# Per-language maps that ``langs=`` narrows down.
+LANGUAGE_MAP_FIELDS = ("texts", "segments", "hash")
+
+
+def parse_projection(fields: Optional[str], langs: Optional[str]) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+    """Parse comma-separated ``fields=`` / ``langs=`` query values (``None`` when absent)."""
+    paths = None
+    if fields is not None:
+        try:
+            paths = storage.projection_paths(part.strip() for part in fields.split(",") if part.strip())
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    languages = None
+    if langs is not None:
+        languages = [part.strip() for part in langs.split(",") if part.strip()]
+    return paths, languages
+
+
+def shape_doc(doc: Dict[str, Any], paths: Optional[List[str]], languages: Optional[List[str]]) -> Dict[str, Any]:
+    """Apply a parsed projection to a document without touching the original."""
+    if paths is not None:
+        doc = storage.project(doc, paths)
+    if languages is not None:
+        doc = dict(doc)
+        for key in LANGUAGE_MAP_FIELDS:
+            value = doc.get(key)
+            if isinstance(value, dict):
+                doc[key] = {lang: value[lang] for lang in languages if lang in value}
+    return doc
+
+
+def wants_history(paths: Optional[List[str]]) -> bool:
+    return paths is None or any(path in ("review", "review.history") for path in paths)
+
+
 async def get_current_user(
     session_id: Optional[str] = Cookie(default=None, alias=SESSION_COOKIE_NAME)
 ) -> User:
@@ -272,14 +368,18 @@ async def get_current_user(
     user_id = sessions.get(session_id)
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session")
-    for user in storage.load_users():
-        if user.id == user_id:
-            return user
-    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user = storage.find_user(user_id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return user
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Unknown CRUD Library API", version="v1")
+    app = FastAPI(
+        title="Unknown CRUD Library API",
+        version="v1",
+        default_response_class=CodecJSONResponse,
+    )
 
     app.add_middleware(
         CORSMiddleware,
@@ -289,6 +389,12 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    @app.on_event("shutdown")
+    def shutdown_storage_io() -> None:
+        export_jobs.shutdown()
+        storage_async.shutdown()
+        storage.close_review_log()
+
     @app.get("/health")
     def health() -> Dict[str, str]:
         return {"status": "ok", "version": "v1"}
@@ -317,7 +423,7 @@ def create_app() -> FastAPI:
         if not user or user.password_hash != hash_password(payload.password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         session_id = secrets.token_urlsafe(32)
-        sessions[session_id] = user.id
+        sessions.set(session_id, user.id)
         response.set_cookie(SESSION_COOKIE_NAME, session_id, **SESSION_COOKIE_PARAMS)
         return serialize_user(user)
 
@@ -326,8 +432,8 @@ def create_app() -> FastAPI:
         response: Response,
         session_id: Optional[str] = Cookie(default=None, alias=SESSION_COOKIE_NAME),
     ) -> Response:
-        if session_id and session_id in sessions:
-            sessions.pop(session_id)
+        if session_id:
+            sessions.delete(session_id)
         if response:
             response.delete_cookie(
                 SESSION_COOKIE_NAME,
@@ -345,7 +451,7 @@ def create_app() -> FastAPI:
     async def list_users(user: User = Depends(get_current_user)) -> List[AdminUserResponse]:
         if not is_admin(user):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
-        users = storage.load_users()
+        users = await storage_async.load_users()
         return [
             AdminUserResponse(
                 id=u.id,
@@ -370,7 +476,7 @@ def create_app() -> FastAPI:
             roles=payload.roles,
             twoFactorEnabled=False,
         )
-        save_user(new_user)
+        await storage_async.run_io(save_user, new_user)
         return AdminUserResponse(
             id=new_user.id,
             email=new_user.email,
@@ -402,7 +508,7 @@ def create_app() -> FastAPI:
         if payload.roles is not None:
             target_user.roles = payload.roles
         
-        update_user(target_user)
+        await storage_async.run_io(update_user, target_user)
         return AdminUserResponse(
             id=target_user.id,
             email=target_user.email,
@@ -417,7 +523,7 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
         if user_id == user.id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot delete your own account")
-        if not delete_user_by_id(user_id):
+        if not await storage_async.run_io(delete_user_by_id, user_id):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -428,7 +534,7 @@ def create_app() -> FastAPI:
         if user.password_hash != hash_password(payload.current_password):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Current password is incorrect")
         user.password_hash = hash_password(payload.new_password)
-        update_user(user)
+        await storage_async.run_io(update_user, user)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     @app.get("/admin/analytics", response_model=AnalyticsResponse)
@@ -436,23 +542,24 @@ def create_app() -> FastAPI:
         if not is_admin(user):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
         
-        work_ids = storage.list_work_ids()
+        work_ids = await storage_async.list_work_ids()
         total_works = len(work_ids)
         total_verses = 0
         total_commentary = 0
         works_by_status = {"draft": 0, "submitted": 0, "approved": 0, "locked": 0}
         
         for work_id in work_ids:
-            verses = storage.list_verses(work_id)
-            commentaries = storage.list_commentary(work_id)
-            total_verses += len(verses)
-            total_commentary += len(commentaries)
+            try:
+                counts = await storage_async.review_state_counts(work_id)
+            except FileNotFoundError:
+                continue
+            total_verses += sum(counts["verses"].values())
+            total_commentary += sum(counts["commentary"].values())
             
             # Count verses by status
-            for verse in verses:
-                status = verse.review.state if verse.review else "draft"
+            for status, count in counts["verses"].items():
                 if status in works_by_status:
-                    works_by_status[status] += 1
+                    works_by_status[status] += count
         
         # Recent activity (simplified)
         recent_activity = [
@@ -497,12 +604,12 @@ def create_app() -> FastAPI:
         
         # Check if work already exists
         try:
-            storage.load_work(payload.work_id)
+            await storage_async.load_work(payload.work_id)
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Work already exists")
         except FileNotFoundError:
             pass  # Work doesn't exist, which is what we want
         
-        storage.save_work(payload)
+        await storage_async.save_work(payload)
         return payload
 
     @app.put("/works/{work_id}", response_model=Work)
@@ -511,7 +618,14 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="SME access required")
         if payload.work_id != work_id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Mismatched work_id")
-        storage.save_work(payload)
+        try:
+            previous = await storage_async.load_work(work_id)
+        except FileNotFoundError:
+            previous = None
+        await storage_async.save_work(payload)
+        if previous is not None and storage.expected_languages(previous) != storage.expected_languages(payload):
+            # Stored verses must keep the work's language shape
+            await storage_async.run_io(storage.normalize_verses, work_id)
         return payload
 
     @app.delete("/works/{work_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -519,7 +633,7 @@ def create_app() -> FastAPI:
         if not is_sme(user):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="SME access required")
         try:
-            storage.delete_work(work_id)
+            await storage_async.delete_work(work_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work not found")
         return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -529,27 +643,84 @@ def create_app() -> FastAPI:
         work_id: str,
         offset: int = Query(0, ge=0),
         limit: int = Query(20, ge=1, le=100),
+        after_order: Optional[int] = Query(None),
+        fields: Optional[str] = Query(None, description="Comma-separated field paths to return"),
+        langs: Optional[str] = Query(None, description="Comma-separated languages to keep"),
     ) -> Dict[str, object]:
+        paths, languages = parse_projection(fields, langs)
         try:
             work = storage.load_work(work_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work not found")
-        verses = [_normalize_verse_model(work, verse) for verse in storage.list_verses(work_id)]
-        total = len(verses)
-        slice_end = min(offset + limit, total)
-        items = [verse.dict(by_alias=True) for verse in verses[offset:slice_end]]
-        next_offset = slice_end if slice_end < total else None
-        next_cursor = {"offset": next_offset, "limit": limit} if next_offset is not None else None
+        total = storage.count_verses(work_id)
+        # One extra verse tells whether another page follows without counting
+        # the verses past a keyset cursor.
+        page = storage.list_verse_docs(work_id, offset=offset, limit=limit + 1, after_order=after_order)
+        has_more = len(page) > limit
+        # Stored documents are already normalized and are served as they are.
+        items = page[:limit]
+        next_cursor = None
+        if has_more:
+            # Continue the way the caller pages; sending both keys would skip twice.
+            if after_order is None:
+                next_cursor = {"limit": limit, "offset": offset + limit}
+            else:
+                next_cursor = {"limit": limit, "after_order": items[-1]["order"]}
+        if paths is not None or languages is not None:
+            items = [shape_doc(doc, paths, languages) for doc in items]
         return {"items": items, "next": next_cursor, "total": total}
 
+    def _hydrate_history(review: ReviewBlock, kind: str, work_id: str, item_id: str) -> None:
+        # Records written before the history store existed still carry it inline.
+        if not review.history:
+            entries, _ = storage.load_review_history(kind, work_id, item_id)
+            review.history = [ReviewHistoryEntry.parse_obj(entry) for entry in entries]
+
+    def _hydrate_history_doc(doc: Dict[str, Any], kind: str, work_id: str, item_id: str) -> Dict[str, Any]:
+        review = doc.get("review") or {}
+        if not review.get("history"):
+            entries, _ = storage.load_review_history(kind, work_id, item_id)
+            doc = {**doc, "review": {**review, "history": entries}}
+        return doc
+
+    def _history_page(kind: str, work_id: str, item_id: str, offset: int, limit: int) -> Dict[str, Any]:
+        entries, total = storage.load_review_history(kind, work_id, item_id, offset, limit)
+        next_offset = offset + limit
+        return {
+            "items": entries,
+            "total": total,
+            "next": {"offset": next_offset, "limit": limit} if next_offset < total else None,
+        }
+
     @app.get("/works/{work_id}/verses/{verse_id}", response_model=Verse)
-    def get_verse(work_id: str, verse_id: str) -> Verse:
+    def get_verse(
+        work_id: str,
+        verse_id: str,
+        fields: Optional[str] = Query(None, description="Comma-separated field paths to return"),
+        langs: Optional[str] = Query(None, description="Comma-separated languages to keep"),
+    ) -> Response:
+        paths, languages = parse_projection(fields, langs)
         try:
-            work = storage.load_work(work_id)
-            verse = storage.load_verse(work_id, verse_id)
-            return _normalize_verse_model(work, verse)
+            doc = storage.load_verse_doc(work_id, verse_id)
+        except FileNotFoundError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Verse not found")
+        # Served as stored (normalized at write time) rather than revalidated.
+        if wants_history(paths):
+            doc = _hydrate_history_doc(doc, "verse", work_id, verse_id)
+        return CodecJSONResponse(shape_doc(doc, paths, languages))
+
+    @app.get("/works/{work_id}/verses/{verse_id}/history")
+    def get_verse_history(
+        work_id: str,
+        verse_id: str,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=500),
+    ) -> Dict[str, Any]:
+        try:
+            storage.load_verse_doc(work_id, verse_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Verse not found")
+        return _history_page("verse", work_id, verse_id, offset, limit)
 
     @app.post("/works/{work_id}/verses", status_code=status.HTTP_201_CREATED)
     async def create_verse(
@@ -558,37 +729,42 @@ def create_app() -> FastAPI:
         user: User = Depends(get_current_user),
     ) -> Dict[str, str]:
         try:
-            work = storage.load_work(work_id)
+            work = await storage_async.load_work(work_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work not found")
-        if storage.manual_number_exists(work_id, payload.number_manual):
+        try:
+            verse_id, order = await storage_async.allocate_verse_id(work_id, payload.number_manual)
+        except storage.DuplicateManualNumber:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="duplicate manual number",
             )
-        verse_id, order = storage.generate_verse_id(work_id)
-        expected_langs = _expected_languages(work)
+        expected_langs = storage.expected_languages(work)
         incoming_texts = payload.texts or {}
         normalized_texts = {lang: incoming_texts.get(lang) for lang in expected_langs}
         segments_payload = payload.segments or {}
         normalized_segments = {lang: list(segments_payload.get(lang) or []) for lang in expected_langs}
         meta = payload.meta or {}
         meta.setdefault("entered_by", user.email)
-        verse = Verse(
-            work_id=work_id,
-            verse_id=verse_id,
-            number_manual=payload.number_manual,
-            order=order,
-            texts=normalized_texts,
-            segments=normalized_segments,
-            origin=[entry.dict(by_alias=True) for entry in payload.origin],
-            tags=payload.tags,
-            review=ReviewBlock(),
-            meta=meta,
-            hash={lang: None for lang in expected_langs},
-        )
-        verse = _normalize_verse_model(work, verse)
-        storage.save_verse(verse)
+        try:
+            verse = Verse(
+                work_id=work_id,
+                verse_id=verse_id,
+                number_manual=payload.number_manual,
+                order=order,
+                texts=normalized_texts,
+                segments=normalized_segments,
+                origin=[entry.dict(by_alias=True) for entry in payload.origin],
+                tags=payload.tags,
+                review=ReviewBlock(),
+                meta=meta,
+                hash={lang: None for lang in expected_langs},
+            )
+            await storage_async.save_verse(verse)
+        except BaseException:
+            # The manual number was reserved above; free it for the next attempt.
+            await storage_async.release_verse_id(work_id, verse_id)
+            raise
         return {"verse_id": verse_id, "location": f"/works/{work_id}/verses/{verse_id}"}
 
     @app.put("/works/{work_id}/verses/{verse_id}", response_model=Verse)
@@ -599,16 +775,16 @@ def create_app() -> FastAPI:
         user: User = Depends(get_current_user),
     ) -> Verse:
         try:
-            work = storage.load_work(work_id)
+            work = await storage_async.load_work(work_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work not found")
         try:
-            verse = storage.load_verse(work_id, verse_id)
+            verse = await storage_async.load_verse(work_id, verse_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Verse not found")
         data = verse.dict(by_alias=True)
         if payload.number_manual is not None and payload.number_manual != verse.number_manual:
-            if storage.manual_number_exists(work_id, payload.number_manual, exclude=verse_id):
+            if await storage_async.manual_number_exists(work_id, payload.number_manual, exclude=verse_id):
                 raise HTTPException(
                     status_code=status.HTTP_409_CONFLICT,
                     detail="duplicate manual number",
@@ -626,32 +802,76 @@ def create_app() -> FastAPI:
             meta = data.get("meta", {})
             meta.update(payload.meta)
             data["meta"] = meta
-        data = _normalize_language_fields(work, data)
+        data = storage.normalize_language_fields(data, storage.expected_languages(work))
         updated = Verse.parse_obj(data)
-        updated = _normalize_verse_model(work, updated)
-        storage.save_verse(updated)
+        await storage_async.save_verse(updated)
         return updated
 
     @app.delete("/works/{work_id}/verses/{verse_id}", status_code=status.HTTP_204_NO_CONTENT)
     async def delete_verse(work_id: str, verse_id: str, user: User = Depends(get_current_user)) -> Response:
-        storage.delete_verse(work_id, verse_id, actor=user.email)
+        await storage_async.delete_verse(work_id, verse_id, actor=user.email)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     @app.get("/works/{work_id}/commentary/{commentary_id}", response_model=Commentary)
-    def get_commentary(work_id: str, commentary_id: str) -> Commentary:
+    def get_commentary(
+        work_id: str,
+        commentary_id: str,
+        fields: Optional[str] = Query(None, description="Comma-separated field paths to return"),
+        langs: Optional[str] = Query(None, description="Comma-separated languages to keep"),
+    ) -> Response:
+        paths, languages = parse_projection(fields, langs)
+        if paths is None and languages is None:
+            try:
+                commentary = storage.load_commentary(work_id, commentary_id)
+            except FileNotFoundError:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Commentary not found")
+            _hydrate_history(commentary.review, "commentary", work_id, commentary_id)
+            return commentary
+        # Trimmed reads skip model validation and serve the stored document.
+        try:
+            doc = storage.load_commentary_doc(work_id, commentary_id)
+        except FileNotFoundError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Commentary not found")
+        if wants_history(paths):
+            doc = _hydrate_history_doc(doc, "commentary", work_id, commentary_id)
+        return CodecJSONResponse(shape_doc(doc, paths, languages))
+
+    @app.get("/works/{work_id}/commentary/{commentary_id}/history")
+    def get_commentary_history(
+        work_id: str,
+        commentary_id: str,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=500),
+    ) -> Dict[str, Any]:
         try:
-            return storage.load_commentary(work_id, commentary_id)
+            storage.load_commentary_doc(work_id, commentary_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Commentary not found")
+        return _history_page("commentary", work_id, commentary_id, offset, limit)
 
     @app.get("/works/{work_id}/verses/{verse_id}/commentary", response_model=List[Commentary])
-    def list_commentary_for_verse(work_id: str, verse_id: str) -> List[Commentary]:
+    def list_commentary_for_verse(
+        work_id: str,
+        verse_id: str,
+        fields: Optional[str] = Query(None, description="Comma-separated field paths to return"),
+        langs: Optional[str] = Query(None, description="Comma-separated languages to keep"),
+    ) -> Response:
+        paths, languages = parse_projection(fields, langs)
         try:
-            storage.load_verse(work_id, verse_id)
+            storage.load_verse_doc(work_id, verse_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Verse not found")
-        commentaries = storage.list_commentary_for_verse(work_id, verse_id)
-        return [commentary for commentary in commentaries]
+        if paths is None and languages is None:
+            return storage.list_commentary_for_verse(work_id, verse_id)
+        if paths is not None:
+            # The backend extracts only the requested paths.
+            docs = storage.list_commentary_for_verse(work_id, verse_id, fields=paths)
+        else:
+            docs = [
+                commentary.dict(by_alias=True)
+                for commentary in storage.list_commentary_for_verse(work_id, verse_id)
+            ]
+        return CodecJSONResponse([shape_doc(doc, None, languages) for doc in docs])
 
     @app.post("/works/{work_id}/verses/{verse_id}/commentary", status_code=status.HTTP_201_CREATED)
     async def create_commentary(
@@ -661,10 +881,10 @@ def create_app() -> FastAPI:
         user: User = Depends(get_current_user),
     ) -> Dict[str, str]:
         try:
-            storage.load_verse(work_id, verse_id)
+            await storage_async.load_verse(work_id, verse_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Verse not found")
-        commentary_id = storage.generate_commentary_id(work_id, verse_id)
+        commentary_id = await storage_async.generate_commentary_id(work_id, verse_id)
         commentary = Commentary(
             work_id=work_id,
             verse_id=verse_id,
@@ -678,7 +898,7 @@ def create_app() -> FastAPI:
             authenticity={"status": "attested", "confidence": 1.0},
             priority={"lineage_bias": 1.0},
         )
-        storage.save_commentary(commentary)
+        await storage_async.save_commentary(commentary)
         return {"commentary_id": commentary_id}
 
     @app.put("/works/{work_id}/commentary/{commentary_id}", response_model=Commentary)
@@ -688,7 +908,7 @@ def create_app() -> FastAPI:
         payload: CommentaryUpdateRequest,
         user: User = Depends(get_current_user),
     ) -> Commentary:
-        commentary = storage.load_commentary(work_id, commentary_id)
+        commentary = await storage_async.load_commentary(work_id, commentary_id)
         data = commentary.dict(by_alias=True)
         if payload.texts is not None:
             data["texts"] = payload.texts
@@ -701,12 +921,12 @@ def create_app() -> FastAPI:
         if payload.tags is not None:
             data["tags"] = payload.tags
         updated = Commentary.parse_obj(data)
-        storage.save_commentary(updated)
+        await storage_async.save_commentary(updated)
         return updated
 
     @app.delete("/works/{work_id}/commentary/{commentary_id}", status_code=status.HTTP_204_NO_CONTENT)
     async def delete_commentary(work_id: str, commentary_id: str, user: User = Depends(get_current_user)) -> Response:
-        storage.delete_commentary(work_id, commentary_id, actor=user.email)
+        await storage_async.delete_commentary(work_id, commentary_id, actor=user.email)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     def _transition_review(
@@ -725,8 +945,9 @@ def create_app() -> FastAPI:
             hash_before=None,
             hash_after=None,
         )
-        review.history.append(entry)
         review.state = new_state
+        review.history_count += 1
+        review.last_entry = entry
         return entry
 
     def _serialize_history_entry(entry: ReviewHistoryEntry) -> Dict[str, object]:
@@ -735,6 +956,18 @@ def create_app() -> FastAPI:
         data["issues"] = [issue.dict(by_alias=True) for issue in entry.issues]
         return data
 
+    async def _record_review_entry(
+        review: ReviewBlock, kind: str, work_id: str, item_id: str, entry: ReviewHistoryEntry
+    ) -> None:
+        data = _serialize_history_entry(entry)
+        await storage_async.append_review_history(kind, work_id, item_id, data)
+        await storage_async.append_review_log(kind, work_id, item_id, data)
+        # Answer with the review block as saved: entries still inline in a record
+        # from an older release have just been moved to the history store.
+        if review.history:
+            review.history_count += len(review.history)
+            review.history = []
+
     def _validate_ready_for_approval(work: Work, verse: Verse) -> None:
         canonical_lang = work.canonical_lang
         canonical_text = verse.texts.get(canonical_lang)
@@ -749,13 +982,13 @@ def create_app() -> FastAPI:
         payload: ReviewRequest,
         user: User = Depends(get_current_user),
     ) -> Verse:
-        verse = storage.load_verse(payload.work_id, verse_id)
-        work = storage.load_work(payload.work_id)
+        verse = await storage_async.load_verse(payload.work_id, verse_id)
+        work = await storage_async.load_work(payload.work_id)
         _validate_ready_for_approval(work, verse)
         entry = _transition_review(verse.review, "approved", user.email, "state_change")
         verse = _normalize_verse_model(work, verse)
-        storage.save_verse(verse)
-        storage.append_review_log("verse", payload.work_id, verse_id, _serialize_history_entry(entry))
+        await storage_async.save_verse(verse)
+        await _record_review_entry(verse.review, "verse", payload.work_id, verse_id, entry)
         return verse
 
     @app.post("/review/verse/{verse_id}/reject", response_model=Verse)
@@ -764,13 +997,13 @@ def create_app() -> FastAPI:
         payload: RejectRequest,
         user: User = Depends(get_current_user),
     ) -> Verse:
-        verse = storage.load_verse(payload.work_id, verse_id)
-        work = storage.load_work(payload.work_id)
+        verse = await storage_async.load_verse(payload.work_id, verse_id)
+        work = await storage_async.load_work(payload.work_id)
         issues = payload.issues or []
         entry = _transition_review(verse.review, "rejected", user.email, "issue_add", issues=issues)
         verse = _normalize_verse_model(work, verse)
-        storage.save_verse(verse)
-        storage.append_review_log("verse", payload.work_id, verse_id, _serialize_history_entry(entry))
+        await storage_async.save_verse(verse)
+        await _record_review_entry(verse.review, "verse", payload.work_id, verse_id, entry)
         return verse
 
     @app.post("/review/verse/{verse_id}/flag", response_model=Verse)
@@ -779,12 +1012,12 @@ def create_app() -> FastAPI:
         payload: ReviewRequest,
         user: User = Depends(get_current_user),
     ) -> Verse:
-        verse = storage.load_verse(payload.work_id, verse_id)
-        work = storage.load_work(payload.work_id)
+        verse = await storage_async.load_verse(payload.work_id, verse_id)
+        work = await storage_async.load_work(payload.work_id)
         entry = _transition_review(verse.review, "flagged", user.email, "flag")
         verse = _normalize_verse_model(work, verse)
-        storage.save_verse(verse)
-        storage.append_review_log("verse", payload.work_id, verse_id, _serialize_history_entry(entry))
+        await storage_async.save_verse(verse)
+        await _record_review_entry(verse.review, "verse", payload.work_id, verse_id, entry)
         return verse
 
     @app.post("/review/verse/{verse_id}/lock", response_model=Verse)
@@ -793,12 +1026,12 @@ def create_app() -> FastAPI:
         payload: ReviewRequest,
         user: User = Depends(get_current_user),
     ) -> Verse:
-        verse = storage.load_verse(payload.work_id, verse_id)
-        work = storage.load_work(payload.work_id)
+        verse = await storage_async.load_verse(payload.work_id, verse_id)
+        work = await storage_async.load_work(payload.work_id)
         entry = _transition_review(verse.review, "locked", user.email, "lock")
         verse = _normalize_verse_model(work, verse)
-        storage.save_verse(verse)
-        storage.append_review_log("verse", payload.work_id, verse_id, _serialize_history_entry(entry))
+        await storage_async.save_verse(verse)
+        await _record_review_entry(verse.review, "verse", payload.work_id, verse_id, entry)
         return verse
 
     @app.post("/review/commentary/{commentary_id}/approve", response_model=Commentary)
@@ -807,10 +1040,10 @@ def create_app() -> FastAPI:
         payload: ReviewRequest,
         user: User = Depends(get_current_user),
     ) -> Commentary:
-        commentary = storage.load_commentary(payload.work_id, commentary_id)
+        commentary = await storage_async.load_commentary(payload.work_id, commentary_id)
         entry = _transition_review(commentary.review, "approved", user.email, "state_change")
-        storage.save_commentary(commentary)
-        storage.append_review_log("commentary", payload.work_id, commentary_id, _serialize_history_entry(entry))
+        await storage_async.save_commentary(commentary)
+        await _record_review_entry(commentary.review, "commentary", payload.work_id, commentary_id, entry)
         return commentary
 
     @app.post("/review/commentary/{commentary_id}/reject", response_model=Commentary)
@@ -819,10 +1052,10 @@ def create_app() -> FastAPI:
         payload: RejectRequest,
         user: User = Depends(get_current_user),
     ) -> Commentary:
-        commentary = storage.load_commentary(payload.work_id, commentary_id)
+        commentary = await storage_async.load_commentary(payload.work_id, commentary_id)
         entry = _transition_review(commentary.review, "rejected", user.email, "issue_add", issues=payload.issues)
-        storage.save_commentary(commentary)
-        storage.append_review_log("commentary", payload.work_id, commentary_id, _serialize_history_entry(entry))
+        await storage_async.save_commentary(commentary)
+        await _record_review_entry(commentary.review, "commentary", payload.work_id, commentary_id, entry)
         return commentary
 
     @app.post("/review/commentary/{commentary_id}/flag", response_model=Commentary)
@@ -831,10 +1064,10 @@ def create_app() -> FastAPI:
         payload: ReviewRequest,
         user: User = Depends(get_current_user),
     ) -> Commentary:
-        commentary = storage.load_commentary(payload.work_id, commentary_id)
+        commentary = await storage_async.load_commentary(payload.work_id, commentary_id)
         entry = _transition_review(commentary.review, "flagged", user.email, "flag")
-        storage.save_commentary(commentary)
-        storage.append_review_log("commentary", payload.work_id, commentary_id, _serialize_history_entry(entry))
+        await storage_async.save_commentary(commentary)
+        await _record_review_entry(commentary.review, "commentary", payload.work_id, commentary_id, entry)
         return commentary
 
     @app.post("/review/commentary/{commentary_id}/lock", response_model=Commentary)
@@ -843,126 +1076,81 @@ def create_app() -> FastAPI:
         payload: ReviewRequest,
         user: User = Depends(get_current_user),
     ) -> Commentary:
-        commentary = storage.load_commentary(payload.work_id, commentary_id)
+        commentary = await storage_async.load_commentary(payload.work_id, commentary_id)
         entry = _transition_review(commentary.review, "locked", user.email, "lock")
-        storage.save_commentary(commentary)
-        storage.append_review_log("commentary", payload.work_id, commentary_id, _serialize_history_entry(entry))
+        await storage_async.save_commentary(commentary)
+        await _record_review_entry(commentary.review, "commentary", payload.work_id, commentary_id, entry)
         return commentary
 
-    def _merge_payload(work_id: str) -> Dict[str, object]:
-        work = storage.load_work(work_id)
-        verses = [verse.dict(by_alias=True) for verse in storage.list_verses(work_id)]
-        commentary = [item.dict(by_alias=True) for item in storage.list_commentary(work_id)]
-        return {"work": work.dict(by_alias=True), "verses": verses, "commentary": commentary}
-
-    def _write_output(path: str, payload) -> str:
-        from pathlib import Path
-        path_obj = Path(path)
-        path_obj.parent.mkdir(parents=True, exist_ok=True)
-        if path_obj.suffix == ".jsonl":
-            with path_obj.open("w", encoding="utf-8") as handle:
-                for line in payload:
-                    handle.write(line)
-                    handle.write("\n")
-        else:
-            import json
-            with path_obj.open("w", encoding="utf-8") as handle:
-                json.dump(payload, handle, ensure_ascii=False, indent=2)
-        return str(path_obj)
-
-    def _clean_payload(payload: Dict[str, object]) -> Dict[str, object]:
-        import copy
-
-        cleaned = copy.deepcopy(payload)
-        for verse in cleaned.get("verses", []):
-            verse.pop("review", None)
-            meta = verse.get("meta") or {}
-            for key in ["reviewer", "date_reviewed", "entered_by"]:
-                if key in meta:
-                    meta.pop(key)
-            verse["meta"] = meta
-            if "history" in verse:
-                verse.pop("history")
-        for item in cleaned.get("commentary", []):
-            item.pop("review", None)
-            item.pop("priority", None)
-            item.pop("authenticity", None)
-        return cleaned
-
-    def _training_lines(payload: Dict[str, object]) -> List[str]:
-        import json
-
-        lines: List[str] = []
-        work_id = payload["work"]["work_id"]
-        for verse in payload.get("verses", []):
-            verse_id = verse["verse_id"]
-            tags = verse.get("tags") or []
-            texts = verse.get("texts") or {}
-            for lang, text in texts.items():
-                if text:
-                    lines.append(
-                        json.dumps(
-                            {
-                                "type": "verse",
-                                "work_id": work_id,
-                                "verse_id": verse_id,
-                                "lang": lang,
-                                "text": text,
-                                "tags": tags,
-                            },
-                            ensure_ascii=False,
-                        )
-                    )
-        for commentary in payload.get("commentary", []):
-            texts = commentary.get("texts") or {}
-            for lang, text in texts.items():
-                if text:
-                    lines.append(
-                        json.dumps(
-                            {
-                                "type": "commentary",
-                                "work_id": work_id,
-                                "commentary_id": commentary["commentary_id"],
-                                "lang": lang,
-                                "text": text,
-                                "genre": commentary.get("genre"),
-                            },
-                            ensure_ascii=False,
-                        )
-                    )
-        return lines
+    async def _submit_export(
+        payload: ExportRequest, kind: str, options: Optional[Dict[str, Any]] = None
+    ) -> export_jobs.ExportJob:
+        try:
+            await storage_async.load_work(payload.work_id)
+        except FileNotFoundError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work not found")
+        return export_jobs.queue().submit(payload.work_id, kind, payload.full, options)
+
+    async def _run_export(
+        payload: ExportRequest, kind: str, options: Optional[Dict[str, Any]] = None
+    ) -> ExportResponse:
+        # Runs as a job too, so it shares a running export of the same request.
+        job = await _submit_export(payload, kind, options)
+        try:
+            output = await asyncio.wrap_future(job.future)
+        except FileNotFoundError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work not found")
+        return ExportResponse(output=output)
+
+    @app.post("/export/jobs", response_model=ExportJobStatus, status_code=status.HTTP_202_ACCEPTED)
+    async def submit_export_job(
+        payload: ExportJobRequest,
+        user: User = Depends(get_current_user),
+    ) -> Dict[str, Any]:
+        options = payload.shard_options()
+        if options and payload.kind != "train":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Sharding options only apply to train exports",
+            )
+        job = await _submit_export(payload, payload.kind, options)
+        return job.snapshot()
+
+    @app.post("/export/library", response_model=ExportJobStatus, status_code=status.HTTP_202_ACCEPTED)
+    async def submit_library_export(
+        payload: LibraryExportRequest,
+        user: User = Depends(get_current_user),
+    ) -> Dict[str, Any]:
+        job = export_jobs.queue().submit(export_jobs.LIBRARY, payload.kind, payload.full)
+        return job.snapshot()
+
+    @app.get("/export/jobs/{job_id}", response_model=ExportJobStatus)
+    async def get_export_job(job_id: str, user: User = Depends(get_current_user)) -> Dict[str, Any]:
+        job = await storage_async.run_io(export_jobs.queue().get, job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found")
+        return job
 
     @app.post("/build/merge", response_model=ExportResponse)
     async def build_merge(
         payload: ExportRequest,
         user: User = Depends(get_current_user),
     ) -> ExportResponse:
-        merged = _merge_payload(payload.work_id)
-        path = storage.work_dir(payload.work_id) / "build" / f"{payload.work_id}.all.json"
-        _write_output(str(path), merged)
-        return ExportResponse(output=str(path))
+        return await _run_export(payload, "merge")
 
     @app.post("/export/clean", response_model=ExportResponse)
     async def export_clean(
         payload: ExportRequest,
         user: User = Depends(get_current_user),
     ) -> ExportResponse:
-        merged = _merge_payload(payload.work_id)
-        cleaned = _clean_payload(merged)
-        path = storage.work_dir(payload.work_id) / "export" / f"{payload.work_id}.clean.json"
-        _write_output(str(path), cleaned)
-        return ExportResponse(output=str(path))
+        return await _run_export(payload, "clean")
 
     @app.post("/export/train", response_model=ExportResponse)
     async def export_train(
-        payload: ExportRequest,
+        payload: TrainExportRequest,
         user: User = Depends(get_current_user),
     ) -> ExportResponse:
-        merged = _merge_payload(payload.work_id)
-        lines = _training_lines(merged)
-        path = storage.work_dir(payload.work_id) / "export" / f"{payload.work_id}.train.jsonl"
-        _write_output(str(path), lines)
-        return ExportResponse(output=str(path))
+        return await _run_export(payload, "train", payload.shard_options())
 
     # SME Dashboard endpoints
     @app.get("/sme/analytics", response_model=SMEAnalyticsResponse)
@@ -970,50 +1158,44 @@ def create_app() -> FastAPI:
         if not is_sme(user):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="SME access required")
         
-        work_ids = storage.list_work_ids()
+        work_ids = await storage_async.list_work_ids()
         pending_reviews = 0
-        approved_by_me = 0
-        rejected_by_me = 0
         flagged_items = 0
         work_progress = {}
-        my_recent_activity = []
         
         for work_id in work_ids:
-            verses = storage.list_verses(work_id)
+            try:
+                counts = await storage_async.review_state_counts(work_id)
+            except FileNotFoundError:
+                continue
             work_stats = {"draft": 0, "review_pending": 0, "approved": 0, "rejected": 0, "flagged": 0}
             
-            for verse in verses:
-                state = verse.review.state if verse.review else "draft"
+            for state, count in counts["verses"].items():
                 if state in work_stats:
-                    work_stats[state] += 1
+                    work_stats[state] += count
                 
                 if state in ["review_pending", "flagged"]:
-                    pending_reviews += 1
+                    pending_reviews += count
                 if state == "flagged":
-                    flagged_items += 1
-                
-                # Check if user was involved in review
-                if verse.review and verse.review.history:
-                    for entry in verse.review.history:
-                        if entry.actor == user.email:
-                            if entry.action == "state_change" and entry.to_state == "approved":
-                                approved_by_me += 1
-                            elif entry.action in ["issue_add", "state_change"] and entry.to_state == "rejected":
-                                rejected_by_me += 1
-                            
-                            my_recent_activity.append({
-                                "type": f"verse_{entry.action}",
-                                "work_id": work_id,
-                                "verse_id": verse.verse_id,
-                                "action": entry.action,
-                                "date": entry.ts.isoformat() if hasattr(entry.ts, 'isoformat') else str(entry.ts)
-                            })
+                    flagged_items += count
             
             work_progress[work_id] = work_stats
         
-        # Sort recent activity by date
-        my_recent_activity.sort(key=lambda x: x["date"], reverse=True)
-        my_recent_activity = my_recent_activity[:20]  # Limit to 20 recent items
+        # The user's own review activity comes from the per-actor index of the review log
+        verse_activity = (await storage_async.review_activity(user.email)).get("verse", {})
+        by_action = verse_activity.get("counts", {})
+        approved_by_me = by_action.get("state_change", {}).get("approved", 0)
+        rejected_by_me = sum(by_action.get(action, {}).get("rejected", 0) for action in ["issue_add", "state_change"])
+        my_recent_activity = [
+            {
+                "type": f"verse_{entry['action']}",
+                "work_id": entry["work_id"],
+                "verse_id": entry["id"],
+                "action": entry["action"],
+                "date": entry["ts"],
+            }
+            for entry in verse_activity.get("recent", [])
+        ]
         
         return SMEAnalyticsResponse(
             pending_reviews=pending_reviews,
@@ -1028,56 +1210,83 @@ def create_app() -> FastAPI:
     async def get_pending_reviews(
         user: User = Depends(get_current_user),
         work_id: Optional[str] = Query(None),
-        limit: int = Query(50, ge=1, le=100)
+        limit: int = Query(50, ge=1, le=100),
+        cursor: Optional[str] = Query(None)
     ) -> Dict[str, Any]:
         if not is_sme(user):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="SME access required")
         
-        pending_items = []
-        work_ids = [work_id] if work_id else storage.list_work_ids()
+        after = decode_queue_cursor(cursor) if cursor else None
+        work_ids = [work_id] if work_id else None
+        keys, total = await storage_async.run_io(storage.list_pending_reviews, work_ids, limit + 1, after)
+        page, has_more = keys[:limit], len(keys) > limit
         
-        for wid in work_ids:
+        # Full records are only loaded for the returned page
+        pending_items = []
+        work_titles: Dict[str, Dict[str, Optional[str]]] = {}
+        for last_updated, item_type, wid, item_id in page:
             try:
-                work = storage.load_work(wid)
-                verses = storage.list_verses(wid)
-                
-                for verse in verses:
-                    if verse.review and verse.review.state in ["review_pending", "flagged", "draft"]:
-                        pending_items.append({
-                            "type": "verse",
-                            "work_id": wid,
-                            "work_title": work.title,
-                            "item_id": verse.verse_id,
-                            "number_manual": verse.number_manual,
-                            "state": verse.review.state,
-                            "texts": verse.texts,
-                            "tags": verse.tags,
-                            "last_updated": verse.review.history[-1].ts.isoformat() if verse.review.history else None
-                        })
-                
-                commentaries = storage.list_commentary(wid)
-                for commentary in commentaries:
-                    if commentary.review and commentary.review.state in ["review_pending", "flagged", "draft"]:
-                        pending_items.append({
-                            "type": "commentary",
-                            "work_id": wid,
-                            "work_title": work.title,
-                            "item_id": commentary.commentary_id,
-                            "verse_id": commentary.verse_id,
-                            "state": commentary.review.state,
-                            "texts": commentary.texts,
-                            "speaker": commentary.speaker,
-                            "last_updated": commentary.review.history[-1].ts.isoformat() if commentary.review.history else None
-                        })
+                if wid not in work_titles:
+                    work_titles[wid] = (await storage_async.load_work(wid)).title
+                if item_type == "verse":
+                    verse = await storage_async.load_verse(wid, item_id)
+                    pending_items.append({
+                        "type": "verse",
+                        "work_id": wid,
+                        "work_title": work_titles[wid],
+                        "item_id": verse.verse_id,
+                        "number_manual": verse.number_manual,
+                        "state": verse.review.state,
+                        "texts": verse.texts,
+                        "tags": verse.tags,
+                        "last_updated": last_updated or None
+                    })
+                else:
+                    commentary = await storage_async.load_commentary(wid, item_id)
+                    pending_items.append({
+                        "type": "commentary",
+                        "work_id": wid,
+                        "work_title": work_titles[wid],
+                        "item_id": commentary.commentary_id,
+                        "verse_id": commentary.verse_id,
+                        "state": commentary.review.state,
+                        "texts": commentary.texts,
+                        "speaker": commentary.speaker,
+                        "last_updated": last_updated or None
+                    })
             except FileNotFoundError:
                 continue
         
-        # Sort by last updated
-        pending_items.sort(key=lambda x: x.get("last_updated", ""), reverse=True)
+        return {
+            "items": pending_items,
+            "total": total,
+            "next_cursor": encode_queue_cursor(page[-1]) if has_more else None
+        }
+
+    @app.get("/sme/review-log")
+    async def get_review_log(
+        user: User = Depends(get_current_user),
+        date_from: Optional[date] = Query(None),
+        date_to: Optional[date] = Query(None),
+        work_id: Optional[str] = Query(None),
+        item_id: Optional[str] = Query(None),
+        actor: Optional[str] = Query(None),
+        action: Optional[str] = Query(None),
+        limit: int = Query(100, ge=1, le=500),
+        cursor: Optional[str] = Query(None)
+    ) -> Dict[str, Any]:
+        if not is_sme(user):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="SME access required")
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from is after date_to")
         
+        after = decode_log_cursor(cursor) if cursor else None
+        entries, position = await storage_async.run_io(
+            storage.query_review_log, date_from, date_to, work_id, item_id, actor, action, limit, after
+        )
         return {
-            "items": pending_items[:limit],
-            "total": len(pending_items)
+            "items": entries,
+            "next_cursor": encode_log_cursor(position) if position else None
         }
 
     @app.post("/sme/bulk-action")
@@ -1089,16 +1298,35 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="SME access required")
         
         try:
-            work = storage.load_work(payload.work_id)
+            work = await storage_async.load_work(payload.work_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work not found")
         
-        results = {"success": [], "failed": []}
+        results: Dict[str, List[Any]] = {"success": [], "failed": []}
+        if payload.action not in BULK_ACTIONS:
+            results["failed"] = [{"verse_id": verse_id, "error": "Invalid action"} for verse_id in payload.verse_ids]
+            return results
         
+        # Every target is loaded and validated before anything is written
+        verses = await storage_async.load_verses(payload.work_id, payload.verse_ids)
+        histories: Dict[str, List[Dict[str, Any]]] = {}
+        if payload.action == "rollback":
+            histories = await storage_async.run_io(
+                lambda: {
+                    verse_id: storage.load_review_history("verse", payload.work_id, verse_id)[0]
+                    for verse_id in verses
+                }
+            )
+        
+        changed: Dict[str, Verse] = {}
+        entries = []
+        applied: Dict[str, List[Dict[str, Any]]] = {}
         for verse_id in payload.verse_ids:
+            verse = verses.get(verse_id)
+            if verse is None:
+                results["failed"].append({"verse_id": verse_id, "error": "Verse not found"})
+                continue
             try:
-                verse = storage.load_verse(payload.work_id, verse_id)
-                
                 if payload.action == "approve":
                     _validate_ready_for_approval(work, verse)
                     entry = _transition_review(verse.review, "approved", user.email, "state_change")
@@ -1106,29 +1334,58 @@ def create_app() -> FastAPI:
                     entry = _transition_review(verse.review, "rejected", user.email, "issue_add", issues=payload.issues)
                 elif payload.action == "flag":
                     entry = _transition_review(verse.review, "flagged", user.email, "flag")
-                elif payload.action == "rollback":
-                    # Rollback to previous state
-                    if verse.review.history:
-                        prev_state = "draft"
-                        for hist_entry in reversed(verse.review.history[:-1]):
-                            if hist_entry.from_state:
-                                prev_state = hist_entry.from_state
-                                break
-                        entry = _transition_review(verse.review, prev_state, user.email, "rollback")
-                    else:
-                        entry = _transition_review(verse.review, "draft", user.email, "rollback")
                 else:
-                    results["failed"].append({"verse_id": verse_id, "error": "Invalid action"})
-                    continue
-                
-                verse = _normalize_verse_model(work, verse)
-                storage.save_verse(verse)
-                storage.append_review_log("verse", payload.work_id, verse_id, _serialize_history_entry(entry))
-                results["success"].append(verse_id)
-                
-            except Exception as e:
-                results["failed"].append({"verse_id": verse_id, "error": str(e)})
+                    # Rollback to the state before the latest transition
+                    history = verse.review.history + [
+                        ReviewHistoryEntry.parse_obj(item) for item in histories.get(verse_id, []) + applied.get(verse_id, [])
+                    ]
+                    prev_state = "draft"
+                    for hist_entry in reversed(history[:-1]):
+                        if hist_entry.from_state:
+                            prev_state = hist_entry.from_state
+                            break
+                    entry = _transition_review(verse.review, prev_state, user.email, "rollback")
+            except HTTPException as e:
+                results["failed"].append({"verse_id": verse_id, "error": e.detail})
+                continue
+            changed[verse_id] = _normalize_verse_model(work, verse)
+            entries.append((verse_id, _serialize_history_entry(entry)))
+            applied.setdefault(verse_id, []).append(entries[-1][1])
         
+        if not changed:
+            return results
+        # One batch: concurrent record writes, a single fsync commit, and one
+        # append each to the history store and the review log. Only a verse
+        # whose own write failed is reported as failed; later steps report
+        # their errors separately because the new states are already stored.
+        failed: Dict[str, str] = {}
+        errors: List[Dict[str, str]] = []
+        async with storage_async.batch_commit():
+            try:
+                await storage_async.save_verses(payload.work_id, list(changed.values()))
+            except storage.PartialSaveError as e:
+                failed = {verse_id: str(error) for verse_id, error in e.failed.items()}
+            except Exception as e:
+                failed = {verse_id: str(e) for verse_id in changed}
+            saved = [(verse_id, data) for verse_id, data in entries if verse_id not in failed]
+            if saved:
+                try:
+                    await storage_async.append_review_histories(
+                        payload.work_id, [("verse", verse_id, data) for verse_id, data in saved]
+                    )
+                except Exception as e:
+                    errors.append({"stage": "history", "error": str(e)})
+        if saved:
+            try:
+                await storage_async.append_review_logs(
+                    [("verse", payload.work_id, verse_id, data) for verse_id, data in saved]
+                )
+            except Exception as e:
+                errors.append({"stage": "review_log", "error": str(e)})
+        results["failed"].extend({"verse_id": verse_id, "error": error} for verse_id, error in failed.items())
+        results["success"].extend(verse_id for verse_id, _ in saved)
+        if errors:
+            results["errors"] = errors
         return results
 
     @app.put("/sme/segments")
@@ -1140,8 +1397,8 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="SME access required")
         
         try:
-            work = storage.load_work(payload.work_id)
-            verse = storage.load_verse(payload.work_id, payload.verse_id)
+            work = await storage_async.load_work(payload.work_id)
+            verse = await storage_async.load_verse(payload.work_id, payload.verse_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work or verse not found")
         
@@ -1158,11 +1415,12 @@ def create_app() -> FastAPI:
             hash_before=None,
             hash_after=None,
         )
-        verse.review.history.append(entry)
+        verse.review.history_count += 1
+        verse.review.last_entry = entry
         
         verse = _normalize_verse_model(work, verse)
-        storage.save_verse(verse)
-        storage.append_review_log("verse", payload.work_id, payload.verse_id, _serialize_history_entry(entry))
+        await storage_async.save_verse(verse)
+        await _record_review_entry(verse.review, "verse", payload.work_id, payload.verse_id, entry)
         
         return verse
 
@@ -1175,9 +1433,8 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="SME access required")
         
         try:
-            work = storage.load_work(work_id)
-            verses = storage.list_verses(work_id)
-            commentaries = storage.list_commentary(work_id)
+            work = await storage_async.load_work(work_id)
+            counts = await storage_async.review_state_counts(work_id)
         except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work not found")
         
@@ -1185,22 +1442,20 @@ def create_app() -> FastAPI:
         verse_stats = {"draft": 0, "review_pending": 0, "approved": 0, "rejected": 0, "flagged": 0, "locked": 0}
         commentary_stats = {"draft": 0, "review_pending": 0, "approved": 0, "rejected": 0, "flagged": 0, "locked": 0}
         
-        for verse in verses:
-            state = verse.review.state if verse.review else "draft"
+        for state, count in counts["verses"].items():
             if state in verse_stats:
-                verse_stats[state] += 1
+                verse_stats[state] += count
         
-        for commentary in commentaries:
-            state = commentary.review.state if commentary.review else "draft"
+        for state, count in counts["commentary"].items():
             if state in commentary_stats:
-                commentary_stats[state] += 1
+                commentary_stats[state] += count
         
         return {
             "work": work.dict(by_alias=True),
             "verse_stats": verse_stats,
             "commentary_stats": commentary_stats,
-            "total_verses": len(verses),
-            "total_commentary": len(commentaries)
+            "total_verses": sum(counts["verses"].values()),
+            "total_commentary": sum(counts["commentary"].values())
         }
 
     return app
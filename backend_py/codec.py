@@ -0,0 +1,71 @@
+"""JSON encoding for stored records and API responses.
+
+``JSON_CODEC=auto`` uses orjson when it is installed and the standard library
+otherwise; ``orjson`` / ``stdlib`` force one or the other. Both produce the
+same text for our documents: UTF-8 without ASCII escaping, and datetimes
+rendered by :func:`default` exactly as ``json`` would with it. Records on disk
+are indented by two spaces unless ``JSON_COMPACT_STORAGE`` is set.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, Union
+
+from starlette.responses import JSONResponse
+
+import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
+if settings.JSON_CODEC not in ("auto", "orjson", "stdlib"):
+    raise RuntimeError(f"Unknown JSON_CODEC {settings.JSON_CODEC!r}")
+if settings.JSON_CODEC == "orjson" and orjson is None:
+    raise RuntimeError("JSON_CODEC=orjson but orjson is not installed")
+
+USE_ORJSON = orjson is not None and settings.JSON_CODEC != "stdlib"
+
+
+def default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value)} is not JSON serializable")
+
+
+def dumps_bytes(payload: Any, compact: bool = True) -> bytes:
+    if USE_ORJSON:
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(payload, default=default, option=option)
+    return dumps(payload, compact).encode("utf-8")
+
+
+def dumps(payload: Any, compact: bool = True) -> str:
+    if USE_ORJSON:
+        return dumps_bytes(payload, compact).decode("utf-8")
+    if compact:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=default)
+    return json.dumps(payload, ensure_ascii=False, indent=2, default=default)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if USE_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_record(payload: Any) -> bytes:
+    """Encode a record for storage, honouring ``JSON_COMPACT_STORAGE``."""
+    return dumps_bytes(payload, compact=settings.JSON_COMPACT_STORAGE)
+
+
+class CodecJSONResponse(JSONResponse):
+    """Response class rendering through the configured codec."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,348 @@
+"""Background export jobs.
+
+Exports are submitted to a pool of ``EXPORT_WORKERS`` threads and tracked as
+jobs that report their state, progress (records processed / total), output
+path and error. Job status is written to ``data/jobs/export/`` so any uvicorn
+worker can answer a status query; the most recent ``EXPORT_JOB_RETENTION``
+finished jobs of each worker are kept.
+
+A submission for a work, export kind, ``full`` flag and options that is
+already queued or running returns the existing job instead of starting
+another, also across workers: the job that runs holds an exclusively
+created claim file for its key under ``data/jobs/export/active/``, and a
+duplicate submitted to another worker follows that job's persisted status.
+
+Library-wide exports are jobs for the work id ``*``; their progress counts
+works rather than records.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import exports
+import settings
+import storage
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+LIBRARY = "*"
+
+# Seconds between persisted progress updates of a running job.
+PROGRESS_SAVE_INTERVAL = 0.5
+
+# Claim files older than this whose contents cannot be parsed are abandoned.
+CLAIM_WRITE_GRACE = 5.0
+
+
+def jobs_dir() -> Path:
+    return settings.DATA_ROOT.parent / "jobs" / "export"
+
+
+def job_path(job_id: str) -> Path:
+    return jobs_dir() / f"{job_id}.json"
+
+
+def claim_path(key: Tuple) -> Path:
+    digest = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+    return jobs_dir() / "active" / f"{digest}.claim"
+
+
+class ExportJob:
+    __slots__ = (
+        "job_id",
+        "work_id",
+        "kind",
+        "full",
+        "options",
+        "state",
+        "processed",
+        "total",
+        "output",
+        "error",
+        "submitted_at",
+        "started_at",
+        "finished_at",
+        "future",
+        "_saved_at",
+    )
+
+    def __init__(self, work_id: str, kind: str, full: bool, options: Dict[str, Any]) -> None:
+        self.job_id = uuid.uuid4().hex
+        self.work_id = work_id
+        self.kind = kind
+        self.full = full
+        self.options = options
+        self.state = "queued"
+        self.processed = 0
+        self.total: Optional[int] = None
+        self.output: Optional[str] = None
+        self.error: Optional[str] = None
+        self.submitted_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.future: Optional[Future] = None
+        self._saved_at = 0.0
+
+    @classmethod
+    def from_snapshot(cls, data: Dict[str, Any]) -> "ExportJob":
+        """A job run by another worker, as last persisted."""
+        job = cls(data["work_id"], data["kind"], data["full"], data["options"])
+        job.update(data)
+        return job
+
+    def update(self, data: Dict[str, Any]) -> None:
+        for field in ("job_id", "state", "processed", "total", "output", "error"):
+            setattr(self, field, data[field])
+        for field in ("submitted_at", "started_at", "finished_at"):
+            setattr(self, field, data[field])
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("succeeded", "failed")
+
+    def progress(self, processed: int, total: int) -> None:
+        self.processed = processed
+        self.total = total
+        now = time.monotonic()
+        if now - self._saved_at >= PROGRESS_SAVE_INTERVAL:
+            self.save()
+
+    def save(self) -> None:
+        self._saved_at = time.monotonic()
+        storage.write_json(job_path(self.job_id), self.snapshot())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "work_id": self.work_id,
+            "kind": self.kind,
+            "full": self.full,
+            "options": self.options,
+            "state": self.state,
+            "processed": self.processed,
+            "total": self.total,
+            "output": self.output,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _job_key(work_id: str, kind: str, full: bool, options: Dict[str, Any]) -> Tuple:
+    return work_id, kind, full, tuple(sorted(options.items()))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _claim_owner(path: Path) -> Optional[str]:
+    """The id of the live job holding the claim at ``path``; ``None`` if it is gone or stale."""
+    try:
+        text = path.read_text(encoding="utf-8")
+        age = time.time() - path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    try:
+        job_id, pid = text.split()
+        alive = _pid_alive(int(pid))
+    except ValueError:
+        if age < CLAIM_WRITE_GRACE:
+            # Its creator is still writing it.
+            time.sleep(0.01)
+            return None
+        alive = False
+        job_id = ""
+    if alive:
+        try:
+            if storage.read_json(job_path(job_id))["state"] in ("queued", "running"):
+                return job_id
+        except (FileNotFoundError, ValueError):
+            pass
+    # Left behind by a job that finished or a worker that died.
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            path.unlink()
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def _claim(path: Path, job_id: str) -> Optional[str]:
+    """Claim ``path`` for ``job_id``, or return the id of the live job that holds it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            owner = _claim_owner(path)
+            if owner is not None:
+                return owner
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(f"{job_id} {os.getpid()}")
+        return None
+
+
+class ExportJobQueue:
+    def __init__(self, workers: int, retention: int) -> None:
+        self.retention = retention
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="export")
+        self._jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._active: Dict[Tuple, ExportJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, work_id: str, kind: str, full: bool = False, options: Optional[Dict[str, Any]] = None
+    ) -> ExportJob:
+        """Queue an export, or return the queued or running job for the same request.
+
+        ``options`` are passed to the exporter as keyword arguments.
+        """
+        if kind not in exports.EXPORTERS:
+            raise ValueError(f"Unknown export kind {kind!r}")
+        options = options or {}
+        key = _job_key(work_id, kind, full, options)
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job
+            job = ExportJob(work_id, kind, full, options)
+            # Persisted before claiming, so a claim never names a missing job.
+            job.save()
+            owner = _claim(claim_path(key), job.job_id)
+            if owner is not None:
+                job_path(job.job_id).unlink(missing_ok=True)
+                return self._follow(owner, claim_path(key))
+            self._jobs[job.job_id] = job
+            self._active[key] = job
+            job.future = self._pool.submit(self._run, job)
+            return job
+
+    def _follow(self, job_id: str, claim: Path) -> ExportJob:
+        """Track a job running in another worker through its persisted status."""
+        job = ExportJob.from_snapshot(storage.read_json(job_path(job_id)))
+        job.future = Future()
+        threading.Thread(target=self._watch, args=(job, claim), name="export-follow", daemon=True).start()
+        return job
+
+    def _watch(self, job: ExportJob, claim: Path) -> None:
+        while True:
+            time.sleep(PROGRESS_SAVE_INTERVAL / 5)
+            try:
+                job.update(storage.read_json(job_path(job.job_id)))
+            except FileNotFoundError:
+                job.future.set_exception(RuntimeError("Export job record disappeared"))
+                return
+            if job.state == "succeeded":
+                job.future.set_result(job.output)
+                return
+            if job.state == "failed":
+                error = FileNotFoundError(job.work_id) if job.error == "Work not found" else RuntimeError(job.error)
+                job.future.set_exception(error)
+                return
+            try:
+                holder = claim.read_text(encoding="utf-8").split()[0]
+            except (FileNotFoundError, IndexError):
+                holder = None
+            if holder != job.job_id:
+                # Re-read once: the claim is dropped just after the final save.
+                job.update(storage.read_json(job_path(job.job_id)))
+                if not job.done:
+                    job.future.set_exception(RuntimeError("Export worker exited before finishing the job"))
+                    return
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a job, whichever worker process runs it."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.snapshot()
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            return storage.read_json(job_path(job_id))
+        except FileNotFoundError:
+            return None
+
+    def _run(self, job: ExportJob) -> str:
+        job.state = "running"
+        job.started_at = datetime.now(timezone.utc)
+        job.save()
+        try:
+            if job.work_id == LIBRARY:
+                path = exports.export_library(job.kind, job.full, progress=job.progress)
+            else:
+                path = exports.EXPORTERS[job.kind](job.work_id, job.full, job.progress, **job.options)
+        except FileNotFoundError:
+            self._finish(job, error="Work not found")
+            raise
+        except Exception as exc:
+            self._finish(job, error=f"{type(exc).__name__}: {exc}")
+            raise
+        job.output = str(path)
+        self._finish(job)
+        return job.output
+
+    def _finish(self, job: ExportJob, error: Optional[str] = None) -> None:
+        with self._lock:
+            job.error = error
+            job.state = "failed" if error else "succeeded"
+            job.finished_at = datetime.now(timezone.utc)
+            key = _job_key(job.work_id, job.kind, job.full, job.options)
+            if self._active.get(key) is job:
+                del self._active[key]
+            finished = [job_id for job_id, item in self._jobs.items() if item.done]
+            expired = finished[: max(0, len(finished) - self.retention)]
+            for job_id in expired:
+                del self._jobs[job_id]
+        job.save()
+        claim = claim_path(key)
+        try:
+            if claim.read_text(encoding="utf-8").split()[0] == job.job_id:
+                claim.unlink()
+        except (FileNotFoundError, IndexError):
+            pass
+        for job_id in expired:
+            job_path(job_id).unlink(missing_ok=True)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+_queue: Optional[ExportJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def queue() -> ExportJobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ExportJobQueue(settings.EXPORT_WORKERS, settings.EXPORT_JOB_RETENTION)
+        return _queue
+
+
+def shutdown() -> None:
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.shutdown()
+            _queue = None
@@ -0,0 +1,631 @@
+"""Export pipelines behind ``/build/merge``, ``/export/clean`` and ``/export/train``.
+
+Every export is framed as a sequence of records (verses in order, then
+commentary) and written next to a manifest, ``<output>.manifest.json``, that
+records each record's storage content digest and the byte range its encoding
+occupies in the output. A later run compares digests against the manifest:
+when nothing changed the output is left alone, otherwise only added and
+changed records are loaded and encoded while unchanged ones are copied byte
+for byte from the previous output. The result is always identical to a full
+rebuild: the merged and clean documents to ``json.dump(..., indent=2)`` of
+the whole payload, and training lines to one ``json.dumps`` per line.
+
+Outputs are streamed into a temporary sibling that is renamed into place, so
+memory is bounded by a single record rather than by the size of the work.
+
+:func:`export_library` runs one kind of export for every work on a process
+pool and records the per-work outputs in a library manifest.
+
+The training export can instead be written as size-bounded, optionally gzip-
+or xz-compressed shards under ``export/<work_id>.train/``, described by an
+``index.json`` with each shard's line count and SHA-256. The shard set is
+rebuilt in full when any record changed and left alone otherwise.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import lzma
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import codec
+import settings
+import storage
+
+# Bump when the encoding of any export changes; older manifests are ignored.
+MANIFEST_FORMAT = 2
+
+# Shard file suffix per training export compression.
+SHARD_SUFFIXES = {None: "", "gzip": ".gz", "xz": ".xz"}
+
+META_PRIVATE_KEYS = ("reviewer", "date_reviewed", "entered_by")
+COMMENTARY_PRIVATE_KEYS = ("review", "priority", "authenticity")
+
+# A piece of an export: framing bytes, or a record as (key, digest, encode).
+Piece = Union[bytes, Tuple[str, str, Callable[[], bytes]]]
+
+# Called with (records processed, total records) as an export advances.
+Progress = Callable[[int, int], None]
+
+# Attempts before giving up on a work whose records keep disappearing mid-export.
+EXPORT_ATTEMPTS = 3
+
+
+class RecordVanished(Exception):
+    """A record listed for an export was deleted before it could be encoded."""
+
+
+def merge_path(work_id: str) -> Path:
+    return storage.work_dir(work_id) / "build" / f"{work_id}.all.json"
+
+
+def clean_path(work_id: str) -> Path:
+    return storage.work_dir(work_id) / "export" / f"{work_id}.clean.json"
+
+
+def train_path(work_id: str) -> Path:
+    return storage.work_dir(work_id) / "export" / f"{work_id}.train.jsonl"
+
+
+def train_shards_dir(work_id: str) -> Path:
+    return storage.work_dir(work_id) / "export" / f"{work_id}.train"
+
+
+def manifest_path(output: Path) -> Path:
+    return output.with_name(f"{output.name}.manifest.json")
+
+
+def library_manifest_path(kind: str) -> Path:
+    return settings.DATA_ROOT.parent / "exports" / f"library.{kind}.json"
+
+
+def clean_verse(verse: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip review data and private meta keys from a merged verse, in place."""
+    verse.pop("review", None)
+    meta = verse.get("meta") or {}
+    for key in META_PRIVATE_KEYS:
+        meta.pop(key, None)
+    verse["meta"] = meta
+    verse.pop("history", None)
+    return verse
+
+
+def clean_commentary(item: Dict[str, Any]) -> Dict[str, Any]:
+    for key in COMMENTARY_PRIVATE_KEYS:
+        item.pop(key, None)
+    return item
+
+
+def verse_training_lines(work_id: str, verse: Dict[str, Any]) -> Iterator[str]:
+    tags = verse.get("tags") or []
+    for lang, text in (verse.get("texts") or {}).items():
+        if text:
+            yield json.dumps(
+                {
+                    "type": "verse",
+                    "work_id": work_id,
+                    "verse_id": verse["verse_id"],
+                    "lang": lang,
+                    "text": text,
+                    "tags": tags,
+                },
+                ensure_ascii=False,
+            )
+
+
+def commentary_training_lines(work_id: str, commentary: Dict[str, Any]) -> Iterator[str]:
+    for lang, text in (commentary.get("texts") or {}).items():
+        if text:
+            yield json.dumps(
+                {
+                    "type": "commentary",
+                    "work_id": work_id,
+                    "commentary_id": commentary["commentary_id"],
+                    "lang": lang,
+                    "text": text,
+                    "genre": commentary.get("genre"),
+                },
+                ensure_ascii=False,
+            )
+
+
+def _encode(value: Any, level: int) -> str:
+    """``json.dumps(..., indent=2)`` of ``value`` as if nested ``level`` deep."""
+    text = json.dumps(value, ensure_ascii=False, indent=2, default=codec.default)
+    # Newlines inside strings are escaped, so every newline is a line break.
+    return text.replace("\n", "\n" + "  " * level)
+
+
+def _loader(
+    load: Callable, work_id: str, item_id: str, history_kind: Optional[str] = None
+) -> Callable[[], Dict[str, Any]]:
+    def read() -> Dict[str, Any]:
+        try:
+            record = load(work_id, item_id).dict(by_alias=True)
+        except FileNotFoundError:
+            raise RecordVanished(item_id)
+        review = record.get("review")
+        # Records only keep a summary; the trail itself is in the history store.
+        if history_kind is not None and review is not None and not review.get("history"):
+            review["history"], _ = storage.load_review_history(history_kind, work_id, item_id)
+        return record
+
+    return read
+
+
+def _history_digest(kind: str, work_id: str, item_id: str, digest: str) -> str:
+    # An entry is appended just after its record is saved, so count it too.
+    _, total = storage.load_review_history(kind, work_id, item_id, 0, 0)
+    return f"{digest}+{total}"
+
+
+def _records(
+    work_id: str, history: bool = False
+) -> Tuple[List[Tuple[str, str, Callable]], List[Tuple[str, str, Callable]]]:
+    """Verse and commentary records of a work as ``(key, digest, read)``.
+
+    With ``history`` each record's review history is read from the history
+    store and its length is part of the digest.
+    """
+    verses = []
+    for verse_id, digest in storage.iter_verse_digests(work_id):
+        if history:
+            digest = _history_digest("verse", work_id, verse_id, digest)
+        load = _loader(storage.load_verse, work_id, verse_id, "verse" if history else None)
+        verses.append((f"verse:{verse_id}", digest, load))
+    commentary = []
+    for commentary_id, digest in storage.iter_commentary_digests(work_id):
+        if history:
+            digest = _history_digest("commentary", work_id, commentary_id, digest)
+        load = _loader(storage.load_commentary, work_id, commentary_id, "commentary" if history else None)
+        commentary.append((f"commentary:{commentary_id}", digest, load))
+    return verses, commentary
+
+
+def _encoded(read: Callable, encode: Callable[[Dict[str, Any]], str]) -> Callable[[], bytes]:
+    def produce() -> bytes:
+        return encode(read()).encode("utf-8")
+
+    return produce
+
+
+def _array(records: List[Tuple[str, str, Callable]], step: Optional[Callable]) -> Iterator[Piece]:
+    if not records:
+        yield b"[]"
+        return
+    separator = b"[\n    "
+    for key, digest, read in records:
+        yield separator
+        yield key, digest, _encoded(read, lambda record: _encode(step(record) if step else record, 2))
+        separator = b",\n    "
+    yield b"\n  ]"
+
+
+def _document_pieces(
+    work_id: str, verse_step: Optional[Callable], commentary_step: Optional[Callable], history: bool
+):
+    work = storage.load_work(work_id).dict(by_alias=True)
+    verses, commentary = _records(work_id, history)
+    header = '{\n  "work": ' + _encode(work, 1) + ',\n  "verses": '
+
+    def pieces() -> Iterator[Piece]:
+        yield header.encode("utf-8")
+        yield from _array(verses, verse_step)
+        yield b',\n  "commentary": '
+        yield from _array(commentary, commentary_step)
+        yield b"\n}"
+
+    return storage.content_digest(header), verses + commentary, pieces()
+
+
+def _train_pieces(work_id: str):
+    storage.load_work(work_id)
+    verses, commentary = _records(work_id)
+
+    def lines(produce_lines: Callable) -> Callable[[Dict[str, Any]], str]:
+        return lambda record: "".join(line + "\n" for line in produce_lines(work_id, record))
+
+    def pieces() -> Iterator[Piece]:
+        for key, digest, read in verses:
+            yield key, digest, _encoded(read, lines(verse_training_lines))
+        for key, digest, read in commentary:
+            yield key, digest, _encoded(read, lines(commentary_training_lines))
+
+    return None, verses + commentary, pieces()
+
+
+def _load_manifest(path: Path, kind: str) -> Optional[Dict[str, Any]]:
+    """The manifest of ``path`` if it still describes the file on disk."""
+    try:
+        manifest = storage.read_json(manifest_path(path))
+        stat = path.stat()
+    except (OSError, ValueError):
+        return None
+    if (
+        manifest.get("format") != MANIFEST_FORMAT
+        or manifest.get("kind") != kind
+        or manifest.get("size") != stat.st_size
+        or manifest.get("mtime_ns") != stat.st_mtime_ns
+    ):
+        return None
+    return manifest
+
+
+def _write(
+    path: Path,
+    kind: str,
+    frame: Optional[str],
+    records,
+    pieces: Iterator[Piece],
+    full: bool,
+    progress: Optional[Progress],
+) -> Path:
+    total = len(records)
+    previous = None if full else _load_manifest(path, kind)
+    if (
+        previous is not None
+        and previous.get("frame") == frame
+        and [entry[:2] for entry in previous["records"]] == [[key, digest] for key, digest, _ in records]
+    ):
+        if progress is not None:
+            progress(total, total)
+        return path
+    reusable = {entry[0]: entry[1:] for entry in previous["records"]} if previous else {}
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    entries: List[List[Any]] = []
+    offset = 0
+    old = path.open("rb") if reusable else None
+    try:
+        with tmp.open("wb") as handle:
+            for piece in pieces:
+                if isinstance(piece, bytes):
+                    handle.write(piece)
+                    offset += len(piece)
+                    continue
+                key, digest, produce = piece
+                reuse = reusable.get(key)
+                if reuse is not None and reuse[0] == digest:
+                    old.seek(reuse[1])
+                    data = old.read(reuse[2])
+                else:
+                    data = produce()
+                handle.write(data)
+                entries.append([key, digest, offset, len(data)])
+                offset += len(data)
+                if progress is not None:
+                    progress(len(entries), total)
+        # Drop the old manifest first so a crash never pairs it with the new output.
+        manifest_path(path).unlink(missing_ok=True)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        if old is not None:
+            old.close()
+    stat = path.stat()
+    storage.write_json(
+        manifest_path(path),
+        {
+            "format": MANIFEST_FORMAT,
+            "kind": kind,
+            "frame": frame,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "records": entries,
+        },
+    )
+    return path
+
+
+def _export(path: Path, kind: str, build: Callable, full: bool, progress: Optional[Progress]) -> Path:
+    for attempt in range(EXPORT_ATTEMPTS):
+        frame, records, pieces = build()
+        if progress is not None:
+            progress(0, len(records))
+        try:
+            return _write(path, kind, frame, records, pieces, full, progress)
+        except RecordVanished:
+            # Deleted after the listing; list again rather than emit a hole.
+            if attempt == EXPORT_ATTEMPTS - 1:
+                raise
+    raise AssertionError("unreachable")
+
+
+def build_merge(work_id: str, full: bool = False, progress: Optional[Progress] = None) -> Path:
+    """Write ``build/<work_id>.all.json``: the work with all its verses and commentary.
+
+    Records carry their full review history, read back from the history store.
+    """
+    return _export(
+        merge_path(work_id), "merge", lambda: _document_pieces(work_id, None, None, True), full, progress
+    )
+
+
+def export_clean(work_id: str, full: bool = False, progress: Optional[Progress] = None) -> Path:
+    """Write ``export/<work_id>.clean.json``: the merged document without review data."""
+    return _export(
+        clean_path(work_id),
+        "clean",
+        # Review data is stripped, so the history store is not read.
+        lambda: _document_pieces(work_id, clean_verse, clean_commentary, False),
+        full,
+        progress,
+    )
+
+
+class _ShardWriter:
+    """Split training lines over ``part-NNNNN.jsonl[.gz|.xz]`` files in a directory."""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_lines: Optional[int],
+        max_bytes: Optional[int],
+        compression: Optional[str],
+    ) -> None:
+        self.directory = directory
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.shards: List[Dict[str, Any]] = []
+        self._raw = None
+        self._handle = None
+        self._lines = 0
+        self._bytes = 0
+
+    def write(self, line: bytes) -> None:
+        if self._handle is not None and (
+            (self.max_lines and self._lines >= self.max_lines)
+            or (self.max_bytes and self._bytes + len(line) > self.max_bytes)
+        ):
+            self._close_shard()
+        if self._handle is None:
+            self._open_shard()
+        self._handle.write(line)
+        self._lines += 1
+        self._bytes += len(line)
+
+    def _open_shard(self) -> None:
+        name = f"part-{len(self.shards):05d}.jsonl{SHARD_SUFFIXES[self.compression]}"
+        self._raw = (self.directory / name).open("wb")
+        if self.compression == "gzip":
+            # A fixed mtime keeps shards of unchanged content byte-identical.
+            self._handle = gzip.GzipFile(filename="", mode="wb", fileobj=self._raw, mtime=0)
+        elif self.compression == "xz":
+            self._handle = lzma.LZMAFile(self._raw, "wb")
+        else:
+            self._handle = self._raw
+        self.shards.append({"file": name})
+
+    def _close_shard(self) -> None:
+        if self._handle is not self._raw:
+            self._handle.close()
+        self._raw.close()
+        path = self.directory / self.shards[-1]["file"]
+        self.shards[-1].update(
+            lines=self._lines,
+            bytes=self._bytes,
+            size=path.stat().st_size,
+            sha256=_file_sha256(path),
+        )
+        self._handle = self._raw = None
+        self._lines = self._bytes = 0
+
+    def close(self) -> List[Dict[str, Any]]:
+        if self._handle is not None:
+            self._close_shard()
+        return self.shards
+
+    def abort(self) -> None:
+        if self._handle is not None:
+            if self._handle is not self._raw:
+                self._handle.close()
+            self._raw.close()
+
+
+def _train_shards(
+    work_id: str,
+    max_lines: Optional[int],
+    max_bytes: Optional[int],
+    compression: Optional[str],
+    full: bool,
+    progress: Optional[Progress],
+) -> Path:
+    if compression not in SHARD_SUFFIXES:
+        raise ValueError(f"Unknown compression {compression!r}")
+    storage.load_work(work_id)
+    verses, commentary = _records(work_id)
+    target = train_shards_dir(work_id)
+    total = len(verses) + len(commentary)
+    # The manifest lives in the shard directory and is swapped in with it.
+    frame = storage.content_digest(json.dumps([max_lines, max_bytes, compression]))
+    sources = [[key, digest] for key, digest, _ in verses + commentary]
+    previous = None if full else _load_manifest(target / "index.json", "train-shards")
+    if previous is not None and previous.get("frame") == frame and previous["records"] == sources:
+        if progress is not None:
+            progress(total, total)
+        return target / "index.json"
+
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.mkdir(parents=True)
+    writer = _ShardWriter(tmp, max_lines, max_bytes, compression)
+    if progress is not None:
+        progress(0, total)
+    try:
+        processed = 0
+        for records, produce_lines in ((verses, verse_training_lines), (commentary, commentary_training_lines)):
+            for _, _, read in records:
+                try:
+                    record = read()
+                except RecordVanished:
+                    record = None
+                if record is not None:
+                    for line in produce_lines(work_id, record):
+                        writer.write((line + "\n").encode("utf-8"))
+                processed += 1
+                if progress is not None:
+                    progress(processed, total)
+        shards = writer.close()
+        index = {
+            "work_id": work_id,
+            "compression": compression,
+            "max_lines": max_lines,
+            "max_bytes": max_bytes,
+            "lines": sum(shard["lines"] for shard in shards),
+            "shards": shards,
+        }
+        (tmp / "index.json").write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding="utf-8")
+        stat = (tmp / "index.json").stat()
+        storage.write_json(
+            manifest_path(tmp / "index.json"),
+            {
+                "format": MANIFEST_FORMAT,
+                "kind": "train-shards",
+                "frame": frame,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "records": sources,
+            },
+        )
+        # Swap directories so readers see either the old or the new set of shards.
+        old = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.old")
+        if target.exists():
+            os.replace(target, old)
+        os.replace(tmp, target)
+        shutil.rmtree(old, ignore_errors=True)
+    except BaseException:
+        writer.abort()
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return target / "index.json"
+
+
+def export_train(
+    work_id: str,
+    full: bool = False,
+    progress: Optional[Progress] = None,
+    shard_lines: Optional[int] = None,
+    shard_bytes: Optional[int] = None,
+    compression: Optional[str] = None,
+) -> Path:
+    """Write ``export/<work_id>.train.jsonl``: one line per non-empty text.
+
+    With ``shard_lines``, ``shard_bytes`` (uncompressed) or ``compression``
+    the lines go to shards under ``export/<work_id>.train/`` instead, and the
+    path of their ``index.json`` is returned. The shards are only rewritten
+    when a record or an option changed, or with ``full``.
+    """
+    if shard_lines or shard_bytes or compression:
+        return _train_shards(work_id, shard_lines, shard_bytes, compression, full, progress)
+    return _export(train_path(work_id), "train", lambda: _train_pieces(work_id), full, progress)
+
+
+EXPORTERS: Dict[str, Callable[..., Path]] = {
+    "merge": build_merge,
+    "clean": export_clean,
+    "train": export_train,
+}
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _export_work(kind: str, work_id: str, full: bool, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run one work's export (in a pool process) and describe its output."""
+    try:
+        path = EXPORTERS[kind](work_id, full)
+        stat = path.stat()
+        if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+            sha256 = previous["sha256"]
+        else:
+            sha256 = _file_sha256(path)
+        records = len(storage.read_json(manifest_path(path))["records"])
+        return {
+            "work_id": work_id,
+            "output": str(path),
+            "records": records,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+        }
+    except Exception as exc:
+        return {"work_id": work_id, "error": f"{type(exc).__name__}: {exc}"}
+    finally:
+        # Pool processes exit without running atexit hooks.
+        storage.flush_pending_writes()
+
+
+def export_library(
+    kind: str,
+    full: bool = False,
+    workers: Optional[int] = None,
+    progress: Optional[Progress] = None,
+) -> Path:
+    """Export every work with the ``kind`` exporter and write the library manifest.
+
+    Works are spread over ``workers`` processes (``EXPORT_PROCESSES`` by
+    default); with one worker they run in this process. A work that fails is
+    listed with its error instead of stopping the others. ``progress`` counts
+    finished works.
+    """
+    if kind not in EXPORTERS:
+        raise ValueError(f"Unknown export kind {kind!r}")
+    path = library_manifest_path(kind)
+    try:
+        previous = {entry["work_id"]: entry for entry in storage.read_json(path)["works"]}
+    except (OSError, ValueError, KeyError):
+        previous = {}
+    work_ids = storage.list_work_ids()
+    workers = max(1, min(workers or settings.EXPORT_PROCESSES, len(work_ids) or 1))
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def finished(result: Dict[str, Any]) -> None:
+        results[result["work_id"]] = result
+        if progress is not None:
+            progress(len(results), len(work_ids))
+
+    if progress is not None:
+        progress(0, len(work_ids))
+    if workers == 1:
+        for work_id in work_ids:
+            finished(_export_work(kind, work_id, full, previous.get(work_id)))
+    else:
+        # Records written by this process must be visible to the pool.
+        storage.flush_pending_writes()
+        # Spawned rather than forked: the parent runs threads holding locks.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_export_work, kind, work_id, full, previous.get(work_id)) for work_id in work_ids
+            ]
+            for future in as_completed(futures):
+                finished(future.result())
+
+    ordered = [results[work_id] for work_id in work_ids]
+    storage.write_json(
+        path,
+        {
+            "kind": kind,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "works": [result for result in ordered if "error" not in result],
+            "failed": [result for result in ordered if "error" in result],
+        },
+    )
+    return path
@@ -2,21 +2,24 @@
 """Production entry point for the FastAPI application."""
 
 import os
-import uvicorn
-from app import create_app
 
-# Load production environment if available
+# Load production environment before the app reads its settings.
 if os.path.exists('.env.production'):
     from dotenv import load_dotenv
     load_dotenv('.env.production')
 
+import uvicorn
+from app import create_app
+
 app = create_app()
 
 if __name__ == "__main__":
+    # More than one worker needs SESSION_BACKEND=sqlite so that a login made
+    # on one worker is visible to the others.
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=False,
-        workers=1
-    )
\ No newline at end of file
+        workers=int(os.getenv("WEB_CONCURRENCY", "1"))
+    )
@@ -51,7 +51,11 @@ class ReviewBlock(BaseModel):
     required_reviewers: List[str] = Field(
         default_factory=lambda: ["editor", "linguist", "final"]
     )
+    # The full history lives in the per-work history store; records keep a
+    # summary and ``history`` is only filled in on single-item reads.
     history: List[ReviewHistoryEntry] = Field(default_factory=list)
+    history_count: int = 0
+    last_entry: Optional[ReviewHistoryEntry] = None
 
     class Config:
         extra = "forbid"
@@ -0,0 +1,131 @@
+"""Login session stores.
+
+``MemorySessionStore`` keeps sessions in the worker process and is only
+suitable for a single uvicorn worker. ``SQLiteSessionStore`` keeps them in a
+WAL-mode database file shared by every worker on the host. Both expire entries
+after ``max_age`` seconds and sweep expired entries at most once per
+``sweep_interval`` seconds, piggybacking on normal calls.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import settings
+
+
+class MemorySessionStore:
+    def __init__(self, max_age: int, sweep_interval: int = 300) -> None:
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self._sessions: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def set(self, session_id: str, user_id: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (user_id, now + self.max_age)
+        self._maybe_sweep(now)
+
+    def get(self, session_id: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry[1] <= now:
+                self._sessions.pop(session_id, None)
+                entry = None
+        self._maybe_sweep(now)
+        return entry[0] if entry else None
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def sweep(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._sessions.items() if expires_at <= now]
+            for key in expired:
+                del self._sessions[key]
+            self._last_sweep = now
+        return len(expired)
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+
+class SQLiteSessionStore:
+    def __init__(self, path: Path, max_age: int, sweep_interval: int = 300) -> None:
+        self.path = Path(path)
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT PRIMARY KEY,"
+                " user_id TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_by_expiry ON sessions (expires_at)")
+            self._local.conn = conn
+        return conn
+
+    def set(self, session_id: str, user_id: str) -> None:
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, user_id, expires_at) VALUES (?, ?, ?)",
+                (session_id, user_id, now + self.max_age),
+            )
+        self._maybe_sweep(now)
+
+    def get(self, session_id: str) -> Optional[str]:
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT user_id FROM sessions WHERE session_id = ? AND expires_at > ?",
+            (session_id, now),
+        ).fetchone()
+        self._maybe_sweep(now)
+        return row[0] if row else None
+
+    def delete(self, session_id: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def sweep(self) -> int:
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        self._last_sweep = now
+        return cursor.rowcount
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+
+def create_session_store(max_age: int):
+    """Build the store selected by ``SESSION_BACKEND``."""
+    if settings.SESSION_BACKEND == "sqlite":
+        return SQLiteSessionStore(settings.SESSION_DB_PATH, max_age, settings.SESSION_SWEEP_INTERVAL)
+    if settings.SESSION_BACKEND == "memory":
+        return MemorySessionStore(max_age, settings.SESSION_SWEEP_INTERVAL)
+    raise RuntimeError(f"Unknown SESSION_BACKEND {settings.SESSION_BACKEND!r}")
@@ -18,3 +18,56 @@ def _resolve_data_root() -> Path:
 
 
 DATA_ROOT: Final[Path] = _resolve_data_root()
+
+
+def _resolve_sqlite_path() -> Path:
+    override = os.getenv("SQLITE_PATH")
+    if override:
+        return Path(override).expanduser().resolve()
+    return DATA_ROOT / "_library.sqlite3"
+
+
+# "json" keeps one file per record under DATA_ROOT; "sqlite" stores the same
+# records in a single WAL-mode database at SQLITE_PATH.
+STORAGE_BACKEND: Final[str] = os.getenv("STORAGE_BACKEND", "json").strip().lower()
+SQLITE_PATH: Final[Path] = _resolve_sqlite_path()
+
+# "memory" keeps login sessions in the worker process (single worker only);
+# "sqlite" shares them between uvicorn workers through SESSION_DB_PATH.
+SESSION_BACKEND: Final[str] = os.getenv("SESSION_BACKEND", "memory").strip().lower()
+SESSION_DB_PATH: Final[Path] = Path(
+    os.getenv("SESSION_DB_PATH") or DATA_ROOT / "_sessions.sqlite3"
+).expanduser().resolve()
+SESSION_SWEEP_INTERVAL: Final[int] = int(os.getenv("SESSION_SWEEP_INTERVAL", "300"))
+
+# Threads used by storage_async to run blocking file I/O and parsing off the
+# event loop.
+STORAGE_IO_WORKERS: Final[int] = int(os.getenv("STORAGE_IO_WORKERS", "8"))
+
+# Background export jobs run on EXPORT_WORKERS threads; the status of the last
+# EXPORT_JOB_RETENTION finished jobs stays queryable.
+EXPORT_WORKERS: Final[int] = int(os.getenv("EXPORT_WORKERS", "2"))
+EXPORT_JOB_RETENTION: Final[int] = int(os.getenv("EXPORT_JOB_RETENTION", "100"))
+# Processes a library-wide export spreads works over (default: one per CPU).
+EXPORT_PROCESSES: Final[int] = int(os.getenv("EXPORT_PROCESSES", "0")) or (os.cpu_count() or 1)
+
+# When record writes are flushed to disk. Every write goes through a temp file
+# and a rename. "always" fsyncs each file before the rename and its directory
+# before returning. "batch" also fsyncs the file before the rename, but
+# group-commits the directory fsyncs every FSYNC_BATCH_MS milliseconds, so a
+# crash can undo the latest renames but never leaves a damaged record.
+# "never" leaves flushing to the OS, and a power loss can leave records empty
+# or truncated.
+FSYNC_POLICY: Final[str] = os.getenv("FSYNC_POLICY", "batch").strip().lower()
+FSYNC_BATCH_MS: Final[int] = int(os.getenv("FSYNC_BATCH_MS", "50"))
+
+# Review log lines are buffered and appended to the day's file once
+# REVIEW_LOG_BUFFER_BYTES are pending or REVIEW_LOG_FLUSH_MS milliseconds after
+# the first buffered line; 0 writes every line immediately.
+REVIEW_LOG_BUFFER_BYTES: Final[int] = int(os.getenv("REVIEW_LOG_BUFFER_BYTES", "65536"))
+REVIEW_LOG_FLUSH_MS: Final[int] = int(os.getenv("REVIEW_LOG_FLUSH_MS", "200"))
+
+# JSON encoder/decoder: "auto" prefers orjson when installed, "stdlib" forces
+# the json module. JSON_COMPACT_STORAGE drops indentation from stored records.
+JSON_CODEC: Final[str] = os.getenv("JSON_CODEC", "auto").strip().lower()
+JSON_COMPACT_STORAGE: Final[bool] = os.getenv("JSON_COMPACT_STORAGE", "").strip().lower() in ("1", "true", "yes")
@@ -1,41 +1,284 @@
 from __future__ import annotations
 
-import json
+import atexit
+import contextvars
+import copy
+import hashlib
+import heapq
+import itertools
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
+import codec
 import settings
-from models import Commentary, User, Verse, Work
+from models import Commentary, ReviewBlock, User, Verse, Work
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
 WORK_JSON = "work.json"
+ALLOCATOR_JSON = "_allocator.json"
+REVIEW_STATS_JSON = "_review_stats.json"
+HISTORY_LOG = "_history.jsonl"
+HISTORY_INDEX = "_history.idx.jsonl"
+WORK_LOCK_FILE = ".lock"
 VERSES_DIR = "verses"
 COMMENTARY_DIR = "commentary"
 TRASH_DIR = "trash"
 USERS_FILE = "_users.json"
 LOGS_DIR = settings.DATA_ROOT.parent / "logs"
 REVIEW_LOG_DIR = LOGS_DIR / "review"
+REVIEW_ACTIVITY_DIR = REVIEW_LOG_DIR / "activity"
+REVIEW_LOG_INDEX_DIR = REVIEW_LOG_DIR / "index"
+REVIEW_ACTIVITY_READY = "_ready.json"
+REVIEW_ACTIVITY_RECENT = 20
+
+# Languages every stored verse carries a (possibly empty) slot for, after the
+# work's own ``langs``.
+LANG_FALLBACKS = ["bn", "en", "or", "hi", "as"]
 
 VERSE_ID_PATTERN = re.compile(r"^V(\d{4})([a-z]?)$")
 COMMENTARY_ID_PATTERN = re.compile(r"^C-[A-Z0-9]+-V\d{4}-\d{4}$")
 
+# Guards the in-process indexes of one work; see :func:`_index_lock`.
+_INDEX_LOCKS: Dict[str, threading.RLock] = {}
+_INDEX_LOCKS_GUARD = threading.Lock()
+_USERS_LOCK = threading.RLock()
+
+
+def _index_lock(work_id: str) -> threading.RLock:
+    """The lock of a work's cached indexes, so works do not wait on each other."""
+    with _INDEX_LOCKS_GUARD:
+        lock = _INDEX_LOCKS.get(work_id)
+        if lock is None:
+            lock = _INDEX_LOCKS[work_id] = threading.RLock()
+        return lock
+
 
 def read_json(path: Path) -> Dict:
-    with path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+    return codec.loads(path.read_bytes())
+
+
+def content_digest(data: Union[str, bytes]) -> str:
+    """Short hex digest identifying a stored document's content."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
 
 
-def _default_encoder(value):
-    if isinstance(value, datetime):
-        return value.isoformat()
-    raise TypeError(f"Object of type {type(value)} is not JSON serializable")
+_default_encoder = codec.default
+
+
+def _fsync_path(path: Path) -> None:
+    """fsync a file or (on POSIX) a directory by path."""
+    if path.is_dir() and os.name != "posix":
+        return
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CommitBatch:
+    """Writes made inside :func:`batch_commit`, made durable together.
+
+    ``commit`` fsyncs every appended file and then each distinct directory
+    once, so a bulk operation pays one directory fsync instead of one per
+    record. Replaced records are fsynced before their rename and only need
+    their directory synced here.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.files: Set[Path] = set()
+        self.directories: Set[Path] = set()
+
+    def add(self, path: Path) -> None:
+        with self._lock:
+            self.files.add(path)
+
+    def add_directory(self, directory: Path) -> None:
+        with self._lock:
+            self.directories.add(directory)
+
+    def commit(self) -> None:
+        with self._lock:
+            files, self.files = self.files, set()
+            directories, self.directories = self.directories, set()
+        if settings.FSYNC_POLICY == "never":
+            return
+        for path in sorted(files):
+            _fsync_path(path)
+        for directory in sorted(directories | {path.parent for path in files}):
+            _fsync_path(directory)
+
+
+class _GroupCommitter:
+    """Background thread that fsyncs pending writes every ``interval`` seconds."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._batch = CommitBatch()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def add(self, path: Path) -> None:
+        self._batch.add(path)
+        self._start()
+
+    def add_directory(self, directory: Path) -> None:
+        self._batch.add_directory(directory)
+        self._start()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="storage-group-commit", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self) -> None:
+        self._batch.commit()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+if settings.FSYNC_POLICY not in ("always", "batch", "never"):
+    raise RuntimeError(f"Unknown FSYNC_POLICY {settings.FSYNC_POLICY!r}")
+
+_GROUP_COMMITTER = _GroupCommitter(settings.FSYNC_BATCH_MS / 1000)
+atexit.register(_GROUP_COMMITTER.flush)
+_CURRENT_BATCH: ContextVar[Optional[CommitBatch]] = ContextVar("storage_commit_batch", default=None)
+
+
+@contextmanager
+def use_batch(batch: CommitBatch) -> Iterator[CommitBatch]:
+    """Route the fsyncs of writes made in this context into ``batch``.
+
+    The batch is carried in a context variable, so writes made from worker
+    threads started with a copy of the context (``storage_async.run_io``)
+    join it as well. Committing is left to the caller.
+    """
+    token = _CURRENT_BATCH.set(batch)
+    try:
+        yield batch
+    finally:
+        _CURRENT_BATCH.reset(token)
+
+
+@contextmanager
+def batch_commit() -> Iterator[CommitBatch]:
+    """Defer fsyncs of every write made in this context to one commit at exit."""
+    batch = CommitBatch()
+    with use_batch(batch):
+        yield batch
+    batch.commit()
+
+
+def flush_pending_writes() -> None:
+    """Write buffered review log lines and fsync everything written so far."""
+    flush_review_log()
+    _GROUP_COMMITTER.flush()
 
 
 def write_json(path: Path, payload: Dict) -> None:
+    """Atomically replace ``path`` with ``payload`` serialized as JSON.
+
+    The document is written to a temporary sibling, fsynced and renamed over
+    the target, so readers and crashes only ever see the old or the new file.
+    ``FSYNC_POLICY`` and an enclosing :func:`batch_commit` only decide when
+    the directory is fsynced, i.e. when the rename itself is durable. With
+    ``never`` nothing is fsynced and a power loss can leave the record empty
+    or truncated. The encoding is governed by :mod:`codec`.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=False, indent=2, default=_default_encoder)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    batch = _CURRENT_BATCH.get()
+    policy = settings.FSYNC_POLICY
+    try:
+        data = codec.dumps_record(payload)
+        with tmp.open("wb") as handle:
+            handle.write(data)
+            if policy != "never":
+                # The data must be on disk before the rename can be.
+                handle.flush()
+                os.fsync(handle.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if policy == "never":
+        return
+    if batch is not None:
+        batch.add_directory(path.parent)
+    elif policy == "always":
+        _fsync_path(path.parent)
+    else:
+        _GROUP_COMMITTER.add_directory(path.parent)
+
+
+def _write_json_many(items: List[Tuple[Path, Dict]]) -> List[Optional[Exception]]:
+    """:func:`write_json` for many files, spread over ``STORAGE_IO_WORKERS`` threads.
+
+    Each write runs in a copy of the caller's context so it joins the
+    caller's commit batch. Returns the error of each write (``None`` when it
+    succeeded); one failed write does not stop the others.
+    """
+    workers = min(settings.STORAGE_IO_WORKERS, len(items))
+    if workers <= 1:
+        errors: List[Optional[Exception]] = []
+        for path, payload in items:
+            try:
+                write_json(path, payload)
+            except Exception as exc:
+                errors.append(exc)
+            else:
+                errors.append(None)
+        return errors
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-write") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, write_json, path, payload) for path, payload in items]
+        return [future.exception() for future in futures]
+
+
+def _append_bytes(path: Path, data: bytes) -> int:
+    """Append ``data`` to ``path`` and return the offset it was written at.
+
+    Durability follows the same ``FSYNC_POLICY`` / :func:`batch_commit` rules as
+    :func:`write_json`.
+    """
+    batch = _CURRENT_BATCH.get()
+    policy = settings.FSYNC_POLICY
+    with path.open("ab") as handle:
+        offset = handle.tell()
+        handle.write(data)
+        if policy == "always" and batch is None:
+            handle.flush()
+            os.fsync(handle.fileno())
+    if policy == "never":
+        pass
+    elif batch is not None:
+        batch.add(path)
+    elif policy != "always":
+        _GROUP_COMMITTER.add(path)
+    return offset
 
 
 def list_work_ids() -> List[str]:
@@ -78,25 +321,294 @@ def save_work(work: Work) -> None:
     write_json(work_path(work.work_id), work.dict(by_alias=True))
 
 
-def list_verses(work_id: str) -> List[Verse]:
-    verses_dir = work_dir(work_id) / VERSES_DIR
-    if not verses_dir.exists():
-        return []
-    verses: List[Verse] = []
-    for file_path in sorted(verses_dir.glob("V*.json")):
-        verses.append(Verse.parse_obj(read_json(file_path)))
-    verses.sort(key=lambda v: v.order)
-    return verses
+_FILE_LOCKS: Dict[Path, threading.Lock] = {}
+_FILE_LOCKS_GUARD = threading.Lock()
+_FILE_LOCKS_HELD = threading.local()
+
+
+@contextmanager
+def _file_lock(lock_path: Path) -> Iterator[None]:
+    """Serialise updates of derived files between threads and, on POSIX, processes.
+
+    Each lock file has its own thread lock, taken before the flock, so holders
+    of different lock files never wait on each other. Re-entrant within a
+    thread; only the outermost holder takes the locks.
+    """
+    held = getattr(_FILE_LOCKS_HELD, "paths", None)
+    if held is None:
+        held = _FILE_LOCKS_HELD.paths = set()
+    if lock_path in held:
+        yield
+        return
+    with _FILE_LOCKS_GUARD:
+        lock = _FILE_LOCKS.get(lock_path)
+        if lock is None:
+            lock = _FILE_LOCKS[lock_path] = threading.Lock()
+    with lock:
+        held.add(lock_path)
+        try:
+            if fcntl is None:
+                yield
+                return
+            with lock_path.open("a+b") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+        finally:
+            held.discard(lock_path)
+
+
+def _work_lock(work_id: str):
+    return _file_lock(work_dir(work_id) / WORK_LOCK_FILE)
+
+
+def _file_signature(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _dir_mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+FIELD_PATH_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+def projection_paths(fields: Iterable[str]) -> List[str]:
+    """Validate dotted field paths and drop those already covered by a parent path."""
+    paths = sorted(set(fields))
+    for path in paths:
+        if not FIELD_PATH_PATTERN.match(path):
+            raise ValueError(f"Invalid field path {path!r}")
+    return [path for path in paths if not any(path.startswith(other + ".") for other in paths)]
+
+
+def project(doc: Dict, fields: Iterable[str]) -> Dict:
+    """Copy only ``fields`` (dotted paths such as ``"review.state"``) out of a document.
+
+    The result keeps the document's nesting and shares nothing with ``doc``;
+    paths missing from the document come out as ``None``. ``fields`` must have
+    gone through :func:`projection_paths`.
+    """
+    projected: Dict = {}
+    for field in fields:
+        parts = field.split(".")
+        value = doc
+        for part in parts:
+            value = value.get(part) if isinstance(value, dict) else None
+        target = projected
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = copy.deepcopy(value)
+    return projected
+
+
+def list_verses(work_id: str, fields: Optional[Sequence[str]] = None) -> List:
+    """Return the verses of ``work_id`` ordered by ``order``.
+
+    The returned models are copies of the in-process index's. With
+    ``fields`` the verses are returned as :func:`project`-ed dicts of the
+    stored documents instead, and nothing is validated.
+    """
+    with _index_lock(work_id):
+        index = _verse_index(work_id)
+        if index is None:
+            return []
+        if fields is not None:
+            paths = projection_paths(fields)
+            return [project(entry.doc, paths) for entry in index.ordered()]
+        return [entry.model() for entry in index.ordered()]
+
+
+def iter_verse_digests(work_id: str) -> Iterator[Tuple[str, str]]:
+    """Yield ``(verse_id, content digest)`` in :func:`list_verses` order without validating."""
+    with _index_lock(work_id):
+        index = _verse_index(work_id)
+        entries = [] if index is None else list(index.ordered())
+    for entry in entries:
+        yield entry.doc["verse_id"], entry.digest()
+
+
+def count_verses(work_id: str) -> int:
+    with _index_lock(work_id):
+        index = _verse_index(work_id)
+        return 0 if index is None else len(index.entries)
+
+
+def list_verses_window(
+    work_id: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    after_order: Optional[int] = None,
+) -> List[Verse]:
+    """Return one page of verses by ``order``.
+
+    ``after_order`` is a keyset cursor: the page starts at the first verse
+    whose order is greater than it, then skips ``offset`` more. Only the
+    returned verses are validated.
+    """
+    with _index_lock(work_id):
+        index = _verse_index(work_id)
+        if index is None:
+            return []
+        return [entry.model() for entry in index.window(offset, limit, after_order)]
+
+
+def expected_languages(work: Work) -> List[str]:
+    """The work's languages followed by the missing ``LANG_FALLBACKS``."""
+    languages: List[str] = []
+    for lang in [*(work.langs or []), *LANG_FALLBACKS]:
+        if lang not in languages:
+            languages.append(lang)
+    return languages
+
+
+def normalize_language_fields(doc: Dict, languages: List[str]) -> Dict:
+    """Give a verse document's ``texts``, ``segments`` and ``hash`` exactly ``languages`` as keys."""
+    texts = doc.get("texts") or {}
+    segments = doc.get("segments") or {}
+    hashes = doc.get("hash") or {}
+    doc["texts"] = {lang: texts.get(lang) for lang in languages}
+    doc["segments"] = {lang: list(segments.get(lang) or []) for lang in languages}
+    doc["hash"] = {lang: hashes.get(lang) for lang in languages}
+    return doc
+
+
+def has_language_shape(doc: Dict, languages: List[str]) -> bool:
+    return all(list(doc.get(field) or {}) == languages for field in ("texts", "segments", "hash"))
+
+
+def normalize_verses(work_id: str) -> int:
+    """Rewrite the verses of a work that are not in the work's language shape.
+
+    Verses are normalized when they are written, so this is only needed for
+    records written by older releases or after the work's ``langs`` changed.
+    Returns the number of verses rewritten.
+    """
+    languages = expected_languages(load_work(work_id))
+    stale = [doc["verse_id"] for doc in list_verse_docs(work_id) if not has_language_shape(doc, languages)]
+    verses = load_verses(work_id, stale)
+    for verse in verses.values():
+        doc = normalize_language_fields({"texts": verse.texts, "segments": verse.segments, "hash": verse.hash}, languages)
+        verse.texts, verse.segments, verse.hash = doc["texts"], doc["segments"], doc["hash"]
+    save_verses(work_id, list(verses.values()))
+    return len(verses)
+
+
+def list_verse_docs(
+    work_id: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    after_order: Optional[int] = None,
+) -> List[Dict]:
+    """Like :func:`list_verses_window` but returns copies of the stored documents unvalidated."""
+    with _index_lock(work_id):
+        index = _verse_index(work_id)
+        if index is None:
+            return []
+        return [entry.copy_doc() for entry in index.window(offset, limit, after_order)]
 
 
 def load_verse(work_id: str, verse_id: str) -> Verse:
     return Verse.parse_obj(read_json(verse_path(work_id, verse_id)))
 
 
+def load_verse_doc(work_id: str, verse_id: str) -> Dict:
+    """Return the stored document of a verse without validating it."""
+    return read_json(verse_path(work_id, verse_id))
+
+
+def load_verses(work_id: str, verse_ids: Iterable[str]) -> Dict[str, Verse]:
+    """Return mutable copies of the requested verses that exist, by verse id."""
+    with _index_lock(work_id):
+        index = _verse_index(work_id)
+        if index is None:
+            return {}
+        found = {verse_id: index.entries.get(verse_id) for verse_id in verse_ids}
+        return {verse_id: entry.model() for verse_id, entry in found.items() if entry is not None}
+
+
+def _stored_verse_state(work_id: str, verse_id: str) -> Optional[str]:
+    """Review state of the verse file currently on disk, or ``None`` if absent."""
+    path = verse_path(work_id, verse_id)
+    try:
+        signature = _file_signature(path)
+    except FileNotFoundError:
+        return None
+    index = _VERSE_INDEXES.get(work_id)
+    cached = index.entries.get(verse_id) if index else None
+    if cached is not None and cached.signature == signature:
+        return _review_state(cached.doc)
+    try:
+        return _review_state(read_json(path))
+    except FileNotFoundError:
+        return None
+
+
 def save_verse(verse: Verse) -> None:
-    write_json(
-        verse_path(verse.work_id, verse.verse_id), verse.dict(by_alias=True)
-    )
+    try:
+        save_verses(verse.work_id, [verse])
+    except PartialSaveError as exc:
+        raise exc.failed[verse.verse_id]
+
+
+class PartialSaveError(Exception):
+    """Some records of a batch save were not written; the others were.
+
+    ``failed`` maps the id of each record that was not written to its error.
+    """
+
+    def __init__(self, failed: Dict[str, Exception]) -> None:
+        super().__init__(f"{len(failed)} record(s) not saved")
+        self.failed = failed
+
+
+def save_verses(work_id: str, verses: List[Verse]) -> None:
+    """Save several verses of one work under one lock and one counter update.
+
+    The verse files are written concurrently (see :func:`_write_json_many`).
+    If some writes fail, the verses that were written are indexed and counted
+    as usual and :class:`PartialSaveError` names the ones that were not.
+    """
+    prepared = []
+    for verse in verses:
+        payload = verse.dict(by_alias=True)
+        legacy_history = _split_history(payload)
+        cached = verse.copy(deep=True)
+        cached.review = ReviewBlock.parse_obj(payload["review"])
+        prepared.append((verse, payload, cached, legacy_history))
+    work_dir(work_id).mkdir(parents=True, exist_ok=True)
+    with _work_lock(work_id), _index_lock(work_id):
+        legacy = [
+            ("verse", verse.verse_id, entry) for verse, _, _, history in prepared for entry in history
+        ]
+        if legacy:
+            append_review_histories(work_id, legacy)
+        stats = _load_review_stats(work_id)
+        previous = [_stored_verse_state(work_id, verse.verse_id) for verse, _, _, _ in prepared]
+        before = _dir_mtime_ns(work_dir(work_id) / VERSES_DIR)
+        errors = _write_json_many([(verse_path(work_id, verse.verse_id), payload) for verse, payload, _, _ in prepared])
+        failed: Dict[str, Exception] = {}
+        changed = False
+        for (verse, payload, cached, _), state, error in zip(prepared, previous, errors):
+            if error is not None:
+                failed[verse.verse_id] = error
+                continue
+            _sync_verse_index(work_id, verse.verse_id, payload, cached, before)
+            _track_allocation(work_id, verse.verse_id, verse.number_manual)
+            current = _review_state(payload)
+            if state != current:
+                stats.move(VERSES_DIR, state, current)
+                changed = True
+        if changed:
+            _store_review_stats(work_id, stats)
+    if failed:
+        raise PartialSaveError(failed)
 
 
 def _tombstone_path(kind: str, identifier: str, work_id: str) -> Path:
@@ -126,10 +638,9 @@ def _create_tombstone(kind: str, identifier: str, work_id: str, actor: str, orig
 def manual_number_exists(work_id: str, number_manual: Optional[str], exclude: Optional[str] = None) -> bool:
     if not number_manual:
         return False
-    for verse in list_verses(work_id):
-        if verse.number_manual == number_manual and verse.verse_id != exclude:
-            return True
-    return False
+    with _work_lock(work_id):
+        owner = _load_allocator(work_id).manual_numbers.get(number_manual)
+    return owner is not None and owner != exclude
 
 
 def delete_verse(work_id: str, verse_id: str, actor: str) -> None:
@@ -138,61 +649,157 @@ def delete_verse(work_id: str, verse_id: str, actor: str) -> None:
         return
     dest = work_dir(work_id) / TRASH_DIR / VERSES_DIR / src.name
     dest.parent.mkdir(parents=True, exist_ok=True)
-    src.replace(dest)
+    with _work_lock(work_id), _index_lock(work_id):
+        stats = _load_review_stats(work_id)
+        previous = _stored_verse_state(work_id, verse_id)
+        before = _dir_mtime_ns(src.parent)
+        src.replace(dest)
+        _sync_verse_index(work_id, verse_id, None, None, before)
+        _track_allocation(work_id, verse_id, None)
+        _track_review_state(work_id, stats, VERSES_DIR, previous, None)
     _create_tombstone("verses", verse_id, work_id, actor, src, dest)
 
 
-def list_commentary(work_id: str) -> List[Commentary]:
-    base = work_dir(work_id) / COMMENTARY_DIR
-    if not base.exists():
-        return []
-    items: List[Commentary] = []
-    for json_path in base.glob("**/*.json"):
-        data = read_json(json_path)
-        commentary = Commentary.parse_obj(data)
-        items.append(commentary)
-    return items
-
-
-def list_commentary_for_verse(work_id: str, verse_id: str) -> List[Commentary]:
-    results: List[Commentary] = []
-    for commentary in list_commentary(work_id):
-        if commentary.verse_id == verse_id:
-            results.append(commentary)
-            continue
-        targets = commentary.targets or []
-        if any(verse_id in target.ids for target in targets):
-            results.append(commentary)
-    return results
+def list_commentary(work_id: str, fields: Optional[Sequence[str]] = None) -> List:
+    """Return every commentary of ``work_id`` (copies of the cached models).
+
+    With ``fields``, returns unvalidated :func:`project`-ed dicts instead.
+    """
+    with _index_lock(work_id):
+        index = _commentary_index(work_id)
+        index.refresh_all()
+        entries = [index.records[cid] for cid in sorted(index.records)]
+        if fields is not None:
+            paths = projection_paths(fields)
+            return [project(entry.doc, paths) for entry in entries]
+        return [entry.model() for entry in entries]
+
+
+def iter_commentary_digests(work_id: str) -> Iterator[Tuple[str, str]]:
+    """Yield ``(commentary_id, content digest)`` in :func:`list_commentary` order."""
+    with _index_lock(work_id):
+        index = _commentary_index(work_id)
+        index.refresh_all()
+        entries = [(cid, index.records[cid]) for cid in sorted(index.records)]
+    for commentary_id, entry in entries:
+        yield commentary_id, entry.digest()
+
+
+def list_commentary_for_verse(work_id: str, verse_id: str, fields: Optional[Sequence[str]] = None) -> List:
+    """Commentary targeting ``verse_id``; with ``fields`` as projected dicts (see :func:`list_commentary`)."""
+    with _index_lock(work_id):
+        entries = _commentary_index(work_id).for_verse(verse_id)
+        if fields is not None:
+            paths = projection_paths(fields)
+            return [project(entry.doc, paths) for entry in entries]
+        return [entry.model() for entry in entries]
 
 
 def load_commentary(work_id: str, commentary_id: str) -> Commentary:
-    base = work_dir(work_id) / COMMENTARY_DIR
-    if not base.exists():
+    with _index_lock(work_id):
+        path = _commentary_index(work_id).locate(commentary_id)
+    if path is None:
         raise FileNotFoundError(commentary_id)
-    matches = list(base.glob(f"**/{commentary_id}.json"))
-    if not matches:
+    return Commentary.parse_obj(read_json(path))
+
+
+def load_commentary_doc(work_id: str, commentary_id: str) -> Dict:
+    """Return the stored document of a commentary without validating it."""
+    with _index_lock(work_id):
+        path = _commentary_index(work_id).locate(commentary_id)
+    if path is None:
         raise FileNotFoundError(commentary_id)
-    data = read_json(matches[0])
-    return Commentary.parse_obj(data)
+    return read_json(path)
+
+
+def list_pending_reviews(
+    work_ids: Optional[List[str]] = None,
+    limit: int = 50,
+    after: Optional[PendingKey] = None,
+) -> Tuple[List[PendingKey], int]:
+    """Return one page of the review queue and the queue's total size.
+
+    The queue holds every verse and commentary in a :data:`PENDING_REVIEW_STATES`
+    state, newest :data:`PendingKey` first; ``after`` is the last key of the
+    previous page. Only keys are returned, so callers load just the page.
+    """
+    queues: List[_PendingQueue] = []
+    with ExitStack() as locks:
+        # Taken in a fixed order; writers only ever hold their own work's lock.
+        for work_id in sorted(list_work_ids() if work_ids is None else work_ids):
+            locks.enter_context(_index_lock(work_id))
+            verse_index = _verse_index(work_id)
+            if verse_index is not None:
+                queues.append(verse_index.pending)
+            commentary_index = _commentary_index(work_id)
+            commentary_index.refresh_all()
+            queues.append(commentary_index.pending)
+        total = sum(len(queue.keys) for queue in queues)
+        merged = heapq.merge(*(queue.before(after) for queue in queues), reverse=True)
+        return list(itertools.islice(merged, limit)), total
+
+
+def _stored_commentary_state(index: _CommentaryIndex, commentary_id: str) -> Optional[str]:
+    """Review state of the commentary file currently on disk, or ``None`` if absent."""
+    path = index.locate(commentary_id)
+    if path is None:
+        return None
+    try:
+        signature = _file_signature(path)
+        cached = index.records.get(commentary_id)
+        if cached is not None and cached.signature == signature:
+            return _review_state(cached.doc)
+        return _review_state(read_json(path))
+    except FileNotFoundError:
+        return None
 
 
 def save_commentary(commentary: Commentary) -> None:
     verse_id = commentary.verse_id
     path = commentary_path(commentary.work_id, commentary.commentary_id, verse_id)
-    write_json(path, commentary.dict(by_alias=True))
+    payload = commentary.dict(by_alias=True)
+    legacy_history = _split_history(payload)
+    cached = commentary.copy(deep=True)
+    cached.review = ReviewBlock.parse_obj(payload["review"])
+    work_dir(commentary.work_id).mkdir(parents=True, exist_ok=True)
+    with _work_lock(commentary.work_id), _index_lock(commentary.work_id):
+        for entry in legacy_history:
+            append_review_history("commentary", commentary.work_id, commentary.commentary_id, entry)
+        stats = _load_review_stats(commentary.work_id)
+        index = _commentary_index(commentary.work_id)
+        previous = _stored_commentary_state(index, commentary.commentary_id)
+        bucket = path.parent.name
+        base_before = _dir_mtime_ns(index.base)
+        bucket_before = _dir_mtime_ns(path.parent)
+        base_current = base_before is not None and index.base_mtime_ns == base_before
+        bucket_current = bucket_before is not None and index.bucket_mtimes.get(bucket) == bucket_before
+        write_json(path, payload)
+        index.put(path, _CachedCommentary(_file_signature(path), payload, cached))
+        if base_current:
+            index.base_mtime_ns = _dir_mtime_ns(index.base)
+        if bucket_current or (base_current and bucket_before is None):
+            index.bucket_mtimes[bucket] = _dir_mtime_ns(path.parent)
+        _track_review_state(commentary.work_id, stats, COMMENTARY_DIR, previous, commentary.review.state)
 
 
 def delete_commentary(work_id: str, commentary_id: str, actor: str) -> None:
-    base = work_dir(work_id) / COMMENTARY_DIR
-    matches = list(base.glob(f"**/{commentary_id}.json"))
-    if not matches:
-        return
-    src = matches[0]
-    rel = src.relative_to(work_dir(work_id))
-    dest = work_dir(work_id) / TRASH_DIR / rel
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    src.replace(dest)
+    with _work_lock(work_id), _index_lock(work_id):
+        index = _commentary_index(work_id)
+        src = index.locate(commentary_id)
+        if src is None:
+            return
+        stats = _load_review_stats(work_id)
+        previous = _stored_commentary_state(index, commentary_id)
+        rel = src.relative_to(work_dir(work_id))
+        dest = work_dir(work_id) / TRASH_DIR / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        bucket = src.parent.name
+        bucket_current = index.bucket_mtimes.get(bucket) == _dir_mtime_ns(src.parent)
+        src.replace(dest)
+        index.discard(commentary_id)
+        if bucket_current:
+            index.bucket_mtimes[bucket] = _dir_mtime_ns(src.parent)
+        _track_review_state(work_id, stats, COMMENTARY_DIR, previous, None)
     _create_tombstone(
         "commentary",
         commentary_id,
@@ -203,6 +810,46 @@ def delete_commentary(work_id: str, commentary_id: str, actor: str) -> None:
     )
 
 
+class DuplicateManualNumber(ValueError):
+    """Raised when a manual number is already used by another verse of the work."""
+
+
+class _VerseAllocator:
+    """Next verse sequence number and number_manual -> verse_id map of a work."""
+
+    __slots__ = ("signature", "next_number", "manual_numbers", "by_verse")
+
+    def __init__(self, next_number: int, manual_numbers: Dict[str, str]) -> None:
+        self.signature: Optional[Tuple[int, int]] = None
+        self.next_number = next_number
+        self.manual_numbers = manual_numbers
+        self.by_verse = {verse_id: number for number, verse_id in manual_numbers.items()}
+
+    def assign(self, verse_id: str, number_manual: Optional[str]) -> bool:
+        """Record ``verse_id``'s manual number; return whether anything changed."""
+        previous = self.by_verse.get(verse_id)
+        if previous == (number_manual or None):
+            return False
+        if previous is not None:
+            del self.by_verse[verse_id]
+            if self.manual_numbers.get(previous) == verse_id:
+                del self.manual_numbers[previous]
+        if number_manual and self.manual_numbers.setdefault(number_manual, verse_id) == verse_id:
+            self.by_verse[verse_id] = number_manual
+        return True
+
+    def payload(self) -> Dict:
+        return {"next_number": self.next_number, "manual_numbers": dict(sorted(self.manual_numbers.items()))}
+
+
+_ALLOCATORS: Dict[str, _VerseAllocator] = {}
+
+
+def _verse_number(verse_id: str) -> Optional[int]:
+    match = VERSE_ID_PATTERN.match(verse_id)
+    return int(match.group(1)) if match else None
+
+
 def _existing_verse_ids(work_id: str) -> Iterable[str]:
     verses_dir = work_dir(work_id) / VERSES_DIR
     if not verses_dir.exists():
@@ -210,26 +857,101 @@ def _existing_verse_ids(work_id: str) -> Iterable[str]:
     return (path.stem for path in verses_dir.glob("V*.json"))
 
 
+def _build_allocator(work_id: str) -> _VerseAllocator:
+    numbers = [_verse_number(verse_id) or 0 for verse_id in _existing_verse_ids(work_id)]
+    allocator = _VerseAllocator(max(numbers, default=0) + 1, {})
+    for verse in list_verses(work_id, fields=("verse_id", "number_manual")):
+        allocator.assign(verse["verse_id"], verse["number_manual"])
+    return allocator
+
+
+def _store_allocator(work_id: str, allocator: _VerseAllocator) -> None:
+    path = work_dir(work_id) / ALLOCATOR_JSON
+    write_json(path, allocator.payload())
+    allocator.signature = _file_signature(path)
+    _ALLOCATORS[work_id] = allocator
+
+
+def _load_allocator(work_id: str) -> _VerseAllocator:
+    """Return the work's allocator, rebuilding ``_allocator.json`` if it is missing.
+
+    Must be called with :func:`_work_lock` held.
+    """
+    path = work_dir(work_id) / ALLOCATOR_JSON
+    try:
+        signature = _file_signature(path)
+    except FileNotFoundError:
+        allocator = _build_allocator(work_id)
+        _store_allocator(work_id, allocator)
+        return allocator
+    cached = _ALLOCATORS.get(work_id)
+    if cached is not None and cached.signature == signature:
+        return cached
+    data = read_json(path)
+    allocator = _VerseAllocator(data["next_number"], dict(data.get("manual_numbers") or {}))
+    allocator.signature = signature
+    _ALLOCATORS[work_id] = allocator
+    return allocator
+
+
+def _track_allocation(work_id: str, verse_id: str, number_manual: Optional[str]) -> None:
+    """Keep the allocator in step with a saved (or, for ``None``, deleted) verse."""
+    number = _verse_number(verse_id) or 0
+    cached = _ALLOCATORS.get(work_id)
+    if (
+        cached is not None
+        and cached.by_verse.get(verse_id) == (number_manual or None)
+        and number < cached.next_number
+    ):
+        return
+    with _work_lock(work_id):
+        allocator = _load_allocator(work_id)
+        changed = allocator.assign(verse_id, number_manual)
+        if number >= allocator.next_number:
+            allocator.next_number = number + 1
+            changed = True
+        if changed:
+            _store_allocator(work_id, allocator)
+
+
+def allocate_verse_id(work_id: str, number_manual: Optional[str] = None) -> Tuple[str, int]:
+    """Reserve the next verse id and, if given, the verse's manual number.
+
+    Raises :class:`DuplicateManualNumber` if the manual number is taken.
+    """
+    with _work_lock(work_id):
+        allocator = _load_allocator(work_id)
+        if number_manual and number_manual in allocator.manual_numbers:
+            raise DuplicateManualNumber(number_manual)
+        number = allocator.next_number
+        # Skip ids of verse files copied in without going through the API.
+        while verse_path(work_id, f"V{number:04d}").exists():
+            number += 1
+        verse_id = f"V{number:04d}"
+        allocator.next_number = number + 1
+        allocator.assign(verse_id, number_manual)
+        _store_allocator(work_id, allocator)
+    return verse_id, number
+
+
+def release_verse_id(work_id: str, verse_id: str) -> None:
+    """Give back the manual number reserved for ``verse_id`` if it was never saved."""
+    with _work_lock(work_id):
+        if verse_path(work_id, verse_id).exists():
+            return
+        allocator = _load_allocator(work_id)
+        if allocator.assign(verse_id, None):
+            _store_allocator(work_id, allocator)
+
+
 def generate_verse_id(work_id: str) -> Tuple[str, int]:
-    max_index = 0
-    suffixes: Dict[int, List[str]] = {}
-    for verse_id in _existing_verse_ids(work_id):
-        match = VERSE_ID_PATTERN.match(verse_id)
-        if not match:
-            continue
-        number = int(match.group(1))
-        max_index = max(max_index, number)
-        suffixes.setdefault(number, []).append(match.group(2))
-    next_number = max_index + 1
-    suffix = ""
-    existing_suffixes = set(suffixes.get(next_number, []))
-    alphabet = [chr(code) for code in range(ord("a"), ord("z") + 1)]
-    for candidate in [""] + alphabet:
-        if candidate not in existing_suffixes:
-            suffix = candidate
-            break
-    verse_id = f"V{next_number:04d}{suffix}"
-    return verse_id, next_number
+    return allocate_verse_id(work_id)
+
+
+def rebuild_verse_allocator(work_id: str) -> None:
+    """Recompute ``_allocator.json`` from the verse files of the work."""
+    with _work_lock(work_id):
+        _store_allocator(work_id, _build_allocator(work_id))
 
 
 def generate_commentary_id(work_id: str, verse_id: str) -> str:
@@ -248,20 +970,158 @@ def generate_commentary_id(work_id: str, verse_id: str) -> str:
     return commentary_id
 
 
+REVIEW_STATE_KINDS = (VERSES_DIR, COMMENTARY_DIR)
+
+
+class _ReviewStats:
+    """Per-work item counts by review state, keyed by kind (``verses``/``commentary``)."""
+
+    __slots__ = ("signature", "counts")
+
+    def __init__(self, counts: Dict[str, Dict[str, int]]) -> None:
+        self.signature: Optional[Tuple[int, int]] = None
+        self.counts = {kind: dict(counts.get(kind) or {}) for kind in REVIEW_STATE_KINDS}
+
+    def move(self, kind: str, previous: Optional[str], current: Optional[str]) -> None:
+        states = self.counts[kind]
+        if previous is not None:
+            states[previous] = states.get(previous, 0) - 1
+            if states[previous] <= 0:
+                del states[previous]
+        if current is not None:
+            states[current] = states.get(current, 0) + 1
+
+    def payload(self) -> Dict:
+        return {kind: dict(sorted(states.items())) for kind, states in self.counts.items()}
+
+
+_REVIEW_STATS: Dict[str, _ReviewStats] = {}
+
+
+def count_review_states(work_id: str) -> Dict[str, Dict[str, int]]:
+    """Count review states by scanning every verse and commentary of the work."""
+    stats = _ReviewStats({})
+    for verse in list_verses(work_id, fields=("review.state",)):
+        stats.move(VERSES_DIR, None, _review_state(verse))
+    for commentary in list_commentary(work_id, fields=("review.state",)):
+        stats.move(COMMENTARY_DIR, None, _review_state(commentary))
+    return stats.payload()
+
+
+def _store_review_stats(work_id: str, stats: _ReviewStats) -> None:
+    path = work_dir(work_id) / REVIEW_STATS_JSON
+    write_json(path, stats.payload())
+    stats.signature = _file_signature(path)
+    _REVIEW_STATS[work_id] = stats
+
+
+def _load_review_stats(work_id: str) -> _ReviewStats:
+    """Return the work's counters, rebuilding ``_review_stats.json`` if it is missing.
+
+    Must be called with :func:`_work_lock` held.
+    """
+    path = work_dir(work_id) / REVIEW_STATS_JSON
+    try:
+        signature = _file_signature(path)
+    except FileNotFoundError:
+        stats = _ReviewStats(count_review_states(work_id))
+        _store_review_stats(work_id, stats)
+        return stats
+    cached = _REVIEW_STATS.get(work_id)
+    if cached is not None and cached.signature == signature:
+        return cached
+    stats = _ReviewStats(read_json(path))
+    stats.signature = signature
+    _REVIEW_STATS[work_id] = stats
+    return stats
+
+
+def _track_review_state(
+    work_id: str, stats: _ReviewStats, kind: str, previous: Optional[str], current: Optional[str]
+) -> None:
+    """Apply a state change to counters loaded before the record was written."""
+    if previous != current:
+        stats.move(kind, previous, current)
+        _store_review_stats(work_id, stats)
+
+
+def review_state_counts(work_id: str) -> Dict[str, Dict[str, int]]:
+    """Return ``{"verses": {state: n}, "commentary": {state: n}}`` for the work.
+
+    Served from the counters kept up to date by the save/delete functions.
+    Raises FileNotFoundError for an unknown work.
+    """
+    if not work_path(work_id).exists():
+        raise FileNotFoundError(f"Work {work_id} not found")
+    with _work_lock(work_id):
+        return _load_review_stats(work_id).payload()
+
+
+def rebuild_review_state_counts(work_id: str) -> Dict[str, Dict[str, int]]:
+    """Recompute ``_review_stats.json`` from the records of the work."""
+    with _work_lock(work_id):
+        stats = _ReviewStats(count_review_states(work_id))
+        _store_review_stats(work_id, stats)
+        return stats.payload()
+
+
 def users_path() -> Path:
     return settings.DATA_ROOT / USERS_FILE
 
 
-def load_users() -> List[User]:
+class _UserDirectory:
+    """Parsed ``_users.json`` indexed by id and by lowercased email."""
+
+    def __init__(self, signature: Optional[Tuple[int, int]], users: List[User]) -> None:
+        self.signature = signature
+        self.users = users
+        self.by_id: Dict[str, User] = {}
+        self.by_email: Dict[str, User] = {}
+        for user in users:
+            self.by_id.setdefault(user.id, user)
+            self.by_email.setdefault(user.email.lower(), user)
+
+
+_USER_DIRECTORY: Optional[_UserDirectory] = None
+
+
+def _user_directory() -> _UserDirectory:
+    global _USER_DIRECTORY
     path = users_path()
-    if not path.exists():
-        return []
-    data = read_json(path)
-    return [User.parse_obj(item) for item in data]
+    try:
+        signature: Optional[Tuple[int, int]] = _file_signature(path)
+    except FileNotFoundError:
+        signature = None
+    with _USERS_LOCK:
+        directory = _USER_DIRECTORY
+        if directory is None or directory.signature != signature:
+            users = [User.parse_obj(item) for item in read_json(path)] if signature else []
+            directory = _USER_DIRECTORY = _UserDirectory(signature, users)
+        return directory
+
+
+def load_users() -> List[User]:
+    return [user.copy(deep=True) for user in _user_directory().users]
+
+
+def find_user(user_id: str) -> Optional[User]:
+    user = _user_directory().by_id.get(user_id)
+    return user.copy(deep=True) if user else None
+
+
+def find_user_by_email(email: str) -> Optional[User]:
+    user = _user_directory().by_email.get(email.lower())
+    return user.copy(deep=True) if user else None
 
 
 def save_users(users: List[User]) -> None:
-    write_json(users_path(), [user.dict(by_alias=True) for user in users])
+    global _USER_DIRECTORY
+    path = users_path()
+    with _USERS_LOCK:
+        write_json(path, [user.dict(by_alias=True) for user in users])
+        _USER_DIRECTORY = _UserDirectory(
+            _file_signature(path), [user.copy(deep=True) for user in users]
+        )
 
 
 def delete_work(work_id: str) -> None:
@@ -277,7 +1137,13 @@ def delete_work(work_id: str) -> None:
     
     # Move the work directory
     import shutil
-    shutil.move(str(work_directory), str(trash_dir))
+    with _work_lock(work_id), _index_lock(work_id):
+        shutil.move(str(work_directory), str(trash_dir))
+        _VERSE_INDEXES.pop(work_id, None)
+        _COMMENTARY_INDEXES.pop(work_id, None)
+        _ALLOCATORS.pop(work_id, None)
+        _HISTORY_INDEXES.pop(work_id, None)
+        _REVIEW_STATS.pop(work_id, None)
     
     # Create tombstone
     tombstone = {
@@ -291,21 +1157,95 @@ def delete_work(work_id: str) -> None:
     write_json(tombstone_path, tombstone)
 
 
-def append_review_log(kind: str, work_id: str, identifier: str, payload: Dict) -> None:
-    REVIEW_LOG_DIR.mkdir(parents=True, exist_ok=True)
-    date_key = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    path = REVIEW_LOG_DIR / f"{date_key}.jsonl"
-    entry = {
-        "ts": payload.get("ts") or datetime.now(timezone.utc).isoformat(),
-        "kind": kind,
-        "work_id": work_id,
-        "id": identifier,
-        "actor": payload.get("actor"),
-        "action": payload.get("action"),
-        "from": payload.get("from"),
-        "to": payload.get("to"),
-        "issues": payload.get("issues", []),
-    }
-    with path.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(entry, ensure_ascii=False))
-        handle.write("\n")
+def list_tombstones(work_id: str, kind: Optional[str] = None) -> List[Dict]:
+    base = work_dir(work_id) / TRASH_DIR / "tombstones"
+    if not base.exists():
+        return []
+    pattern = f"{kind}/*.json" if kind else "*/*.json"
+    tombstones = [read_json(path) for path in base.glob(pattern)]
+    tombstones.sort(key=lambda item: item.get("deleted_at", ""))
+    return tombstones
+
+
+# The caching indexes and the review history/log stores live in their own
+# modules, which call back into the helpers above.
+from storage_index import (  # noqa: E402
+    _COMMENTARY_INDEXES,
+    _VERSE_INDEXES,
+    PENDING_REVIEW_STATES,
+    PendingKey,
+    _CachedCommentary,
+    _CommentaryIndex,
+    _PendingQueue,
+    _commentary_index,
+    _review_state,
+    _sync_verse_index,
+    _verse_index,
+)
+from storage_review import (  # noqa: E402
+    _HISTORY_INDEXES,
+    ReviewLogPosition,
+    _split_history,
+    append_review_histories,
+    append_review_history,
+    append_review_log,
+    append_review_logs,
+    close_review_log,
+    flush_review_log,
+    load_review_history,
+    migrate_inline_history,
+    query_review_log,
+    review_activity,
+)
+
+if settings.STORAGE_BACKEND == "sqlite":
+    # Rebind the public API to the SQLite implementation. Helpers defined above
+    # in terms of these names (e.g. generate_verse_id) follow automatically.
+    from storage_sqlite import (  # noqa: E402
+        _existing_verse_ids,
+        allocate_verse_id,
+        append_review_histories,
+        append_review_history,
+        append_review_log,
+        append_review_logs,
+        count_review_states,
+        count_verses,
+        delete_commentary,
+        delete_verse,
+        delete_work,
+        find_user,
+        find_user_by_email,
+        generate_commentary_id,
+        iter_commentary_digests,
+        iter_verse_digests,
+        list_commentary,
+        list_commentary_for_verse,
+        list_pending_reviews,
+        list_tombstones,
+        list_verse_docs,
+        list_verses,
+        list_verses_window,
+        list_work_ids,
+        load_commentary,
+        load_commentary_doc,
+        load_review_history,
+        load_users,
+        load_verse,
+        load_verse_doc,
+        load_verses,
+        load_work,
+        manual_number_exists,
+        query_review_log,
+        rebuild_review_state_counts,
+        rebuild_verse_allocator,
+        release_verse_id,
+        review_activity,
+        review_state_counts,
+        save_commentary,
+        save_users,
+        save_verse,
+        save_verses,
+        save_work,
+    )
+elif settings.STORAGE_BACKEND != "json":
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r}")
@@ -0,0 +1,177 @@
+"""Awaitable wrappers around :mod:`storage` for the ``async def`` handlers.
+
+Each call runs the blocking storage function (file or SQLite I/O plus pydantic
+parsing) on a bounded thread pool of ``STORAGE_IO_WORKERS`` threads, so
+concurrent requests overlap their disk work instead of stalling the event
+loop. The wrapped functions are looked up on :mod:`storage` at call time and
+therefore follow the selected backend.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import settings
+import storage
+from models import Commentary, User, Verse, Work
+
+T = TypeVar("T")
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.STORAGE_IO_WORKERS),
+                thread_name_prefix="storage-io",
+            )
+        return _pool
+
+
+async def run_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``func(*args, **kwargs)`` on the storage I/O pool.
+
+    The caller's context is copied into the worker thread, so an enclosing
+    :func:`batch_commit` applies to the call.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(func, *args, **kwargs)
+    return await loop.run_in_executor(_executor(), context.run, call)
+
+
+@asynccontextmanager
+async def batch_commit() -> AsyncIterator[storage.CommitBatch]:
+    """Async counterpart of :func:`storage.batch_commit`; commits off the loop."""
+    batch = storage.CommitBatch()
+    with storage.use_batch(batch):
+        yield batch
+    await run_io(batch.commit)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+async def list_work_ids() -> List[str]:
+    return await run_io(storage.list_work_ids)
+
+
+async def load_work(work_id: str) -> Work:
+    return await run_io(storage.load_work, work_id)
+
+
+async def save_work(work: Work) -> None:
+    await run_io(storage.save_work, work)
+
+
+async def delete_work(work_id: str) -> None:
+    await run_io(storage.delete_work, work_id)
+
+
+async def list_verses(work_id: str, fields: Optional[Sequence[str]] = None) -> List:
+    return await run_io(storage.list_verses, work_id, fields)
+
+
+async def load_verse(work_id: str, verse_id: str) -> Verse:
+    return await run_io(storage.load_verse, work_id, verse_id)
+
+
+async def load_verses(work_id: str, verse_ids: List[str]) -> Dict[str, Verse]:
+    return await run_io(storage.load_verses, work_id, verse_ids)
+
+
+async def save_verse(verse: Verse) -> None:
+    await run_io(storage.save_verse, verse)
+
+
+async def save_verses(work_id: str, verses: List[Verse]) -> None:
+    await run_io(storage.save_verses, work_id, verses)
+
+
+async def delete_verse(work_id: str, verse_id: str, actor: str) -> None:
+    await run_io(storage.delete_verse, work_id, verse_id, actor)
+
+
+async def manual_number_exists(work_id: str, number_manual: Optional[str], exclude: Optional[str] = None) -> bool:
+    return await run_io(storage.manual_number_exists, work_id, number_manual, exclude)
+
+
+async def generate_verse_id(work_id: str) -> Tuple[str, int]:
+    return await run_io(storage.generate_verse_id, work_id)
+
+
+async def allocate_verse_id(work_id: str, number_manual: Optional[str] = None) -> Tuple[str, int]:
+    return await run_io(storage.allocate_verse_id, work_id, number_manual)
+
+
+async def release_verse_id(work_id: str, verse_id: str) -> None:
+    await run_io(storage.release_verse_id, work_id, verse_id)
+
+
+async def list_commentary(work_id: str, fields: Optional[Sequence[str]] = None) -> List:
+    return await run_io(storage.list_commentary, work_id, fields)
+
+
+async def load_commentary(work_id: str, commentary_id: str) -> Commentary:
+    return await run_io(storage.load_commentary, work_id, commentary_id)
+
+
+async def save_commentary(commentary: Commentary) -> None:
+    await run_io(storage.save_commentary, commentary)
+
+
+async def delete_commentary(work_id: str, commentary_id: str, actor: str) -> None:
+    await run_io(storage.delete_commentary, work_id, commentary_id, actor)
+
+
+async def generate_commentary_id(work_id: str, verse_id: str) -> str:
+    return await run_io(storage.generate_commentary_id, work_id, verse_id)
+
+
+async def review_state_counts(work_id: str) -> Dict[str, Dict[str, int]]:
+    return await run_io(storage.review_state_counts, work_id)
+
+
+async def review_activity(actor: str) -> Dict[str, Dict]:
+    return await run_io(storage.review_activity, actor)
+
+
+async def append_review_history(kind: str, work_id: str, item_id: str, entry: Dict) -> None:
+    await run_io(storage.append_review_history, kind, work_id, item_id, entry)
+
+
+async def append_review_histories(work_id: str, entries: List[Tuple[str, str, Dict]]) -> None:
+    await run_io(storage.append_review_histories, work_id, entries)
+
+
+async def load_review_history(
+    kind: str, work_id: str, item_id: str, offset: int = 0, limit: Optional[int] = None
+) -> Tuple[List[Dict], int]:
+    return await run_io(storage.load_review_history, kind, work_id, item_id, offset, limit)
+
+
+async def load_users() -> List[User]:
+    return await run_io(storage.load_users)
+
+
+async def append_review_log(kind: str, work_id: str, identifier: str, payload: Dict) -> None:
+    await run_io(storage.append_review_log, kind, work_id, identifier, payload)
+
+
+async def append_review_logs(entries: List[Tuple[str, str, str, Dict]]) -> None:
+    await run_io(storage.append_review_logs, entries)
@@ -0,0 +1,343 @@
+"""In-process indexes over the JSON backend's verse and commentary files.
+
+Each work gets a :class:`_VerseIndex` and a :class:`_CommentaryIndex` holding
+the stored documents, revalidated against directory mtimes, plus the
+:class:`_PendingQueue` of its items awaiting review. Callers in
+:mod:`storage` hold the work's ``_index_lock`` around every use.
+"""
+
+from __future__ import annotations
+
+import bisect
+import copy
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import codec
+import storage
+from models import Commentary, Verse
+
+PENDING_REVIEW_STATES = ("review_pending", "flagged", "draft")
+
+# (last_updated, type, work_id, item_id); the review queue is served newest first.
+PendingKey = Tuple[str, str, str, str]
+
+
+def _review_state(doc: Dict) -> str:
+    return (doc.get("review") or {}).get("state") or "draft"
+
+
+def _timestamp(ts: object) -> str:
+    if isinstance(ts, datetime):
+        return ts.isoformat()
+    return str(ts or "")
+
+
+def _last_updated(review: Optional[Dict]) -> str:
+    """Timestamp of the last review history entry as an ISO string ("" if none)."""
+    review = review or {}
+    last_entry = review.get("last_entry") or (review.get("history") or [None])[-1]
+    return _timestamp(last_entry.get("ts")) if last_entry else ""
+
+
+class _PendingQueue:
+    """Items of one type in one work awaiting review, sorted by :data:`PendingKey`."""
+
+    def __init__(self, item_type: str, work_id: str) -> None:
+        self.item_type = item_type
+        self.work_id = work_id
+        self.keys: List[PendingKey] = []
+        self.states: Dict[str, Tuple[PendingKey, str]] = {}
+
+    def update(self, item_id: str, state: str, last_updated: str) -> None:
+        self.remove(item_id)
+        if state in PENDING_REVIEW_STATES:
+            key = (last_updated, self.item_type, self.work_id, item_id)
+            bisect.insort(self.keys, key)
+            self.states[item_id] = (key, state)
+
+    def remove(self, item_id: str) -> None:
+        entry = self.states.pop(item_id, None)
+        if entry is not None:
+            del self.keys[bisect.bisect_left(self.keys, entry[0])]
+
+    def before(self, after: Optional[PendingKey]) -> Iterator[PendingKey]:
+        """Yield keys below ``after`` (all keys if ``None``), largest first."""
+        stop = len(self.keys) if after is None else bisect.bisect_left(self.keys, after)
+        return (self.keys[position] for position in range(stop - 1, -1, -1))
+
+
+class _CachedRecord:
+    """A stored document held by an index; the model is validated on first use."""
+
+    __slots__ = ("signature", "doc", "_model", "_digest")
+    model_class = Verse
+
+    def __init__(self, signature: Tuple[int, int], doc: Dict, model=None) -> None:
+        self.signature = signature
+        self.doc = doc
+        self._model = model
+        self._digest: Optional[str] = None
+
+    def digest(self) -> str:
+        if self._digest is None:
+            self._digest = storage.content_digest(codec.dumps(self.doc))
+        return self._digest
+
+    def model(self):
+        """A copy of the validated model that callers may mutate."""
+        if self._model is None:
+            self._model = self.model_class.parse_obj(self.doc)
+        return self._model.copy(deep=True)
+
+    def copy_doc(self) -> Dict:
+        return copy.deepcopy(self.doc)
+
+
+class _CachedVerse(_CachedRecord):
+    __slots__ = ()
+
+    @property
+    def sort_key(self) -> Tuple[int, str]:
+        return self.doc["order"], self.doc["verse_id"]
+
+
+class _CachedCommentary(_CachedRecord):
+    __slots__ = ()
+    model_class = Commentary
+
+
+class _VerseIndex:
+    """Verses of one work, keyed by ``verse_id`` and ordered by ``order``.
+
+    The index is revalidated against the ``verses/`` directory mtime on every
+    read, so a cache hit costs one stat. Only when that mtime changes are the
+    individual files stat'ed, and only files whose mtime or size moved are
+    read again. Every write in :mod:`storage` replaces a file by rename, which
+    moves the directory mtime; a file edited in place by another tool is not
+    seen until the next rename in the directory. Documents are kept as
+    loaded and validated into ``Verse`` models lazily, so windowed reads only
+    pay for the verses they return.
+    """
+
+    def __init__(self, work_id: str) -> None:
+        self.dir_mtime_ns: Optional[int] = None
+        self.entries: Dict[str, _CachedVerse] = {}
+        self.pending = _PendingQueue("verse", work_id)
+        self._ordered: Optional[List[_CachedVerse]] = None
+        self._orders: List[int] = []
+
+    def ordered(self) -> List[_CachedVerse]:
+        if self._ordered is None:
+            self._ordered = sorted(self.entries.values(), key=lambda entry: entry.sort_key)
+            self._orders = [entry.sort_key[0] for entry in self._ordered]
+        return self._ordered
+
+    def window(self, offset: int, limit: Optional[int], after_order: Optional[int]) -> List[_CachedVerse]:
+        ordered = self.ordered()
+        start = offset
+        if after_order is not None:
+            start += bisect.bisect_right(self._orders, after_order)
+        stop = None if limit is None else start + limit
+        return ordered[start:stop]
+
+    def put(self, verse_id: str, entry: _CachedVerse) -> None:
+        self.entries[verse_id] = entry
+        self.pending.update(verse_id, _review_state(entry.doc), _last_updated(entry.doc.get("review")))
+        self._ordered = None
+
+    def discard(self, verse_id: str) -> None:
+        if self.entries.pop(verse_id, None) is not None:
+            self.pending.remove(verse_id)
+            self._ordered = None
+
+    def refresh(self, verses_dir: Path, dir_mtime_ns: int) -> None:
+        seen = set()
+        with os.scandir(verses_dir) as scan:
+            for item in scan:
+                if not (item.name.startswith("V") and item.name.endswith(".json")):
+                    continue
+                verse_id = item.name[: -len(".json")]
+                seen.add(verse_id)
+                stat = item.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+                cached = self.entries.get(verse_id)
+                if cached is None or cached.signature != signature:
+                    self.put(verse_id, _CachedVerse(signature, storage.read_json(Path(item.path))))
+        for verse_id in list(self.entries):
+            if verse_id not in seen:
+                self.discard(verse_id)
+        self.dir_mtime_ns = dir_mtime_ns
+
+
+_VERSE_INDEXES: Dict[str, _VerseIndex] = {}
+
+
+def _verse_index(work_id: str) -> Optional[_VerseIndex]:
+    verses_dir = storage.work_dir(work_id) / storage.VERSES_DIR
+    dir_mtime_ns = storage._dir_mtime_ns(verses_dir)
+    if dir_mtime_ns is None:
+        _VERSE_INDEXES.pop(work_id, None)
+        return None
+    index = _VERSE_INDEXES.get(work_id)
+    if index is None:
+        index = _VERSE_INDEXES[work_id] = _VerseIndex(work_id)
+    if index.dir_mtime_ns != dir_mtime_ns:
+        index.refresh(verses_dir, dir_mtime_ns)
+    return index
+
+
+def _sync_verse_index(
+    work_id: str,
+    verse_id: str,
+    doc: Optional[Dict],
+    verse: Optional[Verse],
+    dir_mtime_before: Optional[int],
+) -> None:
+    """Apply a local write to the cached index without rescanning the work.
+
+    The directory mtime is only advanced when the index was current before the
+    write, so changes made by other processes are still picked up on the next
+    read.
+    """
+    index = _VERSE_INDEXES.get(work_id)
+    if index is None:
+        return
+    if doc is None:
+        index.discard(verse_id)
+    else:
+        signature = storage._file_signature(storage.verse_path(work_id, verse_id))
+        index.put(verse_id, _CachedVerse(signature, doc, verse))
+    if dir_mtime_before is not None and index.dir_mtime_ns == dir_mtime_before:
+        index.dir_mtime_ns = storage._dir_mtime_ns(storage.work_dir(work_id) / storage.VERSES_DIR)
+
+
+def _commentary_verse_ids(doc: Dict) -> Set[str]:
+    verse_ids = {target_id for target in doc.get("targets") or [] for target_id in target.get("ids") or []}
+    if doc.get("verse_id"):
+        verse_ids.add(doc["verse_id"])
+    return verse_ids
+
+
+class _CommentaryIndex:
+    """Commentary of one work indexed by id and by targeted verse.
+
+    ``paths`` maps commentary_id to its file and ``by_verse`` maps verse_id to
+    the ids of every commentary that targets it, including multi-verse
+    ``CommentaryTarget.ids``. Each ``commentary/<bucket>/`` directory is
+    revalidated by mtime only when a lookup touches it; a lookup by verse
+    touches every bucket, since any of them may hold a commentary targeting it.
+    """
+
+    def __init__(self, base: Path) -> None:
+        self.base = base
+        self.base_mtime_ns: Optional[int] = None
+        self.bucket_mtimes: Dict[str, Optional[int]] = {}
+        self.buckets: Dict[str, Set[str]] = {}
+        self.paths: Dict[str, Path] = {}
+        self.by_verse: Dict[str, Set[str]] = {}
+        self.records: Dict[str, _CachedCommentary] = {}
+        self.pending = _PendingQueue("commentary", base.parent.name)
+
+    def put(self, path: Path, entry: _CachedCommentary) -> None:
+        commentary_id = entry.doc["commentary_id"]
+        self.discard(commentary_id)
+        self.paths[commentary_id] = path
+        self.buckets.setdefault(path.parent.name, set()).add(commentary_id)
+        for verse_id in _commentary_verse_ids(entry.doc):
+            self.by_verse.setdefault(verse_id, set()).add(commentary_id)
+        self.records[commentary_id] = entry
+        self.pending.update(commentary_id, _review_state(entry.doc), _last_updated(entry.doc.get("review")))
+
+    def discard(self, commentary_id: str) -> None:
+        path = self.paths.pop(commentary_id, None)
+        if path is None:
+            return
+        self.buckets.get(path.parent.name, set()).discard(commentary_id)
+        self.pending.remove(commentary_id)
+        entry = self.records.pop(commentary_id)
+        for verse_id in _commentary_verse_ids(entry.doc):
+            members = self.by_verse.get(verse_id)
+            if members is not None:
+                members.discard(commentary_id)
+                if not members:
+                    del self.by_verse[verse_id]
+
+    def refresh_base(self) -> None:
+        mtime_ns = storage._dir_mtime_ns(self.base)
+        if mtime_ns == self.base_mtime_ns:
+            return
+        present = set()
+        if mtime_ns is not None:
+            with os.scandir(self.base) as scan:
+                present = {item.name for item in scan if item.is_dir()}
+        for bucket in present - set(self.bucket_mtimes):
+            self.bucket_mtimes[bucket] = None
+        for bucket in set(self.bucket_mtimes) - present:
+            self.refresh_bucket(bucket)
+            del self.bucket_mtimes[bucket]
+        # Buckets are scanned once up front so that multi-verse targets stored
+        # under another verse's bucket are present in ``by_verse``.
+        for bucket in present:
+            if self.bucket_mtimes[bucket] is None:
+                self.refresh_bucket(bucket)
+        self.base_mtime_ns = mtime_ns
+
+    def refresh_bucket(self, bucket: str) -> None:
+        directory = self.base / bucket
+        mtime_ns = storage._dir_mtime_ns(directory)
+        if bucket in self.bucket_mtimes and mtime_ns == self.bucket_mtimes[bucket]:
+            return
+        seen = set()
+        if mtime_ns is not None:
+            with os.scandir(directory) as scan:
+                for item in scan:
+                    if not item.name.endswith(".json"):
+                        continue
+                    commentary_id = item.name[: -len(".json")]
+                    seen.add(commentary_id)
+                    stat = item.stat()
+                    signature = (stat.st_mtime_ns, stat.st_size)
+                    cached = self.records.get(commentary_id)
+                    if cached is None or cached.signature != signature:
+                        self.put(Path(item.path), _CachedCommentary(signature, storage.read_json(Path(item.path))))
+        for commentary_id in self.buckets.get(bucket, set()) - seen:
+            self.discard(commentary_id)
+        if mtime_ns is not None:
+            self.bucket_mtimes[bucket] = mtime_ns
+
+    def refresh_all(self) -> None:
+        self.refresh_base()
+        for bucket in list(self.bucket_mtimes):
+            self.refresh_bucket(bucket)
+
+    def locate(self, commentary_id: str) -> Optional[Path]:
+        self.refresh_base()
+        path = self.paths.get(commentary_id)
+        if path is not None:
+            self.refresh_bucket(path.parent.name)
+        else:
+            # New files written by another process land in the bucket named
+            # after the verse embedded in the id, or in ``work/``.
+            parts = commentary_id.split("-")
+            for bucket in ([parts[2]] if len(parts) == 4 else []) + ["work"]:
+                if bucket in self.bucket_mtimes:
+                    self.refresh_bucket(bucket)
+        return self.paths.get(commentary_id)
+
+    def for_verse(self, verse_id: str) -> List[_CachedCommentary]:
+        self.refresh_all()
+        return [self.records[cid] for cid in sorted(self.by_verse.get(verse_id, ()))]
+
+
+_COMMENTARY_INDEXES: Dict[str, _CommentaryIndex] = {}
+
+
+def _commentary_index(work_id: str) -> _CommentaryIndex:
+    base = storage.work_dir(work_id) / storage.COMMENTARY_DIR
+    index = _COMMENTARY_INDEXES.get(work_id)
+    if index is None or index.base != base:
+        index = _COMMENTARY_INDEXES[work_id] = _CommentaryIndex(base)
+    return index
@@ -0,0 +1,533 @@
+"""Review history store and review log of the JSON backend.
+
+Each work appends the review history of its verses and commentary to
+``_history.jsonl`` (:func:`append_review_history`); records only keep
+``history_count`` and ``last_entry``. Every transition is also appended to the
+daily review log under ``logs/review/``, buffered by :class:`_ReviewLogWriter`
+and indexed per day and per actor for :func:`query_review_log` and
+:func:`review_activity`.
+"""
+
+from __future__ import annotations
+
+import atexit
+import bisect
+import copy
+import itertools
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import codec
+import settings
+import storage
+
+def _split_history(payload: Dict) -> List[Dict]:
+    """Empty ``review.history`` of a record about to be written.
+
+    Review history lives in the per-work history store and records only keep
+    ``history_count`` and ``last_entry`` (plus an empty ``history`` so stored
+    documents have the shape the API serves). Only a document written before the
+    store existed carries entries inline (histories hydrated for API responses
+    are never saved back); they are returned so the caller can move them into
+    the store ahead of any transition applied since the record was loaded.
+    """
+    review = payload.get("review")
+    if not review:
+        return []
+    history = review.get("history") or []
+    review["history"] = []
+    if history:
+        review["history_count"] = review.get("history_count", 0) + len(history)
+        review["last_entry"] = review.get("last_entry") or history[-1]
+    last_entry = review.get("last_entry")
+    if last_entry and isinstance(last_entry.get("ts"), datetime):
+        # Keep the cached document identical to what is read back from disk
+        review["last_entry"] = {**last_entry, "ts": codec.default(last_entry["ts"])}
+    return history
+
+
+class _HistoryIndex:
+    """Byte spans of each item's entries in a work's ``_history.jsonl``.
+
+    ``covered`` is the length of the log prefix that has been indexed; spans
+    are also appended to ``_history.idx.jsonl`` so a new process only has to
+    read that file and scan the part of the log beyond it.
+    """
+
+    __slots__ = ("covered", "spans")
+
+    def __init__(self) -> None:
+        self.covered = 0
+        self.spans: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+
+    def add(self, kind: str, item_id: str, offset: int, length: int) -> None:
+        self.spans.setdefault((kind, item_id), []).append((offset, length))
+        self.covered = max(self.covered, offset + length)
+
+
+_HISTORY_INDEXES: Dict[str, _HistoryIndex] = {}
+
+
+def _history_index(work_id: str) -> _HistoryIndex:
+    """Return the work's history index, catching up with appends by other processes.
+
+    Must be called with :func:`storage._work_lock` held.
+    """
+    log_path = storage.work_dir(work_id) / storage.HISTORY_LOG
+    index_path = storage.work_dir(work_id) / storage.HISTORY_INDEX
+    try:
+        log_size = log_path.stat().st_size
+    except FileNotFoundError:
+        log_size = 0
+    index = _HISTORY_INDEXES.get(work_id)
+    if index is None or index.covered > log_size:
+        index = _HistoryIndex()
+        if index_path.exists():
+            with index_path.open("rb") as handle:
+                for line in handle:
+                    try:
+                        kind, item_id, offset, length = codec.loads(line)
+                    except ValueError:
+                        continue
+                    index.add(kind, item_id, offset, length)
+        if index.covered > log_size:
+            index = _HistoryIndex()
+            index_path.unlink(missing_ok=True)
+        _HISTORY_INDEXES[work_id] = index
+    if index.covered < log_size:
+        with log_path.open("rb") as handle:
+            handle.seek(index.covered)
+            offset = index.covered
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break
+                record = codec.loads(line)
+                index.add(record["kind"], record["id"], offset, len(line))
+                storage._append_bytes(index_path, codec.dumps_bytes([record["kind"], record["id"], offset, len(line)]) + b"\n")
+                offset += len(line)
+    return index
+
+
+def append_review_history(kind: str, work_id: str, item_id: str, entry: Dict) -> None:
+    """Append one review history entry for an item to the work's history store."""
+    append_review_histories(work_id, [(kind, item_id, entry)])
+
+
+def append_review_histories(work_id: str, entries: List[Tuple[str, str, Dict]]) -> None:
+    """Append ``(kind, item_id, entry)`` history entries of one work in one write."""
+    lines = [codec.dumps_bytes({"kind": kind, "id": item_id, "entry": entry}) + b"\n" for kind, item_id, entry in entries]
+    with storage._work_lock(work_id):
+        index = _history_index(work_id)
+        offset = storage._append_bytes(storage.work_dir(work_id) / storage.HISTORY_LOG, b"".join(lines))
+        spans = []
+        for (kind, item_id, _), line in zip(entries, lines):
+            index.add(kind, item_id, offset, len(line))
+            spans.append(codec.dumps_bytes([kind, item_id, offset, len(line)]) + b"\n")
+            offset += len(line)
+        storage._append_bytes(storage.work_dir(work_id) / storage.HISTORY_INDEX, b"".join(spans))
+
+
+def load_review_history(
+    kind: str, work_id: str, item_id: str, offset: int = 0, limit: Optional[int] = None
+) -> Tuple[List[Dict], int]:
+    """Return a page of an item's review history (oldest first) and its total length."""
+    with storage._work_lock(work_id):
+        spans = list(_history_index(work_id).spans.get((kind, item_id), []))
+    page = spans[offset:] if limit is None else spans[offset : offset + limit]
+    entries = []
+    if page:
+        with (storage.work_dir(work_id) / storage.HISTORY_LOG).open("rb") as handle:
+            for start, length in page:
+                handle.seek(start)
+                entries.append(codec.loads(handle.read(length))["entry"])
+    return entries, len(spans)
+
+
+def migrate_inline_history(work_id: str) -> int:
+    """Move review history embedded in a work's records into the history store.
+
+    Returns the number of records rewritten.
+    """
+    migrated = 0
+    for verse in storage.list_verses(work_id):
+        if verse.review.history:
+            storage.save_verse(verse)
+            migrated += 1
+    for commentary in storage.list_commentary(work_id):
+        if commentary.review.history:
+            storage.save_commentary(commentary)
+            migrated += 1
+    return migrated
+
+
+def _review_log_entry(kind: str, work_id: str, identifier: str, payload: Dict) -> Dict:
+    return {
+        "ts": payload.get("ts") or datetime.now(timezone.utc).isoformat(),
+        "kind": kind,
+        "work_id": work_id,
+        "id": identifier,
+        "actor": payload.get("actor"),
+        "action": payload.get("action"),
+        "from": payload.get("from"),
+        "to": payload.get("to"),
+        "issues": payload.get("issues", []),
+    }
+
+
+def _add_activity(activity: Dict[str, Dict], entry: Dict) -> None:
+    """Fold a review log entry into one actor's activity record."""
+    data = activity.setdefault(entry.get("kind") or "", {"counts": {}, "recent": []})
+    by_state = data["counts"].setdefault(entry.get("action") or "", {})
+    to_state = entry.get("to") or ""
+    by_state[to_state] = by_state.get(to_state, 0) + 1
+    recent = data["recent"]
+    recent.append({key: entry.get(key) for key in ("ts", "work_id", "id", "action", "from", "to")})
+    del recent[:-storage.REVIEW_ACTIVITY_RECENT]
+
+
+_ACTIVITY: Dict[str, Tuple[Tuple[int, int], Dict[str, Dict]]] = {}
+
+
+def _review_log_lock():
+    storage.REVIEW_ACTIVITY_DIR.mkdir(parents=True, exist_ok=True)
+    return storage._file_lock(storage.REVIEW_ACTIVITY_DIR / storage.WORK_LOCK_FILE)
+
+
+def _activity_path(actor: str) -> Path:
+    return storage.REVIEW_ACTIVITY_DIR / f"{quote(actor, safe='@.+-_')}.json"
+
+
+def _iter_review_log() -> Iterator[Dict]:
+    for path in sorted(storage.REVIEW_LOG_DIR.glob("*.jsonl")):
+        with path.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    yield codec.loads(line)
+                except ValueError:
+                    continue
+
+
+def _ensure_activity_index() -> None:
+    """Replay the review log into per-actor files unless that was already done.
+
+    Must be called with :func:`_review_log_lock` held.
+    """
+    ready = storage.REVIEW_ACTIVITY_DIR / storage.REVIEW_ACTIVITY_READY
+    if ready.exists():
+        return
+    actors: Dict[str, Dict[str, Dict]] = {}
+    for entry in _iter_review_log():
+        if entry.get("actor"):
+            _add_activity(actors.setdefault(entry["actor"], {}), entry)
+    for actor, activity in actors.items():
+        storage.write_json(_activity_path(actor), activity)
+    _ACTIVITY.clear()
+    storage.write_json(ready, {"built_at": datetime.now(timezone.utc).isoformat()})
+
+
+def _load_activity(actor: str) -> Dict[str, Dict]:
+    """Return ``actor``'s activity record (shared; copy before handing out)."""
+    path = _activity_path(actor)
+    try:
+        signature = storage._file_signature(path)
+    except FileNotFoundError:
+        return {}
+    cached = _ACTIVITY.get(actor)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    activity = storage.read_json(path)
+    _ACTIVITY[actor] = (signature, activity)
+    return activity
+
+
+def review_activity(actor: str) -> Dict[str, Dict]:
+    """Return ``{kind: {"counts": {action: {to_state: n}}, "recent": [...]}}`` for ``actor``.
+
+    Served from the per-actor index kept by :func:`append_review_log`;
+    ``recent`` holds the latest ``storage.REVIEW_ACTIVITY_RECENT`` entries of each
+    kind, newest first.
+    """
+    _REVIEW_LOG_WRITER.flush()
+    with _review_log_lock():
+        _ensure_activity_index()
+        activity = _load_activity(actor)
+        return {
+            kind: {
+                "counts": {action: dict(states) for action, states in data["counts"].items()},
+                "recent": list(reversed(data["recent"])),
+            }
+            for kind, data in activity.items()
+        }
+
+
+class _ReviewLogIndex:
+    """Byte spans of one day's review log lines, keyed by work and actor.
+
+    ``covered`` is the length of the log prefix that has been indexed. Each
+    indexed line is also appended to ``index/<date>.jsonl`` so other
+    processes only have to scan the part of the log beyond it.
+    """
+
+    __slots__ = ("covered", "spans", "by_work", "by_actor")
+
+    def __init__(self) -> None:
+        self.covered = 0
+        self.spans: List[Tuple[int, int]] = []
+        self.by_work: Dict[str, List[int]] = {}
+        self.by_actor: Dict[str, List[int]] = {}
+
+    def add(self, offset: int, length: int, work_id: Optional[str], actor: Optional[str]) -> None:
+        position = len(self.spans)
+        self.spans.append((offset, length))
+        self.by_work.setdefault(work_id or "", []).append(position)
+        self.by_actor.setdefault(actor or "", []).append(position)
+        self.covered = offset + length
+
+    def select(self, work_id: Optional[str], actor: Optional[str]) -> List[Tuple[int, int]]:
+        positions: Optional[List[int]] = None
+        if work_id is not None:
+            positions = self.by_work.get(work_id, [])
+        if actor is not None:
+            by_actor = self.by_actor.get(actor, [])
+            positions = by_actor if positions is None else sorted(set(positions).intersection(by_actor))
+        if positions is None:
+            return list(self.spans)
+        return [self.spans[position] for position in positions]
+
+
+_REVIEW_LOG_INDEXES: Dict[str, _ReviewLogIndex] = {}
+
+# (log date, byte offset of the line) of a review log entry; the SQLite
+# backend uses the row sequence number as the offset.
+ReviewLogPosition = Tuple[str, int]
+
+
+def _review_log_index(date_key: str) -> _ReviewLogIndex:
+    """Return the index of one day's review log, catching up with appends.
+
+    Must be called with :func:`_review_log_lock` held.
+    """
+    log_path = storage.REVIEW_LOG_DIR / f"{date_key}.jsonl"
+    index_path = storage.REVIEW_LOG_INDEX_DIR / f"{date_key}.jsonl"
+    storage.REVIEW_LOG_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        log_size = log_path.stat().st_size
+    except FileNotFoundError:
+        log_size = 0
+    index = _REVIEW_LOG_INDEXES.get(date_key)
+    if index is None or index.covered > log_size:
+        index = _ReviewLogIndex()
+        if index_path.exists():
+            with index_path.open("rb") as handle:
+                for line in handle:
+                    try:
+                        offset, length, work_id, actor = codec.loads(line)
+                    except ValueError:
+                        continue
+                    if offset == index.covered:
+                        index.add(offset, length, work_id, actor)
+        if index.covered > log_size:
+            index = _ReviewLogIndex()
+            index_path.unlink(missing_ok=True)
+        _REVIEW_LOG_INDEXES[date_key] = index
+    if index.covered < log_size:
+        lines = []
+        with log_path.open("rb") as handle:
+            handle.seek(index.covered)
+            offset = index.covered
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = codec.loads(line)
+                except ValueError:
+                    record = {}
+                index.add(offset, len(line), record.get("work_id"), record.get("actor"))
+                lines.append(codec.dumps_bytes([offset, len(line), record.get("work_id"), record.get("actor")]) + b"\n")
+                offset += len(line)
+        with index_path.open("ab") as handle:
+            handle.write(b"".join(lines))
+    return index
+
+
+def query_review_log(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    work_id: Optional[str] = None,
+    item_id: Optional[str] = None,
+    actor: Optional[str] = None,
+    action: Optional[str] = None,
+    limit: int = 100,
+    after: Optional[ReviewLogPosition] = None,
+) -> Tuple[List[Dict], Optional[ReviewLogPosition]]:
+    """Return review log entries matching every given filter, oldest first.
+
+    The date range (inclusive) picks the daily files by name and the per-day
+    index narrows each file to the lines of ``work_id``/``actor``, so only
+    candidate lines are read. Returns the page and the position to pass as
+    ``after`` for the next one, or ``None`` when there is nothing more.
+    """
+    _REVIEW_LOG_WRITER.flush()
+    low = date_from.isoformat() if date_from else ""
+    high = date_to.isoformat() if date_to else "9999-99-99"
+    if after is not None:
+        low = max(low, after[0])
+    date_keys = sorted(
+        path.stem for path in storage.REVIEW_LOG_DIR.glob("*.jsonl") if low <= path.stem <= high
+    )
+    entries: List[Dict] = []
+    positions: List[ReviewLogPosition] = []
+    for date_key in date_keys:
+        with _review_log_lock():
+            spans = _review_log_index(date_key).select(work_id, actor)
+        if after is not None and date_key == after[0]:
+            spans = spans[bisect.bisect_right(spans, (after[1], float("inf"))) :]
+        if not spans:
+            continue
+        with (storage.REVIEW_LOG_DIR / f"{date_key}.jsonl").open("rb") as handle:
+            for offset, length in spans:
+                handle.seek(offset)
+                try:
+                    entry = codec.loads(handle.read(length))
+                except ValueError:
+                    continue
+                if item_id is not None and entry.get("id") != item_id:
+                    continue
+                if action is not None and entry.get("action") != action:
+                    continue
+                entries.append(entry)
+                positions.append((date_key, offset))
+                if len(entries) > limit:
+                    return entries[:limit], positions[limit - 1]
+    return entries, None
+
+
+class _ReviewLogWriter:
+    """Buffers review log lines and appends them to the day's file in batches.
+
+    The current day's file stays open between flushes and is reopened on day
+    rollover (or when the file was rotated away). Buffered lines are written
+    once ``max_bytes`` are pending, ``interval`` seconds after the first
+    pending line (by a background thread), before any read of the log and at
+    shutdown. The per-day offset index and the per-actor activity files are
+    updated once per flush.
+    """
+
+    def __init__(self, max_bytes: int, interval: float) -> None:
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._pending: List[Tuple[str, bytes, Dict]] = []
+        self._pending_bytes = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._handle = None
+        self._handle_key: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def append(self, entries: List[Dict]) -> None:
+        date_key = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        lines = [(date_key, codec.dumps_bytes(entry) + b"\n", entry) for entry in entries]
+        with self._lock:
+            self._pending.extend(lines)
+            self._pending_bytes += sum(len(line) for _, line, _ in lines)
+            full = self._pending_bytes >= self.max_bytes or self.interval <= 0
+            if not full and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="review-log-writer", daemon=True)
+                self._thread.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending, self._pending_bytes = self._pending, [], 0
+            if not pending:
+                return
+            try:
+                self._write(pending)
+            except BaseException:
+                with self._lock:
+                    self._pending[:0] = pending
+                    self._pending_bytes += sum(len(line) for _, line, _ in pending)
+                raise
+
+    def close(self) -> None:
+        self.flush()
+        with self._write_lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = self._handle_key = None
+
+    def _open(self, date_key: str):
+        path = storage.REVIEW_LOG_DIR / f"{date_key}.jsonl"
+        if self._handle is not None and self._handle_key == date_key:
+            try:
+                if path.stat().st_ino == os.fstat(self._handle.fileno()).st_ino:
+                    return self._handle
+            except FileNotFoundError:
+                pass
+        if self._handle is not None:
+            self._handle.close()
+        self._handle = path.open("ab", buffering=0)
+        self._handle_key = date_key
+        return self._handle
+
+    def _write(self, pending: List[Tuple[str, bytes, Dict]]) -> None:
+        with _review_log_lock():
+            _ensure_activity_index()
+            for date_key, group in itertools.groupby(pending, key=lambda item: item[0]):
+                group = list(group)
+                index = _review_log_index(date_key)
+                handle = self._open(date_key)
+                offset = os.fstat(handle.fileno()).st_size
+                handle.write(b"".join(line for _, line, _ in group))
+                spans = []
+                for _, line, entry in group:
+                    index.add(offset, len(line), entry["work_id"], entry["actor"])
+                    spans.append(codec.dumps_bytes([offset, len(line), entry["work_id"], entry["actor"]]) + b"\n")
+                    offset += len(line)
+                with (storage.REVIEW_LOG_INDEX_DIR / f"{date_key}.jsonl").open("ab") as index_handle:
+                    index_handle.write(b"".join(spans))
+            by_actor: Dict[str, List[Dict]] = {}
+            for _, _, entry in pending:
+                if entry["actor"]:
+                    by_actor.setdefault(entry["actor"], []).append(entry)
+            for actor, entries in by_actor.items():
+                activity = copy.deepcopy(_load_activity(actor))
+                for entry in entries:
+                    _add_activity(activity, entry)
+                storage.write_json(_activity_path(actor), activity)
+                _ACTIVITY[actor] = (storage._file_signature(_activity_path(actor)), activity)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+_REVIEW_LOG_WRITER = _ReviewLogWriter(settings.REVIEW_LOG_BUFFER_BYTES, settings.REVIEW_LOG_FLUSH_MS / 1000)
+atexit.register(_REVIEW_LOG_WRITER.close)
+
+
+def flush_review_log() -> None:
+    """Write buffered review log lines."""
+    _REVIEW_LOG_WRITER.flush()
+
+
+def close_review_log() -> None:
+    """Flush buffered review log lines and close the open day file."""
+    _REVIEW_LOG_WRITER.close()
+
+
+def append_review_logs(entries: Iterable[Tuple[str, str, str, Dict]]) -> None:
+    """Append several ``(kind, work_id, identifier, payload)`` entries as one write."""
+    _REVIEW_LOG_WRITER.append([_review_log_entry(*entry) for entry in entries])
+
+
+def append_review_log(kind: str, work_id: str, identifier: str, payload: Dict) -> None:
+    append_review_logs([(kind, work_id, identifier, payload)])
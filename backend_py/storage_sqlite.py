@@ -0,0 +1,952 @@
+"""SQLite implementation of the :mod:`storage` API.
+
+Selected with ``STORAGE_BACKEND=sqlite``. Every record keeps its JSON document
+in a ``doc`` column; the fields the API filters or sorts on (work_id,
+verse_id, order, review state, number_manual) are stored alongside it in
+indexed columns. Deleted records move into ``tombstones`` together with their
+last document, mirroring the ``trash/`` directory of the JSON backend.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import codec
+import settings
+import storage
+import storage_index
+import storage_review
+from models import Commentary, User, Verse, Work
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    work_id TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS verses (
+    work_id TEXT NOT NULL,
+    verse_id TEXT NOT NULL,
+    ord INTEGER NOT NULL,
+    number_manual TEXT,
+    state TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    PRIMARY KEY (work_id, verse_id)
+);
+CREATE INDEX IF NOT EXISTS verses_by_order ON verses (work_id, ord, verse_id);
+CREATE INDEX IF NOT EXISTS verses_by_number_manual ON verses (work_id, number_manual);
+CREATE INDEX IF NOT EXISTS verses_by_state ON verses (work_id, state);
+CREATE TABLE IF NOT EXISTS verse_allocators (
+    work_id TEXT PRIMARY KEY,
+    next_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS verse_manual_numbers (
+    work_id TEXT NOT NULL,
+    number_manual TEXT NOT NULL,
+    verse_id TEXT NOT NULL,
+    PRIMARY KEY (work_id, number_manual)
+);
+CREATE INDEX IF NOT EXISTS verse_manual_numbers_by_verse ON verse_manual_numbers (work_id, verse_id);
+CREATE TABLE IF NOT EXISTS commentary (
+    work_id TEXT NOT NULL,
+    commentary_id TEXT NOT NULL,
+    verse_id TEXT,
+    state TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    PRIMARY KEY (work_id, commentary_id)
+);
+CREATE INDEX IF NOT EXISTS commentary_by_verse ON commentary (work_id, verse_id);
+CREATE INDEX IF NOT EXISTS commentary_by_state ON commentary (work_id, state);
+CREATE TABLE IF NOT EXISTS commentary_targets (
+    work_id TEXT NOT NULL,
+    verse_id TEXT NOT NULL,
+    commentary_id TEXT NOT NULL,
+    PRIMARY KEY (work_id, verse_id, commentary_id)
+);
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email_lower TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_by_email ON users (email_lower);
+CREATE TABLE IF NOT EXISTS tombstones (
+    kind TEXT NOT NULL,
+    work_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    deleted_at TEXT NOT NULL,
+    actor TEXT,
+    doc TEXT
+);
+CREATE INDEX IF NOT EXISTS tombstones_by_item ON tombstones (work_id, kind, id);
+CREATE TABLE IF NOT EXISTS review_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    work_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    actor TEXT,
+    action TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS review_log_by_work ON review_log (work_id, ts);
+CREATE INDEX IF NOT EXISTS review_log_by_actor ON review_log (actor, ts);
+CREATE INDEX IF NOT EXISTS review_log_by_ts ON review_log (ts);
+CREATE TABLE IF NOT EXISTS review_stats (
+    work_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    state TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (work_id, kind, state)
+);
+CREATE INDEX IF NOT EXISTS review_log_by_actor_kind ON review_log (actor, kind, seq);
+CREATE TABLE IF NOT EXISTS review_history (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    work_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS review_history_by_item ON review_history (work_id, kind, item_id, seq);
+CREATE TABLE IF NOT EXISTS review_activity (
+    actor TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    action TEXT NOT NULL,
+    to_state TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (actor, kind, action, to_state)
+);
+CREATE TRIGGER IF NOT EXISTS review_log_activity AFTER INSERT ON review_log
+WHEN NEW.actor IS NOT NULL BEGIN
+    INSERT INTO review_activity (actor, kind, action, to_state, count)
+    VALUES (NEW.actor, NEW.kind, COALESCE(NEW.action, ''), COALESCE(json_extract(NEW.entry, '$.to'), ''), 1)
+    ON CONFLICT (actor, kind, action, to_state) DO UPDATE SET count = count + 1;
+END;
+"""
+
+# review_stats is maintained by triggers; records are written with
+# INSERT ... ON CONFLICT DO UPDATE so a re-save fires the UPDATE trigger.
+_STATS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS {table}_stats_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO review_stats (work_id, kind, state, count) VALUES (NEW.work_id, '{table}', NEW.state, 1)
+    ON CONFLICT (work_id, kind, state) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_stats_delete AFTER DELETE ON {table} BEGIN
+    UPDATE review_stats SET count = count - 1
+    WHERE work_id = OLD.work_id AND kind = '{table}' AND state = OLD.state;
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_stats_update AFTER UPDATE OF state ON {table}
+WHEN OLD.state IS NOT NEW.state BEGIN
+    UPDATE review_stats SET count = count - 1
+    WHERE work_id = OLD.work_id AND kind = '{table}' AND state = OLD.state;
+    INSERT INTO review_stats (work_id, kind, state, count) VALUES (NEW.work_id, '{table}', NEW.state, 1)
+    ON CONFLICT (work_id, kind, state) DO UPDATE SET count = count + 1;
+END;
+"""
+SCHEMA += "".join(_STATS_TRIGGERS.format(table=table) for table in storage.REVIEW_STATE_KINDS)
+
+_local = threading.local()
+
+
+def connect(path: Optional[Path] = None) -> sqlite3.Connection:
+    """Return this thread's connection to ``path`` (default ``SQLITE_PATH``)."""
+    path = Path(path or settings.SQLITE_PATH)
+    connections: Dict[Path, sqlite3.Connection] = getattr(_local, "connections", None) or {}
+    _local.connections = connections
+    conn = connections.get(path)
+    if conn is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        synchronous = {"always": "FULL", "never": "OFF"}.get(settings.FSYNC_POLICY, "NORMAL")
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.executescript(SCHEMA)
+        with conn:
+            if "review_stats" not in existing:
+                _recount_review_stats(conn, None)
+            if "review_activity" not in existing:
+                conn.execute(
+                    "INSERT INTO review_activity (actor, kind, action, to_state, count)"
+                    " SELECT actor, kind, COALESCE(action, ''), COALESCE(json_extract(entry, '$.to'), ''), COUNT(*)"
+                    " FROM review_log WHERE actor IS NOT NULL GROUP BY 1, 2, 3, 4"
+                )
+        connections[path] = conn
+    return conn
+
+
+def _dumps(payload) -> str:
+    return codec.dumps(payload)
+
+
+def _state(model) -> str:
+    return model.review.state if model.review else "draft"
+
+
+def _insert_history(conn: sqlite3.Connection, kind: str, work_id: str, item_id: str, entry: Dict) -> None:
+    conn.execute(
+        "INSERT INTO review_history (work_id, kind, item_id, entry) VALUES (?, ?, ?, ?)",
+        (work_id, kind, item_id, _dumps(entry)),
+    )
+
+
+def _record_doc(conn: sqlite3.Connection, kind: str, work_id: str, item_id: str, payload: Dict) -> str:
+    """Serialize a record, moving legacy inline history into ``review_history``."""
+    for entry in storage_review._split_history(payload):
+        _insert_history(conn, kind, work_id, item_id, entry)
+    return _dumps(payload)
+
+
+def append_review_history(kind: str, work_id: str, item_id: str, entry: Dict) -> None:
+    append_review_histories(work_id, [(kind, item_id, entry)])
+
+
+def append_review_histories(work_id: str, entries: List[Tuple[str, str, Dict]]) -> None:
+    conn = connect()
+    with conn:
+        for kind, item_id, entry in entries:
+            _insert_history(conn, kind, work_id, item_id, entry)
+
+
+def load_review_history(
+    kind: str, work_id: str, item_id: str, offset: int = 0, limit: Optional[int] = None
+) -> Tuple[List[Dict], int]:
+    conn = connect()
+    key = (work_id, kind, item_id)
+    total = conn.execute(
+        "SELECT COUNT(*) FROM review_history WHERE work_id = ? AND kind = ? AND item_id = ?", key
+    ).fetchone()[0]
+    rows = conn.execute(
+        "SELECT entry FROM review_history WHERE work_id = ? AND kind = ? AND item_id = ?"
+        " ORDER BY seq LIMIT ? OFFSET ?",
+        key + (-1 if limit is None else limit, offset),
+    )
+    return [codec.loads(row[0]) for row in rows], total
+
+
+def list_work_ids() -> List[str]:
+    rows = connect().execute("SELECT work_id FROM works ORDER BY work_id")
+    return [row[0] for row in rows]
+
+
+def load_work(work_id: str) -> Work:
+    row = connect().execute("SELECT doc FROM works WHERE work_id = ?", (work_id,)).fetchone()
+    if row is None:
+        raise FileNotFoundError(work_id)
+    return Work.parse_obj(codec.loads(row[0]))
+
+
+def save_work(work: Work) -> None:
+    conn = connect()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO works (work_id, doc) VALUES (?, ?)",
+            (work.work_id, _dumps(work.dict(by_alias=True))),
+        )
+
+
+def delete_work(work_id: str) -> None:
+    conn = connect()
+    row = conn.execute("SELECT doc FROM works WHERE work_id = ?", (work_id,)).fetchone()
+    if row is None:
+        raise FileNotFoundError(f"Work {work_id} not found")
+    deleted_at = datetime.now(timezone.utc).isoformat()
+    with conn:
+        conn.execute(
+            "INSERT INTO tombstones (kind, work_id, id, deleted_at, actor, doc)"
+            " SELECT 'verses', work_id, verse_id, ?, NULL, doc FROM verses WHERE work_id = ?",
+            (deleted_at, work_id),
+        )
+        conn.execute(
+            "INSERT INTO tombstones (kind, work_id, id, deleted_at, actor, doc)"
+            " SELECT 'commentary', work_id, commentary_id, ?, NULL, doc FROM commentary WHERE work_id = ?",
+            (deleted_at, work_id),
+        )
+        conn.execute(
+            "INSERT INTO tombstones (kind, work_id, id, deleted_at, actor, doc) VALUES ('work', ?, ?, ?, NULL, ?)",
+            (work_id, work_id, deleted_at, row[0]),
+        )
+        for table in (
+            "verses",
+            "verse_allocators",
+            "verse_manual_numbers",
+            "commentary",
+            "commentary_targets",
+            "review_history",
+            "review_stats",
+            "works",
+        ):
+            conn.execute(f"DELETE FROM {table} WHERE work_id = ?", (work_id,))
+        # review_log and the per-actor review_activity totals derived from it
+        # are the audit trail and outlive the work, as in the JSON backend.
+
+
+def _projected_rows(query: str, params: tuple, fields: Sequence[str]) -> List[Dict]:
+    """Run ``query`` (selecting ``{doc}``) with only ``fields`` extracted by SQLite."""
+    paths = storage.projection_paths(fields)
+    if not paths:
+        return [{} for _ in connect().execute(query.format(doc="1"), params)]
+    # json_array keeps extracted objects and arrays as JSON rather than text
+    extract = ", ".join("json_extract(doc, ?)" for _ in paths)
+    rows = connect().execute(
+        query.format(doc=f"json_array({extract})"),
+        tuple(f"$.{path}" for path in paths) + params,
+    )
+    return [_nest(paths, codec.loads(row[0])) for row in rows]
+
+
+def _nest(paths: List[str], values: List) -> Dict:
+    doc: Dict = {}
+    for path, value in zip(paths, values):
+        *parents, leaf = path.split(".")
+        target = doc
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+    return doc
+
+
+def list_verses(work_id: str, fields: Optional[Sequence[str]] = None) -> List:
+    query = "SELECT {doc} FROM verses WHERE work_id = ? ORDER BY ord, verse_id"
+    if fields is not None:
+        return _projected_rows(query, (work_id,), fields)
+    rows = connect().execute(query.format(doc="doc"), (work_id,))
+    return [Verse.parse_obj(codec.loads(row[0])) for row in rows]
+
+
+def iter_verse_digests(work_id: str) -> Iterator[Tuple[str, str]]:
+    rows = connect().execute("SELECT verse_id, doc FROM verses WHERE work_id = ? ORDER BY ord, verse_id", (work_id,))
+    for verse_id, doc in rows:
+        yield verse_id, storage.content_digest(doc)
+
+
+def count_verses(work_id: str) -> int:
+    row = connect().execute("SELECT COUNT(*) FROM verses WHERE work_id = ?", (work_id,)).fetchone()
+    return row[0]
+
+
+def list_verses_window(
+    work_id: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    after_order: Optional[int] = None,
+) -> List[Verse]:
+    query = "SELECT doc FROM verses WHERE work_id = ?"
+    params: tuple = (work_id,)
+    if after_order is not None:
+        query += " AND ord > ?"
+        params += (after_order,)
+    query += " ORDER BY ord, verse_id LIMIT ? OFFSET ?"
+    params += (-1 if limit is None else limit, offset)
+    return [Verse.parse_obj(codec.loads(row[0])) for row in connect().execute(query, params)]
+
+
+def list_verse_docs(
+    work_id: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    after_order: Optional[int] = None,
+) -> List[Dict]:
+    query = "SELECT doc FROM verses WHERE work_id = ?"
+    params: tuple = (work_id,)
+    if after_order is not None:
+        query += " AND ord > ?"
+        params += (after_order,)
+    query += " ORDER BY ord, verse_id LIMIT ? OFFSET ?"
+    params += (-1 if limit is None else limit, offset)
+    return [codec.loads(row[0]) for row in connect().execute(query, params)]
+
+
+def load_verse(work_id: str, verse_id: str) -> Verse:
+    row = connect().execute(
+        "SELECT doc FROM verses WHERE work_id = ? AND verse_id = ?", (work_id, verse_id)
+    ).fetchone()
+    if row is None:
+        raise FileNotFoundError(verse_id)
+    return Verse.parse_obj(codec.loads(row[0]))
+
+
+def load_verse_doc(work_id: str, verse_id: str) -> Dict:
+    row = connect().execute(
+        "SELECT doc FROM verses WHERE work_id = ? AND verse_id = ?", (work_id, verse_id)
+    ).fetchone()
+    if row is None:
+        raise FileNotFoundError(verse_id)
+    return codec.loads(row[0])
+
+
+def load_verses(work_id: str, verse_ids: Iterable[str]) -> Dict[str, Verse]:
+    conn = connect()
+    verse_ids = list(verse_ids)
+    verses: Dict[str, Verse] = {}
+    for start in range(0, len(verse_ids), 500):
+        chunk = verse_ids[start : start + 500]
+        rows = conn.execute(
+            f"SELECT verse_id, doc FROM verses WHERE work_id = ? AND verse_id IN ({', '.join('?' * len(chunk))})",
+            [work_id, *chunk],
+        )
+        for verse_id, doc in rows:
+            verses[verse_id] = Verse.parse_obj(codec.loads(doc))
+    return verses
+
+
+def _upsert_verse(conn: sqlite3.Connection, verse: Verse) -> None:
+    conn.execute(
+        "INSERT INTO verses (work_id, verse_id, ord, number_manual, state, doc)"
+        " VALUES (?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (work_id, verse_id) DO UPDATE SET ord = excluded.ord,"
+        " number_manual = excluded.number_manual, state = excluded.state, doc = excluded.doc",
+        (
+            verse.work_id,
+            verse.verse_id,
+            verse.order,
+            verse.number_manual,
+            _state(verse),
+            _record_doc(conn, "verse", verse.work_id, verse.verse_id, verse.dict(by_alias=True)),
+        ),
+    )
+    _assign_manual_number(conn, verse.work_id, verse.verse_id, verse.number_manual)
+    number = storage._verse_number(verse.verse_id)
+    if number is not None:
+        conn.execute(
+            "UPDATE verse_allocators SET next_number = MAX(next_number, ?) WHERE work_id = ?",
+            (number + 1, verse.work_id),
+        )
+
+
+def save_verse(verse: Verse) -> None:
+    save_verses(verse.work_id, [verse])
+
+
+def save_verses(work_id: str, verses: List[Verse]) -> None:
+    conn = connect()
+    with conn:
+        for verse in verses:
+            _upsert_verse(conn, verse)
+
+
+def _tombstone(conn: sqlite3.Connection, kind: str, work_id: str, identifier: str, actor: str, doc: str) -> None:
+    conn.execute(
+        "INSERT INTO tombstones (kind, work_id, id, deleted_at, actor, doc) VALUES (?, ?, ?, ?, ?, ?)",
+        (kind, work_id, identifier, datetime.now(timezone.utc).isoformat(), actor, doc),
+    )
+
+
+def delete_verse(work_id: str, verse_id: str, actor: str) -> None:
+    conn = connect()
+    with conn:
+        row = conn.execute(
+            "SELECT doc FROM verses WHERE work_id = ? AND verse_id = ?", (work_id, verse_id)
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM verses WHERE work_id = ? AND verse_id = ?", (work_id, verse_id))
+        _assign_manual_number(conn, work_id, verse_id, None)
+        _tombstone(conn, "verses", work_id, verse_id, actor, row[0])
+
+
+def _assign_manual_number(
+    conn: sqlite3.Connection, work_id: str, verse_id: str, number_manual: Optional[str]
+) -> None:
+    conn.execute(
+        "DELETE FROM verse_manual_numbers WHERE work_id = ? AND verse_id = ? AND number_manual IS NOT ?",
+        (work_id, verse_id, number_manual),
+    )
+    if number_manual:
+        conn.execute(
+            "INSERT OR IGNORE INTO verse_manual_numbers (work_id, number_manual, verse_id) VALUES (?, ?, ?)",
+            (work_id, number_manual, verse_id),
+        )
+
+
+def _ensure_allocator(conn: sqlite3.Connection, work_id: str) -> int:
+    """Return the work's next sequence number, seeding the allocator tables if needed."""
+    row = conn.execute("SELECT next_number FROM verse_allocators WHERE work_id = ?", (work_id,)).fetchone()
+    if row is not None:
+        return row[0]
+    numbers = [storage._verse_number(verse_id) or 0 for verse_id in _existing_verse_ids(work_id)]
+    next_number = max(numbers, default=0) + 1
+    conn.execute("INSERT INTO verse_allocators (work_id, next_number) VALUES (?, ?)", (work_id, next_number))
+    conn.execute(
+        "INSERT OR IGNORE INTO verse_manual_numbers (work_id, number_manual, verse_id)"
+        " SELECT work_id, number_manual, verse_id FROM verses"
+        " WHERE work_id = ? AND number_manual IS NOT NULL AND number_manual != ''"
+        " ORDER BY ord, verse_id",
+        (work_id,),
+    )
+    return next_number
+
+
+def manual_number_exists(work_id: str, number_manual: Optional[str], exclude: Optional[str] = None) -> bool:
+    if not number_manual:
+        return False
+    conn = connect()
+    with conn:
+        _ensure_allocator(conn, work_id)
+        row = conn.execute(
+            "SELECT verse_id FROM verse_manual_numbers WHERE work_id = ? AND number_manual = ?",
+            (work_id, number_manual),
+        ).fetchone()
+    return row is not None and row[0] != exclude
+
+
+def allocate_verse_id(work_id: str, number_manual: Optional[str] = None) -> Tuple[str, int]:
+    conn = connect()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        number = _ensure_allocator(conn, work_id)
+        if number_manual and conn.execute(
+            "SELECT 1 FROM verse_manual_numbers WHERE work_id = ? AND number_manual = ?",
+            (work_id, number_manual),
+        ).fetchone():
+            raise storage.DuplicateManualNumber(number_manual)
+        verse_id = f"V{number:04d}"
+        conn.execute("UPDATE verse_allocators SET next_number = ? WHERE work_id = ?", (number + 1, work_id))
+        _assign_manual_number(conn, work_id, verse_id, number_manual)
+    return verse_id, number
+
+
+def release_verse_id(work_id: str, verse_id: str) -> None:
+    conn = connect()
+    with conn:
+        conn.execute(
+            "DELETE FROM verse_manual_numbers WHERE work_id = ? AND verse_id = ?"
+            " AND NOT EXISTS (SELECT 1 FROM verses WHERE work_id = ? AND verse_id = ?)",
+            (work_id, verse_id, work_id, verse_id),
+        )
+
+
+def rebuild_verse_allocator(work_id: str) -> None:
+    conn = connect()
+    with conn:
+        conn.execute("DELETE FROM verse_allocators WHERE work_id = ?", (work_id,))
+        conn.execute("DELETE FROM verse_manual_numbers WHERE work_id = ?", (work_id,))
+        _ensure_allocator(conn, work_id)
+
+
+def _state_counts(rows: Iterable) -> Dict[str, Dict[str, int]]:
+    counts: Dict[str, Dict[str, int]] = {kind: {} for kind in storage.REVIEW_STATE_KINDS}
+    for kind, state, count in rows:
+        if count > 0:
+            counts[kind][state] = count
+    return {kind: dict(sorted(states.items())) for kind, states in counts.items()}
+
+
+def _recount_review_stats(conn: sqlite3.Connection, work_id: Optional[str]) -> None:
+    """Recompute ``review_stats`` for one work, or for every work if ``work_id`` is None."""
+    where = "" if work_id is None else " WHERE work_id = ?"
+    params: tuple = () if work_id is None else (work_id,)
+    conn.execute("DELETE FROM review_stats" + where, params)
+    for table in storage.REVIEW_STATE_KINDS:
+        conn.execute(
+            f"INSERT INTO review_stats (work_id, kind, state, count)"
+            f" SELECT work_id, '{table}', state, COUNT(*) FROM {table}{where} GROUP BY work_id, state",
+            params,
+        )
+
+
+def count_review_states(work_id: str) -> Dict[str, Dict[str, int]]:
+    conn = connect()
+    rows = []
+    for table in storage.REVIEW_STATE_KINDS:
+        rows.extend(
+            conn.execute(
+                f"SELECT '{table}', state, COUNT(*) FROM {table} WHERE work_id = ? GROUP BY state",
+                (work_id,),
+            )
+        )
+    return _state_counts(rows)
+
+
+def review_state_counts(work_id: str) -> Dict[str, Dict[str, int]]:
+    load_work(work_id)
+    rows = connect().execute(
+        "SELECT kind, state, count FROM review_stats WHERE work_id = ?", (work_id,)
+    )
+    return _state_counts(rows)
+
+
+def rebuild_review_state_counts(work_id: str) -> Dict[str, Dict[str, int]]:
+    conn = connect()
+    with conn:
+        _recount_review_stats(conn, work_id)
+    return review_state_counts(work_id)
+
+
+def _existing_verse_ids(work_id: str) -> Iterable[str]:
+    rows = connect().execute("SELECT verse_id FROM verses WHERE work_id = ?", (work_id,))
+    return [row[0] for row in rows]
+
+
+def list_commentary(work_id: str, fields: Optional[Sequence[str]] = None) -> List:
+    query = "SELECT {doc} FROM commentary WHERE work_id = ? ORDER BY commentary_id"
+    if fields is not None:
+        return _projected_rows(query, (work_id,), fields)
+    rows = connect().execute(query.format(doc="doc"), (work_id,))
+    return [Commentary.parse_obj(codec.loads(row[0])) for row in rows]
+
+
+def iter_commentary_digests(work_id: str) -> Iterator[Tuple[str, str]]:
+    rows = connect().execute(
+        "SELECT commentary_id, doc FROM commentary WHERE work_id = ? ORDER BY commentary_id", (work_id,)
+    )
+    for commentary_id, doc in rows:
+        yield commentary_id, storage.content_digest(doc)
+
+
+def list_commentary_for_verse(work_id: str, verse_id: str, fields: Optional[Sequence[str]] = None) -> List:
+    query = (
+        "SELECT {doc} FROM commentary_targets t"
+        " JOIN commentary c ON c.work_id = t.work_id AND c.commentary_id = t.commentary_id"
+        " WHERE t.work_id = ? AND t.verse_id = ? ORDER BY c.commentary_id"
+    )
+    if fields is not None:
+        return _projected_rows(query, (work_id, verse_id), fields)
+    rows = connect().execute(query.format(doc="c.doc"), (work_id, verse_id))
+    return [Commentary.parse_obj(codec.loads(row[0])) for row in rows]
+
+
+def load_commentary(work_id: str, commentary_id: str) -> Commentary:
+    row = connect().execute(
+        "SELECT doc FROM commentary WHERE work_id = ? AND commentary_id = ?",
+        (work_id, commentary_id),
+    ).fetchone()
+    if row is None:
+        raise FileNotFoundError(commentary_id)
+    return Commentary.parse_obj(codec.loads(row[0]))
+
+
+def load_commentary_doc(work_id: str, commentary_id: str) -> Dict:
+    row = connect().execute(
+        "SELECT doc FROM commentary WHERE work_id = ? AND commentary_id = ?",
+        (work_id, commentary_id),
+    ).fetchone()
+    if row is None:
+        raise FileNotFoundError(commentary_id)
+    return codec.loads(row[0])
+
+
+def _upsert_commentary(conn: sqlite3.Connection, commentary: Commentary) -> None:
+    key = (commentary.work_id, commentary.commentary_id)
+    payload = commentary.dict(by_alias=True)
+    verse_ids = storage_index._commentary_verse_ids(payload)
+    conn.execute(
+        "INSERT INTO commentary (work_id, commentary_id, verse_id, state, doc)"
+        " VALUES (?, ?, ?, ?, ?)"
+        " ON CONFLICT (work_id, commentary_id) DO UPDATE SET verse_id = excluded.verse_id,"
+        " state = excluded.state, doc = excluded.doc",
+        key
+        + (
+            commentary.verse_id,
+            _state(commentary),
+            _record_doc(conn, "commentary", commentary.work_id, commentary.commentary_id, payload),
+        ),
+    )
+    conn.execute("DELETE FROM commentary_targets WHERE work_id = ? AND commentary_id = ?", key)
+    conn.executemany(
+        "INSERT OR IGNORE INTO commentary_targets (work_id, verse_id, commentary_id) VALUES (?, ?, ?)",
+        [
+            (commentary.work_id, verse_id, commentary.commentary_id)
+            for verse_id in verse_ids
+        ],
+    )
+
+
+def save_commentary(commentary: Commentary) -> None:
+    conn = connect()
+    with conn:
+        _upsert_commentary(conn, commentary)
+
+
+def delete_commentary(work_id: str, commentary_id: str, actor: str) -> None:
+    conn = connect()
+    key = (work_id, commentary_id)
+    with conn:
+        row = conn.execute(
+            "SELECT doc FROM commentary WHERE work_id = ? AND commentary_id = ?", key
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM commentary WHERE work_id = ? AND commentary_id = ?", key)
+        conn.execute("DELETE FROM commentary_targets WHERE work_id = ? AND commentary_id = ?", key)
+        _tombstone(conn, "commentary", work_id, commentary_id, actor, row[0])
+
+
+def generate_commentary_id(work_id: str, verse_id: str) -> str:
+    rows = connect().execute(
+        "SELECT commentary_id FROM commentary WHERE work_id = ? AND verse_id = ?",
+        (work_id, verse_id),
+    )
+    indices = [
+        int(row[0].split("-")[-1])
+        for row in rows
+        if storage.COMMENTARY_ID_PATTERN.match(row[0])
+    ]
+    work_code = work_id.replace("-", "").upper()[:6]
+    return f"C-{work_code}-{verse_id}-{max(indices, default=0) + 1:04d}"
+
+
+def load_users() -> List[User]:
+    rows = connect().execute("SELECT doc FROM users ORDER BY position")
+    return [User.parse_obj(codec.loads(row[0])) for row in rows]
+
+
+def find_user(user_id: str) -> Optional[User]:
+    row = connect().execute("SELECT doc FROM users WHERE id = ?", (user_id,)).fetchone()
+    return User.parse_obj(codec.loads(row[0])) if row else None
+
+
+def find_user_by_email(email: str) -> Optional[User]:
+    row = connect().execute(
+        "SELECT doc FROM users WHERE email_lower = ? ORDER BY position LIMIT 1", (email.lower(),)
+    ).fetchone()
+    return User.parse_obj(codec.loads(row[0])) if row else None
+
+
+def save_users(users: List[User]) -> None:
+    conn = connect()
+    with conn:
+        conn.execute("DELETE FROM users")
+        conn.executemany(
+            "INSERT INTO users (id, email_lower, position, doc) VALUES (?, ?, ?, ?)",
+            [
+                (user.id, user.email.lower(), position, _dumps(user.dict(by_alias=True)))
+                for position, user in enumerate(users)
+            ],
+        )
+
+
+def list_tombstones(work_id: str, kind: Optional[str] = None) -> List[Dict]:
+    query = "SELECT kind, work_id, id, deleted_at, actor FROM tombstones WHERE work_id = ?"
+    params: tuple = (work_id,)
+    if kind:
+        query += " AND kind = ?"
+        params += (kind,)
+    rows = connect().execute(query + " ORDER BY deleted_at", params)
+    return [
+        {"type": row[0], "work_id": row[1], "id": row[2], "deleted_at": row[3], "actor": row[4]}
+        for row in rows
+    ]
+
+
+def append_review_logs(entries: Iterable[Tuple[str, str, str, Dict]]) -> None:
+    rows = []
+    for kind, work_id, identifier, payload in entries:
+        entry = storage_review._review_log_entry(kind, work_id, identifier, payload)
+        rows.append((entry["ts"], kind, work_id, identifier, entry["actor"], entry["action"], _dumps(entry)))
+    conn = connect()
+    with conn:
+        conn.executemany(
+            "INSERT INTO review_log (ts, kind, work_id, item_id, actor, action, entry)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def append_review_log(kind: str, work_id: str, identifier: str, payload: Dict) -> None:
+    append_review_logs([(kind, work_id, identifier, payload)])
+
+
+def query_review_log(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    work_id: Optional[str] = None,
+    item_id: Optional[str] = None,
+    actor: Optional[str] = None,
+    action: Optional[str] = None,
+    limit: int = 100,
+    after: Optional[storage.ReviewLogPosition] = None,
+) -> Tuple[List[Dict], Optional[storage.ReviewLogPosition]]:
+    clauses: List[str] = []
+    params: List = []
+    if date_from is not None:
+        clauses.append("ts >= ?")
+        params.append(date_from.isoformat())
+    if date_to is not None:
+        clauses.append("ts < ?")
+        params.append((date_to + timedelta(days=1)).isoformat())
+    for column, value in (("work_id", work_id), ("item_id", item_id), ("actor", actor), ("action", action)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if after is not None:
+        clauses.append("seq > ?")
+        params.append(after[1])
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = connect().execute(
+        f"SELECT seq, entry FROM review_log{where} ORDER BY seq LIMIT ?", params + [limit + 1]
+    ).fetchall()
+    entries = [codec.loads(entry) for _, entry in rows[:limit]]
+    if len(rows) <= limit:
+        return entries, None
+    return entries, (entries[-1]["ts"][:10], rows[limit - 1][0])
+
+
+def review_activity(actor: str) -> Dict[str, Dict]:
+    conn = connect()
+    activity: Dict[str, Dict] = {}
+    rows = conn.execute(
+        "SELECT kind, action, to_state, count FROM review_activity WHERE actor = ?", (actor,)
+    )
+    for kind, action, to_state, count in rows:
+        data = activity.setdefault(kind, {"counts": {}, "recent": []})
+        data["counts"].setdefault(action, {})[to_state] = count
+    fields = ("ts", "work_id", "id", "action", "from", "to")
+    for kind, data in activity.items():
+        rows = conn.execute(
+            "SELECT entry FROM review_log WHERE actor = ? AND kind = ? ORDER BY seq DESC LIMIT ?",
+            (actor, kind, storage.REVIEW_ACTIVITY_RECENT),
+        )
+        for (entry,) in rows:
+            entry = codec.loads(entry)
+            data["recent"].append({key: entry.get(key) for key in fields})
+    return activity
+
+
+def list_pending_reviews(
+    work_ids: Optional[List[str]] = None,
+    limit: int = 50,
+    after: Optional[storage.PendingKey] = None,
+) -> Tuple[List[storage.PendingKey], int]:
+    states = storage.PENDING_REVIEW_STATES
+    where = f"state IN ({', '.join('?' for _ in states)})"
+    params: tuple = tuple(states)
+    if work_ids is not None:
+        where += f" AND work_id IN ({', '.join('?' for _ in work_ids)})"
+        params += tuple(work_ids)
+    last_updated = (
+        "COALESCE(json_extract(doc, '$.review.last_entry.ts'),"
+        " json_extract(doc, '$.review.history[#-1].ts'), '')"
+    )
+    queue = (
+        f"SELECT {last_updated} AS last_updated, 'verse' AS type, work_id, verse_id AS item_id"
+        f" FROM verses WHERE {where}"
+        f" UNION ALL SELECT {last_updated}, 'commentary', work_id, commentary_id"
+        f" FROM commentary WHERE {where}"
+    )
+    conn = connect()
+    total = conn.execute(f"SELECT COUNT(*) FROM ({queue})", params + params).fetchone()[0]
+    query = f"SELECT * FROM ({queue})"
+    page_params = params + params
+    if after is not None:
+        query += " WHERE (last_updated, type, work_id, item_id) < (?, ?, ?, ?)"
+        page_params += tuple(after)
+    query += " ORDER BY last_updated DESC, type DESC, work_id DESC, item_id DESC LIMIT ?"
+    rows = conn.execute(query, page_params + (limit,))
+    return [tuple(row) for row in rows], total
+
+
+def _iter_json_records(directory: Path, pattern: str) -> Iterator[Dict]:
+    if not directory.exists():
+        return
+    for path in sorted(directory.glob(pattern)):
+        yield storage.read_json(path)
+
+
+def _prune_work(conn: sqlite3.Connection, work_id: str, verse_ids: List[str], commentary_ids: List[str]) -> None:
+    """Delete a work's verse and commentary rows whose ids are not listed."""
+    kept_verses = (work_id, _dumps(verse_ids))
+    kept_commentary = (work_id, _dumps(commentary_ids))
+    for table in ("verses", "verse_manual_numbers"):
+        conn.execute(
+            f"DELETE FROM {table} WHERE work_id = ? AND verse_id NOT IN (SELECT value FROM json_each(?))",
+            kept_verses,
+        )
+    for table in ("commentary", "commentary_targets"):
+        conn.execute(
+            f"DELETE FROM {table} WHERE work_id = ? AND commentary_id NOT IN (SELECT value FROM json_each(?))",
+            kept_commentary,
+        )
+
+
+def import_json_tree(data_root: Path, database: Optional[Path] = None) -> Dict[str, int]:
+    """Copy a JSON ``data/library`` tree into the SQLite database.
+
+    Each imported work's rows are replaced by the tree's: records missing
+    from the tree are deleted, so the import can be re-run after a partial
+    failure or to pick up later edits. Works that are only in the database are
+    left alone. Returns the number of records copied per table.
+    """
+    storage.flush_pending_writes()
+    conn = connect(database)
+    counts = {
+        "works": 0,
+        "verses": 0,
+        "commentary": 0,
+        "review_history": 0,
+        "users": 0,
+        "tombstones": 0,
+        "review_log": 0,
+    }
+    with conn:
+        for work_json in sorted(data_root.glob(f"*/{storage.WORK_JSON}")):
+            root = work_json.parent
+            work = Work.parse_obj(storage.read_json(work_json))
+            conn.execute(
+                "INSERT OR REPLACE INTO works (work_id, doc) VALUES (?, ?)",
+                (work.work_id, _dumps(work.dict(by_alias=True))),
+            )
+            counts["works"] += 1
+            conn.execute("DELETE FROM review_history WHERE work_id = ?", (work.work_id,))
+            # Records are upserted first: history still inline in a legacy
+            # record predates anything in the history log.
+            verse_ids = []
+            for data in _iter_json_records(root / storage.VERSES_DIR, "V*.json"):
+                verse = Verse.parse_obj(data)
+                _upsert_verse(conn, verse)
+                verse_ids.append(verse.verse_id)
+                counts["verses"] += 1
+            commentary_ids = []
+            for data in _iter_json_records(root / storage.COMMENTARY_DIR, "*/*.json"):
+                commentary = Commentary.parse_obj(data)
+                _upsert_commentary(conn, commentary)
+                commentary_ids.append(commentary.commentary_id)
+                counts["commentary"] += 1
+            _prune_work(conn, work.work_id, verse_ids, commentary_ids)
+            history_log = root / storage.HISTORY_LOG
+            if history_log.exists():
+                with history_log.open("rb") as handle:
+                    for line in handle:
+                        if line.strip():
+                            record = codec.loads(line)
+                            _insert_history(conn, record["kind"], work.work_id, record["id"], record["entry"])
+                            counts["review_history"] += 1
+            conn.execute("DELETE FROM tombstones WHERE work_id = ? AND kind IN ('verses', 'commentary')", (work.work_id,))
+            for tombstone in _iter_json_records(root / storage.TRASH_DIR / "tombstones", "*/*.json"):
+                trashed = root / tombstone["trashed_path"]
+                doc = trashed.read_text(encoding="utf-8") if trashed.exists() else None
+                conn.execute(
+                    "INSERT INTO tombstones (kind, work_id, id, deleted_at, actor, doc) VALUES (?, ?, ?, ?, ?, ?)",
+                    (tombstone["type"], tombstone["work_id"], tombstone["id"], tombstone["deleted_at"], tombstone.get("actor"), doc),
+                )
+                counts["tombstones"] += 1
+        users_file = data_root / storage.USERS_FILE
+        if users_file.exists():
+            conn.execute("DELETE FROM users")
+            for position, item in enumerate(storage.read_json(users_file)):
+                user = User.parse_obj(item)
+                conn.execute(
+                    "INSERT INTO users (id, email_lower, position, doc) VALUES (?, ?, ?, ?)",
+                    (user.id, user.email.lower(), position, _dumps(user.dict(by_alias=True))),
+                )
+                counts["users"] += 1
+        review_dir = data_root.parent / "logs" / "review"
+        if review_dir.exists():
+            conn.execute("DELETE FROM review_log")
+            conn.execute("DELETE FROM review_activity")
+            for log_file in sorted(review_dir.glob("*.jsonl")):
+                with log_file.open("r", encoding="utf-8") as handle:
+                    for line in handle:
+                        if not line.strip():
+                            continue
+                        entry = codec.loads(line)
+                        conn.execute(
+                            "INSERT INTO review_log (ts, kind, work_id, item_id, actor, action, entry)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (entry["ts"], entry["kind"], entry["work_id"], entry["id"], entry.get("actor"), entry.get("action"), line.strip()),
+                        )
+                        counts["review_log"] += 1
+    return counts
@@ -0,0 +1,60 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+
+def _reload_backend():
+    import settings
+
+    importlib.reload(settings)
+
+    import codec
+
+    importlib.reload(codec)
+
+    import storage
+
+    # Drain the previous module's group committer so its thread does not fsync
+    # into the next test's patched hooks.
+    storage.flush_pending_writes()
+    # Fresh caches and review log writer; storage re-imports their names.
+    import storage_index
+    import storage_review
+
+    importlib.reload(storage_index)
+    importlib.reload(storage_review)
+    importlib.reload(storage)
+
+    import app as app_module
+
+    importlib.reload(app_module)
+    return app_module
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    """Reload the backend modules against an isolated ``DATA_ROOT``."""
+    monkeypatch.setenv("DATA_ROOT", str(tmp_path / "library"))
+    monkeypatch.setenv("STORAGE_BACKEND", "json")
+    return _reload_backend()
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch):
+    """Like ``backend`` but with ``STORAGE_BACKEND=sqlite``."""
+    monkeypatch.setenv("DATA_ROOT", str(tmp_path / "library"))
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    monkeypatch.delenv("SQLITE_PATH", raising=False)
+    return _reload_backend()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def any_backend(request):
+    """``backend`` and ``sqlite_backend`` in turn."""
+    return request.getfixturevalue("backend" if request.param == "json" else "sqlite_backend")
@@ -0,0 +1,545 @@
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+WORK_PAYLOAD = {
+    "work_id": "satyanusaran",
+    "title": {"en": "Satyanusaran", "bn": "Satyanusaran (BN)"},
+    "author": "Sree Sree Thakur",
+    "canonical_lang": "bn",
+    "langs": ["bn", "en"],
+    "structure": {"unit": "verse", "numbering": "sequential"},
+    "source_editions": [
+        {"id": "ED-PDF-BN-01", "lang": "bn", "type": "pdf", "provenance": "personal_copy"}
+    ],
+    "policy": {"sacred": True},
+}
+
+
+@pytest.fixture
+def client(any_backend) -> TestClient:
+    client = TestClient(any_backend.create_app())
+    response = client.post(
+        "/auth/register",
+        json={"email": "sme@example.com", "password": "supersecurepassword", "roles": ["sme"]},
+    )
+    assert response.status_code == 201
+    response = client.post(
+        "/auth/login", json={"email": "sme@example.com", "password": "supersecurepassword"}
+    )
+    assert response.status_code == 200
+    assert client.put("/works/satyanusaran", json=WORK_PAYLOAD).status_code == 200
+    return client
+
+
+def _skip_unless_json_files(backend) -> None:
+    if backend.storage.settings.STORAGE_BACKEND != "json":
+        pytest.skip("inspects the JSON record files")
+
+
+def _create_verses(client: TestClient, count: int) -> list:
+    verse_ids = []
+    for number in range(1, count + 1):
+        response = client.post(
+            "/works/satyanusaran/verses",
+            json={
+                "number_manual": str(number),
+                "texts": {"bn": f"Verse {number}"},
+                "origin": [{"edition": "ED-PDF-BN-01", "page": 1, "para_index": number}],
+            },
+        )
+        assert response.status_code == 201
+        verse_ids.append(response.json()["verse_id"])
+    return verse_ids
+
+
+def test_list_verses_offset_and_keyset_pages(client: TestClient):
+    verse_ids = _create_verses(client, 5)
+
+    page = client.get("/works/satyanusaran/verses", params={"offset": 2, "limit": 2}).json()
+    assert [item["verse_id"] for item in page["items"]] == verse_ids[2:4]
+    assert page["total"] == 5
+    assert page["next"] == {"limit": 2, "offset": 4}
+
+    for first in ({"limit": 2}, {"limit": 2, "after_order": 0}):
+        seen = []
+        params = first
+        while True:
+            page = client.get("/works/satyanusaran/verses", params=params).json()
+            seen.extend(item["verse_id"] for item in page["items"])
+            if page["next"] is None:
+                break
+            params = page["next"]
+        assert seen == verse_ids
+    page = client.get("/works/satyanusaran/verses", params={"limit": 2, "after_order": 0}).json()
+    assert page["next"] == {"limit": 2, "after_order": 2}
+
+
+def test_verse_and_commentary_reads_accept_fields_and_langs(client: TestClient):
+    verse_ids = _create_verses(client, 3)
+    commentary_id = client.post(
+        f"/works/satyanusaran/verses/{verse_ids[0]}/commentary",
+        json={"texts": {"bn": "Tika", "en": "Note"}},
+    ).json()["commentary_id"]
+
+    page = client.get(
+        "/works/satyanusaran/verses", params={"limit": 2, "after_order": 0, "fields": "verse_id,texts", "langs": "bn"}
+    ).json()
+    assert page["items"][0] == {"verse_id": verse_ids[0], "texts": {"bn": "Verse 1"}}
+    assert page["next"]["after_order"] == 2
+
+    verse = client.get(f"/works/satyanusaran/verses/{verse_ids[0]}", params={"langs": "en"}).json()
+    assert verse["texts"] == {"en": None} and list(verse["segments"]) == ["en"]
+    assert "review" in verse
+    verse = client.get(f"/works/satyanusaran/verses/{verse_ids[0]}", params={"fields": "review.state"}).json()
+    assert verse == {"review": {"state": "draft"}}
+
+    listed = client.get(
+        f"/works/satyanusaran/verses/{verse_ids[0]}/commentary", params={"fields": "commentary_id,texts.en"}
+    ).json()
+    assert listed == [{"commentary_id": commentary_id, "texts": {"en": "Note"}}]
+    client.post(f"/review/commentary/{commentary_id}/flag", json={"work_id": "satyanusaran"})
+    listed = client.get(f"/works/satyanusaran/verses/{verse_ids[0]}/commentary", params={"langs": "bn"}).json()
+    assert listed[0]["texts"] == {"bn": "Tika"}
+    assert listed[0]["review"]["last_entry"]["to"] == "flagged" and "to_state" not in listed[0]["review"]["last_entry"]
+    full = client.get(f"/works/satyanusaran/verses/{verse_ids[0]}/commentary").json()[0]
+    assert listed[0]["review"] == full["review"]
+    commentary = client.get(
+        f"/works/satyanusaran/commentary/{commentary_id}", params={"fields": "texts", "langs": "bn"}
+    ).json()
+    assert commentary == {"texts": {"bn": "Tika"}}
+    assert client.get("/works/satyanusaran/verses", params={"fields": "texts;drop"}).status_code == 400
+
+
+def _materialized_exports(work_root) -> tuple:
+    """Merge, clean and train output built in memory from the files on disk.
+
+    Mirrors the exporters as they were before streaming, reading the raw
+    documents and history log rather than going through the storage models.
+    """
+    history: dict = {}
+    history_log = work_root / "_history.jsonl"
+    if history_log.exists():
+        for line in history_log.read_text(encoding="utf-8").splitlines():
+            record = json.loads(line)
+            history.setdefault((record["kind"], record["id"]), []).append(record["entry"])
+    verses = sorted(
+        (json.loads(path.read_text(encoding="utf-8")) for path in (work_root / "verses").glob("V*.json")),
+        key=lambda verse: (verse["order"], verse["verse_id"]),
+    )
+    commentary = sorted(
+        (json.loads(path.read_text(encoding="utf-8")) for path in (work_root / "commentary").glob("*/*.json")),
+        key=lambda item: item["commentary_id"],
+    )
+    for kind, items, key in (("verse", verses, "verse_id"), ("commentary", commentary, "commentary_id")):
+        for item in items:
+            if item.get("review") is not None:
+                item["review"]["history"] = history.get((kind, item[key]), [])
+    work = json.loads((work_root / "work.json").read_text(encoding="utf-8"))
+    merged = json.dumps({"work": work, "verses": verses, "commentary": commentary}, ensure_ascii=False, indent=2)
+
+    lines = []
+    for verse in verses:
+        for lang, text in (verse.get("texts") or {}).items():
+            if text:
+                line = {"type": "verse", "work_id": work["work_id"], "verse_id": verse["verse_id"], "lang": lang}
+                lines.append(json.dumps({**line, "text": text, "tags": verse.get("tags") or []}, ensure_ascii=False))
+    for item in commentary:
+        for lang, text in (item.get("texts") or {}).items():
+            if text:
+                line = {"type": "commentary", "work_id": work["work_id"], "commentary_id": item["commentary_id"]}
+                lines.append(json.dumps({**line, "lang": lang, "text": text, "genre": item.get("genre")}, ensure_ascii=False))
+
+    for verse in verses:
+        verse.pop("review", None)
+        meta = verse.get("meta") or {}
+        for key in ("reviewer", "date_reviewed", "entered_by"):
+            meta.pop(key, None)
+        verse["meta"] = meta
+        verse.pop("history", None)
+    for item in commentary:
+        for key in ("review", "priority", "authenticity"):
+            item.pop(key, None)
+    cleaned = json.dumps({"work": work, "verses": verses, "commentary": commentary}, ensure_ascii=False, indent=2)
+    return merged, cleaned, lines
+
+
+def test_streamed_exports_match_materialized_payload(client: TestClient, any_backend):
+    _skip_unless_json_files(any_backend)
+    work_root = any_backend.storage.work_dir("satyanusaran")
+    response = client.post("/build/merge", json={"work_id": "satyanusaran"})
+    merged, _, _ = _materialized_exports(work_root)
+    assert open(response.json()["output"], encoding="utf-8").read() == merged
+
+    verse_ids = _create_verses(client, 2)
+    client.post(f"/review/verse/{verse_ids[0]}/approve", json={"work_id": "satyanusaran"})
+    client.post(f"/review/verse/{verse_ids[0]}/flag", json={"work_id": "satyanusaran"})
+    client.post(f"/works/satyanusaran/verses/{verse_ids[1]}/commentary", json={"texts": {"en": "Note \u2014\nnext"}})
+    merged, cleaned, lines = _materialized_exports(work_root)
+    assert [entry["to"] for entry in json.loads(merged)["verses"][0]["review"]["history"]] == ["approved", "flagged"]
+    assert [json.loads(line)["type"] for line in lines] == ["verse", "verse", "commentary"]
+
+    output = client.post("/build/merge", json={"work_id": "satyanusaran"}).json()["output"]
+    assert open(output, encoding="utf-8").read() == merged
+    output = client.post("/export/clean", json={"work_id": "satyanusaran"}).json()["output"]
+    assert open(output, encoding="utf-8").read() == cleaned
+    output = client.post("/export/train", json={"work_id": "satyanusaran"}).json()["output"]
+    assert open(output, encoding="utf-8").read().splitlines() == lines
+
+    # Incremental runs stay identical after another transition.
+    client.post(f"/review/verse/{verse_ids[0]}/approve", json={"work_id": "satyanusaran"})
+    merged, _, _ = _materialized_exports(work_root)
+    output = client.post("/build/merge", json={"work_id": "satyanusaran"}).json()["output"]
+    assert open(output, encoding="utf-8").read() == merged
+    assert client.post("/export/train", json={"work_id": "missing"}).status_code == 404
+
+
+@pytest.mark.parametrize("kind", ["/build/merge", "/export/clean", "/export/train"])
+def test_incremental_exports_reencode_only_changed_records(client: TestClient, any_backend, monkeypatch, kind):
+    storage = any_backend.storage
+    verse_ids = _create_verses(client, 4)
+    client.post(f"/works/satyanusaran/verses/{verse_ids[0]}/commentary", json={"texts": {"en": "Note"}})
+    output = client.post(kind, json={"work_id": "satyanusaran"}).json()["output"]
+    mtime = os.stat(output).st_mtime_ns
+
+    loads = []
+    load_verse = storage.load_verse
+    monkeypatch.setattr(storage, "load_verse", lambda *args: loads.append(args[1]) or load_verse(*args))
+    assert client.post(kind, json={"work_id": "satyanusaran"}).json()["output"] == output
+    assert os.stat(output).st_mtime_ns == mtime and loads == []
+
+    verse = load_verse("satyanusaran", verse_ids[1])
+    verse.texts["en"] = "Changed"
+    storage.save_verse(verse)
+    storage.delete_verse("satyanusaran", verse_ids[2], "sme@example.com")
+    added = client.post(
+        "/works/satyanusaran/verses", json={"number_manual": "9", "texts": {"bn": "New"}, "origin": []}
+    ).json()["verse_id"]
+    client.post(kind, json={"work_id": "satyanusaran"})
+    assert sorted(loads) == [verse_ids[1], added]
+    incremental = open(output, "rb").read()
+    client.post(kind, json={"work_id": "satyanusaran", "full": True})
+    assert open(output, "rb").read() == incremental
+
+
+def test_export_jobs_report_progress_and_share_running_job(client: TestClient, monkeypatch):
+    import export_jobs
+    import exports
+
+    _create_verses(client, 3)
+    response = client.post("/export/jobs", json={"work_id": "satyanusaran", "kind": "train"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    deadline = time.monotonic() + 10
+    while (job := client.get(f"/export/jobs/{job_id}").json())["state"] in ("queued", "running"):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert job["state"] == "succeeded" and job["processed"] == job["total"] == 3
+    assert job["output"].endswith("satyanusaran.train.jsonl")
+    # Another worker process answers from the persisted status.
+    assert export_jobs.ExportJobQueue(1, 10).get(job_id)["state"] == "succeeded"
+
+    release = threading.Event()
+    export_train = exports.EXPORTERS["train"]
+
+    def blocked(*args):
+        release.wait(10)
+        return export_train(*args)
+
+    monkeypatch.setitem(exports.EXPORTERS, "train", blocked)
+    first = client.post("/export/jobs", json={"work_id": "satyanusaran", "kind": "train"}).json()
+    second = client.post("/export/jobs", json={"work_id": "satyanusaran", "kind": "train"}).json()
+    assert first["job_id"] == second["job_id"] and first["state"] in ("queued", "running")
+    rebuild = client.post("/export/jobs", json={"work_id": "satyanusaran", "kind": "train", "full": True}).json()
+    assert rebuild["job_id"] != first["job_id"] and rebuild["full"] is True
+    release.set()
+    assert client.post("/export/train", json={"work_id": "missing"}).status_code == 404
+    assert client.get("/export/jobs/0123").status_code == 404
+    assert client.post("/export/jobs", json={"work_id": "satyanusaran", "kind": "pdf"}).status_code == 422
+
+
+def test_export_jobs_dedupe_across_workers(client: TestClient, monkeypatch):
+    import export_jobs
+    import exports
+
+    _create_verses(client, 2)
+    release = threading.Event()
+    export_train = exports.EXPORTERS["train"]
+
+    def blocked(*args):
+        release.wait(10)
+        return export_train(*args)
+
+    monkeypatch.setitem(exports.EXPORTERS, "train", blocked)
+    # Two queues stand in for two uvicorn workers with separate in-process state.
+    running = export_jobs.ExportJobQueue(1, 10).submit("satyanusaran", "train", False)
+    other = export_jobs.ExportJobQueue(1, 10)
+    follower = other.submit("satyanusaran", "train", False)
+    assert follower.job_id == running.job_id
+    release.set()
+    assert follower.future.result(10) == running.future.result(10)
+    assert follower.state == "succeeded"
+    key = ("satyanusaran", "train", False, ())
+    assert not export_jobs.claim_path(key).exists()
+
+    # A claim left by a worker that died does not block new exports.
+    export_jobs.claim_path(key).write_text(f"{running.job_id} 999999999", encoding="utf-8")
+    fresh = other.submit("satyanusaran", "train", False)
+    assert fresh.job_id != running.job_id
+    assert fresh.future.result(10) == running.output
+
+
+def test_library_export_fans_works_out_to_processes(client: TestClient, any_backend):
+    import exports
+
+    storage = any_backend.storage
+    _create_verses(client, 2)
+    assert client.put("/works/second", json={**WORK_PAYLOAD, "work_id": "second"}).status_code == 200
+    client.post("/works/second/verses", json={"number_manual": "1", "texts": {"en": "One"}, "origin": []})
+
+    path = exports.export_library("train", workers=2)
+    manifest = storage.read_json(path)
+    assert [entry["work_id"] for entry in manifest["works"]] == ["satyanusaran", "second"]
+    assert [entry["records"] for entry in manifest["works"]] == [2, 1] and manifest["failed"] == []
+    assert open(manifest["works"][1]["output"], encoding="utf-8").read().count("\n") == 1
+
+    response = client.post("/export/library", json={"kind": "merge"})
+    assert response.status_code == 202 and response.json()["work_id"] == "*"
+    deadline = time.monotonic() + 30
+    while (job := client.get(f"/export/jobs/{response.json()['job_id']}").json())["state"] in ("queued", "running"):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert job["state"] == "succeeded" and job["processed"] == job["total"] == 2
+    assert storage.read_json(exports.library_manifest_path("merge"))["works"][0]["sha256"]
+
+
+@pytest.mark.parametrize("compression, opener", [(None, open), ("gzip", gzip.open), ("xz", lzma.open)])
+def test_sharded_train_export_writes_index(client: TestClient, any_backend, compression, opener):
+    _create_verses(client, 5)
+    plain = client.post("/export/train", json={"work_id": "satyanusaran"}).json()["output"]
+    response = client.post(
+        "/export/train", json={"work_id": "satyanusaran", "shard_lines": 2, "compression": compression}
+    )
+    index_path = response.json()["output"]
+    index = json.load(open(index_path, encoding="utf-8"))
+    assert index["lines"] == 5 and [shard["lines"] for shard in index["shards"]] == [2, 2, 1]
+
+    lines = []
+    for shard in index["shards"]:
+        path = os.path.join(os.path.dirname(index_path), shard["file"])
+        assert hashlib.sha256(open(path, "rb").read()).hexdigest() == shard["sha256"]
+        with opener(path, "rt", encoding="utf-8") as handle:
+            lines.extend(handle.read().splitlines())
+    assert lines == open(plain, encoding="utf-8").read().splitlines()
+
+    # Unchanged records and options leave the shards alone unless a full rebuild is asked for.
+    request = {"work_id": "satyanusaran", "shard_lines": 2, "compression": compression}
+    written = os.stat(index_path).st_mtime_ns
+    assert client.post("/export/train", json=request).json()["output"] == index_path
+    assert os.stat(index_path).st_mtime_ns == written
+    client.post("/export/train", json={**request, "full": True})
+    assert os.stat(index_path).st_mtime_ns != written
+    written = os.stat(index_path).st_mtime_ns
+    client.post("/works/satyanusaran/verses", json={"number_manual": "6", "texts": {"bn": "Six"}, "origin": []})
+    client.post("/export/train", json=request)
+    assert json.load(open(index_path, encoding="utf-8"))["lines"] == 6
+    assert os.stat(index_path).st_mtime_ns != written
+
+    by_size = client.post("/export/train", json={"work_id": "satyanusaran", "shard_mb": 0.0001}).json()
+    shards = json.load(open(by_size["output"], encoding="utf-8"))["shards"]
+    assert len(shards) > 1 and all(shard["bytes"] <= 105 or shard["lines"] == 1 for shard in shards)
+    response = client.post("/export/jobs", json={"work_id": "satyanusaran", "kind": "merge", "compression": "xz"})
+    assert response.status_code == 400
+
+
+def test_create_verse_rejects_duplicate_manual_number(client: TestClient):
+    assert _create_verses(client, 2) == ["V0001", "V0002"]
+    response = client.post(
+        "/works/satyanusaran/verses",
+        json={"number_manual": "2", "texts": {"bn": "Again"}, "origin": []},
+    )
+    assert response.status_code == 409
+
+
+def test_failed_create_releases_manual_number(client: TestClient, any_backend, monkeypatch):
+    def failing_save(verse):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(any_backend.storage, "save_verse", failing_save)
+    with pytest.raises(OSError):
+        client.post("/works/satyanusaran/verses", json={"number_manual": "1", "texts": {"bn": "One"}, "origin": []})
+    monkeypatch.undo()
+
+    response = client.post("/works/satyanusaran/verses", json={"number_manual": "1", "texts": {"bn": "One"}, "origin": []})
+    assert response.status_code == 201
+
+
+def test_work_summary_uses_review_state_counters(client: TestClient):
+    verse_ids = _create_verses(client, 3)
+    response = client.post(f"/review/verse/{verse_ids[0]}/approve", json={"work_id": "satyanusaran"})
+    assert response.status_code == 200
+
+    summary = client.get("/sme/work-summary/satyanusaran").json()
+    assert summary["total_verses"] == 3
+    assert summary["verse_stats"]["approved"] == 1
+    assert summary["verse_stats"]["draft"] == 2
+    analytics = client.get("/sme/analytics").json()
+    assert analytics["work_progress"]["satyanusaran"]["approved"] == 1
+    assert analytics["approved_by_me"] == 1
+    assert analytics["my_recent_activity"][0]["verse_id"] == verse_ids[0]
+
+
+def test_pending_reviews_cursor_pages(client: TestClient):
+    verse_ids = _create_verses(client, 3)
+    client.post(f"/review/verse/{verse_ids[1]}/flag", json={"work_id": "satyanusaran"})
+
+    page = client.get("/sme/pending-reviews", params={"limit": 2}).json()
+    assert page["total"] == 3
+    assert [item["item_id"] for item in page["items"]] == [verse_ids[1], verse_ids[2]]
+    assert page["items"][0]["state"] == "flagged"
+    rest = client.get("/sme/pending-reviews", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [item["item_id"] for item in rest["items"]] == [verse_ids[0]]
+    assert rest["next_cursor"] is None
+    assert client.get("/sme/pending-reviews", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_review_history_endpoint_pages_store(client: TestClient):
+    verse_id = _create_verses(client, 1)[0]
+    client.post(f"/review/verse/{verse_id}/flag", json={"work_id": "satyanusaran"})
+    response = client.post(f"/review/verse/{verse_id}/approve", json={"work_id": "satyanusaran"})
+    review = response.json()["review"]
+    assert review["history_count"] == 2
+    assert review["last_entry"]["to"] == "approved"
+    assert review["history"] == []
+
+    page = client.get(f"/works/satyanusaran/verses/{verse_id}/history", params={"limit": 1}).json()
+    assert page["total"] == 2
+    assert [entry["to"] for entry in page["items"]] == ["flagged"]
+    assert page["next"] == {"offset": 1, "limit": 1}
+    verse = client.get(f"/works/satyanusaran/verses/{verse_id}").json()
+    assert [entry["to"] for entry in verse["review"]["history"]] == ["flagged", "approved"]
+    listed = client.get("/works/satyanusaran/verses").json()["items"][0]
+    assert listed["review"]["history"] == []
+    assert client.get("/works/satyanusaran/verses/V9999/history").status_code == 404
+
+
+def test_review_response_of_legacy_record_counts_moved_history(client: TestClient, any_backend):
+    _skip_unless_json_files(any_backend)
+    storage = any_backend.storage
+    verse_id = _create_verses(client, 1)[0]
+    path = storage.verse_path("satyanusaran", verse_id)
+    legacy = json.loads(path.read_text(encoding="utf-8"))
+    legacy["review"]["history"] = [{"ts": "2024-01-01T00:00:00+00:00", "actor": "a@x", "action": "flag", "to": "flagged"}]
+    storage.write_json(path, legacy)
+
+    review = client.post(f"/review/verse/{verse_id}/approve", json={"work_id": "satyanusaran"}).json()["review"]
+    assert review["history"] == [] and review["history_count"] == 2
+    assert review["last_entry"]["to"] == "approved"
+    stored = client.get(f"/works/satyanusaran/verses/{verse_id}").json()["review"]
+    assert stored["history_count"] == 2
+    assert [entry["action"] for entry in stored["history"]] == ["flag", "state_change"]
+
+
+def test_review_log_endpoint_filters_and_pages(client: TestClient):
+    verse_ids = _create_verses(client, 2)
+    for verse_id in verse_ids:
+        client.post(f"/review/verse/{verse_id}/approve", json={"work_id": "satyanusaran"})
+    client.post(f"/review/verse/{verse_ids[0]}/flag", json={"work_id": "satyanusaran"})
+
+    page = client.get("/sme/review-log", params={"actor": "sme@example.com", "limit": 2}).json()
+    assert [entry["id"] for entry in page["items"]] == verse_ids
+    rest = client.get("/sme/review-log", params={"actor": "sme@example.com", "cursor": page["next_cursor"]}).json()
+    assert [(entry["id"], entry["to"]) for entry in rest["items"]] == [(verse_ids[0], "flagged")]
+    assert rest["next_cursor"] is None
+    assert len(client.get("/sme/review-log", params={"item_id": verse_ids[0]}).json()["items"]) == 2
+    assert client.get("/sme/review-log", params={"date_from": "2024-02-01", "date_to": "2024-01-01"}).status_code == 400
+    assert client.get("/sme/review-log", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_bulk_action_validates_then_persists_in_one_batch(client: TestClient):
+    verse_ids = _create_verses(client, 2)
+    response = client.post(
+        "/works/satyanusaran/verses",
+        json={"number_manual": "3", "texts": {"bn": "No origin"}, "origin": []},
+    )
+    verse_ids.append(response.json()["verse_id"])
+
+    result = client.post(
+        "/sme/bulk-action",
+        json={"work_id": "satyanusaran", "verse_ids": verse_ids + ["V9999"], "action": "approve"},
+    ).json()
+    assert result["success"] == verse_ids[:2]
+    assert result["failed"] == [
+        {"verse_id": verse_ids[2], "error": "Origin entry required"},
+        {"verse_id": "V9999", "error": "Verse not found"},
+    ]
+    summary = client.get("/sme/work-summary/satyanusaran").json()
+    assert summary["verse_stats"]["approved"] == 2
+    assert len(client.get("/sme/review-log", params={"action": "state_change"}).json()["items"]) == 2
+
+    result = client.post(
+        "/sme/bulk-action",
+        json={"work_id": "satyanusaran", "verse_ids": verse_ids[:1], "action": "rollback"},
+    ).json()
+    assert result["success"] == verse_ids[:1]
+    verse = client.get(f"/works/satyanusaran/verses/{verse_ids[0]}").json()
+    assert verse["review"]["state"] == "draft"
+    assert [entry["action"] for entry in verse["review"]["history"]] == ["state_change", "rollback"]
+    invalid = client.post(
+        "/sme/bulk-action",
+        json={"work_id": "satyanusaran", "verse_ids": verse_ids[:1], "action": "publish"},
+    ).json()
+    assert invalid == {"success": [], "failed": [{"verse_id": verse_ids[0], "error": "Invalid action"}]}
+
+
+def test_bulk_action_reports_only_failed_writes(client: TestClient, any_backend, monkeypatch):
+    _skip_unless_json_files(any_backend)
+    storage = any_backend.storage
+    verse_ids = _create_verses(client, 3)
+    path = storage.verse_path("satyanusaran", verse_ids[2])
+    legacy = json.loads(path.read_text(encoding="utf-8"))
+    legacy["texts"] = {"bn": legacy["texts"]["bn"]}
+    path.write_text(json.dumps(legacy), encoding="utf-8")
+
+    write_json = storage.write_json
+
+    def failing_write(target, payload):
+        if target.stem == verse_ids[1]:
+            raise OSError("disk full")
+        write_json(target, payload)
+
+    def failing_log(entries):
+        raise OSError("log unavailable")
+
+    monkeypatch.setattr(storage, "write_json", failing_write)
+    monkeypatch.setattr(storage, "append_review_logs", failing_log)
+    result = client.post(
+        "/sme/bulk-action", json={"work_id": "satyanusaran", "verse_ids": verse_ids, "action": "flag"}
+    ).json()
+    assert result["success"] == [verse_ids[0], verse_ids[2]]
+    assert result["failed"] == [{"verse_id": verse_ids[1], "error": "disk full"}]
+    assert result["errors"] == [{"stage": "review_log", "error": "log unavailable"}]
+
+    states = [client.get(f"/works/satyanusaran/verses/{verse_id}").json()["review"]["state"] for verse_id in verse_ids]
+    assert states == ["flagged", "draft", "flagged"]
+    assert list(storage.load_verse_doc("satyanusaran", verse_ids[2])["texts"]) == ["bn", "en", "or", "hi", "as"]
+
+
+def test_verses_are_stored_normalized_and_follow_work_languages(client: TestClient):
+    verse_id = _create_verses(client, 1)[0]
+    listed = client.get("/works/satyanusaran/verses").json()["items"][0]
+    assert list(listed["texts"]) == ["bn", "en", "or", "hi", "as"]
+    assert client.get(f"/works/satyanusaran/verses/{verse_id}").json()["texts"] == listed["texts"]
+
+    work = dict(WORK_PAYLOAD, langs=["bn", "en", "sa"])
+    assert client.put("/works/satyanusaran", json=work).status_code == 200
+    verse = client.get(f"/works/satyanusaran/verses/{verse_id}").json()
+    assert list(verse["texts"]) == ["bn", "en", "sa", "or", "hi", "as"]
+    assert verse["segments"]["sa"] == []
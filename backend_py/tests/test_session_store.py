@@ -0,0 +1,29 @@
+import time
+
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+def test_sqlite_sessions_are_shared_between_store_instances(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    worker_a = SQLiteSessionStore(path, max_age=60)
+    worker_b = SQLiteSessionStore(path, max_age=60)
+
+    worker_a.set("sid", "user-1")
+    assert worker_b.get("sid") == "user-1"
+    worker_b.delete("sid")
+    assert worker_a.get("sid") is None
+
+
+def test_sessions_expire_and_are_swept(tmp_path, monkeypatch):
+    for store in (MemorySessionStore(max_age=10), SQLiteSessionStore(tmp_path / "s.sqlite3", max_age=10)):
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now)
+        store.set("old", "user-1")
+        monkeypatch.setattr(time, "time", lambda: now + 5)
+        store.set("new", "user-2")
+        monkeypatch.setattr(time, "time", lambda: now + 11)
+        assert store.get("old") is None
+        assert store.get("new") == "user-2"
+        monkeypatch.setattr(time, "time", lambda: now + 20)
+        assert store.sweep() >= 1
+        assert store.get("new") is None
@@ -0,0 +1,680 @@
+import importlib.util
+import json
+import shutil
+import sys
+import threading
+from datetime import date, datetime, timezone
+
+import pytest
+
+from models import Commentary, User, Verse, Work
+
+
+def _verse(work_id: str, verse_id: str, order: int, text: str = "text") -> Verse:
+    return Verse(
+        work_id=work_id,
+        verse_id=verse_id,
+        number_manual=str(order),
+        order=order,
+        texts={"bn": text},
+    )
+
+
+def test_verse_index_tracks_local_and_external_writes(backend):
+    storage = backend.storage
+    storage.save_verse(_verse("w", "V0002", 2))
+    storage.save_verse(_verse("w", "V0001", 1))
+    assert [v.verse_id for v in storage.list_verses("w")] == ["V0001", "V0002"]
+
+    storage.save_verse(_verse("w", "V0001", 1, text="edited"))
+    assert storage.list_verses("w")[0].texts["bn"] == "edited"
+
+    external = _verse("w", "V0003", 3).dict(by_alias=True)
+    path = storage.verse_path("w", "V0003")
+    path.write_text(json.dumps(external), encoding="utf-8")
+    assert [v.verse_id for v in storage.list_verses("w")] == ["V0001", "V0002", "V0003"]
+
+    storage.delete_verse("w", "V0002", actor="tester")
+    assert [v.verse_id for v in storage.list_verses("w")] == ["V0001", "V0003"]
+
+    # Another process replacing a file by rename, as write_json does.
+    tmp = path.with_name(".V0003.json.tmp")
+    tmp.write_text(json.dumps({**external, "texts": {"bn": "replaced"}}), encoding="utf-8")
+    tmp.replace(path)
+    assert storage.list_verses("w")[1].texts["bn"] == "replaced"
+    assert storage.load_verses("w", ["V0003"])["V0003"].texts["bn"] == "replaced"
+
+
+def test_verse_index_does_not_reparse_unchanged_files(backend, monkeypatch):
+    storage = backend.storage
+    for number in range(1, 4):
+        storage.save_verse(_verse("w", f"V000{number}", number))
+    storage.list_verses("w")
+
+    def fail(_path):
+        raise AssertionError("verse file read or stat'ed on a cache hit")
+
+    monkeypatch.setattr(storage, "read_json", fail)
+    monkeypatch.setattr(storage, "_file_signature", fail)
+    assert len(storage.list_verses("w")) == 3
+    assert len(storage.list_verse_docs("w")) == 3
+
+
+def test_verse_index_hands_out_copies(backend):
+    storage = backend.storage
+    storage.save_verse(_verse("w", "V0001", 1))
+    storage.list_verses("w")[0].texts["bn"] = "mutated"
+    storage.list_verse_docs("w")[0]["texts"]["bn"] = "mutated"
+    storage.list_verses("w", fields=("texts",))[0]["texts"]["bn"] = "mutated"
+    assert storage.list_verses("w")[0].texts["bn"] == "text"
+    assert storage.list_verse_docs("w")[0]["texts"]["bn"] == "text"
+
+
+def _work(work_id: str) -> Work:
+    return Work(work_id=work_id, title={"en": work_id}, canonical_lang="bn", langs=["bn"], structure={})
+
+
+def _commentary(work_id: str, commentary_id: str, verse_id: str, targets) -> Commentary:
+    return Commentary(
+        commentary_id=commentary_id,
+        work_id=work_id,
+        verse_id=verse_id,
+        targets=[{"kind": "verse", "ids": targets}],
+        texts={"en": commentary_id},
+    )
+
+
+def test_commentary_index_resolves_ids_and_multi_verse_targets(backend):
+    storage = backend.storage
+    storage.save_commentary(_commentary("w", "C-W-V0001-0001", "V0001", ["V0001"]))
+    storage.save_commentary(_commentary("w", "C-W-V0002-0001", "V0002", ["V0002", "V0001"]))
+
+    ids = [c.commentary_id for c in storage.list_commentary_for_verse("w", "V0001")]
+    assert ids == ["C-W-V0001-0001", "C-W-V0002-0001"]
+    assert storage.load_commentary("w", "C-W-V0002-0001").targets[0].ids == ["V0002", "V0001"]
+
+    external = _commentary("w", "C-W-V0003-0001", "V0003", ["V0003", "V0001"])
+    path = storage.commentary_path("w", external.commentary_id, "V0003")
+    path.parent.mkdir(parents=True)
+    path.write_text(json.dumps(external.dict(by_alias=True)), encoding="utf-8")
+    assert len(storage.list_commentary_for_verse("w", "V0001")) == 3
+
+    storage.delete_commentary("w", "C-W-V0002-0001", actor="tester")
+    ids = [c.commentary_id for c in storage.list_commentary_for_verse("w", "V0001")]
+    assert ids == ["C-W-V0001-0001", "C-W-V0003-0001"]
+    assert [c.commentary_id for c in storage.list_commentary_for_verse("w", "V0002")] == []
+    with pytest.raises(FileNotFoundError):
+        storage.load_commentary("w", "C-W-V0002-0001")
+
+
+def _load_copy(module, name: str):
+    spec = importlib.util.spec_from_file_location(name, module.__file__)
+    copy = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(copy)
+    return copy
+
+
+def test_commentary_for_verse_sees_targets_written_by_another_process(backend, monkeypatch):
+    import storage_index
+
+    storage = backend.storage
+    storage.save_commentary(_commentary("w", "C-W-V0001-0001", "V0001", ["V0001"]))
+    storage.save_commentary(_commentary("w", "C-W-V0004-0001", "V0004", ["V0004"]))
+    assert [c.commentary_id for c in storage.list_commentary_for_verse("w", "V0001")] == ["C-W-V0001-0001"]
+
+    # The peer gets its own copy of the caching indexes, as another process would.
+    peer_index = _load_copy(storage_index, "storage_index_peer")
+    monkeypatch.setitem(sys.modules, "storage_index", peer_index)
+    peer = _load_copy(storage, "storage_peer")
+    monkeypatch.setitem(sys.modules, "storage_index", storage_index)
+    # Lands in the already indexed V0004 bucket, which no V0001 lookup used to touch.
+    peer.save_commentary(_commentary("w", "C-W-V0004-0002", "V0004", ["V0004", "V0001"]))
+    peer.flush_pending_writes()
+    assert "C-W-V0004-0002" not in storage_index._COMMENTARY_INDEXES["w"].records
+
+    ids = [c.commentary_id for c in storage.list_commentary_for_verse("w", "V0001")]
+    assert ids == ["C-W-V0001-0001", "C-W-V0004-0002"]
+
+
+def test_sqlite_backend_round_trip(sqlite_backend):
+    storage = sqlite_backend.storage
+    assert storage.list_verses.__module__ == "storage_sqlite"
+
+    storage.save_verse(_verse("w", "V0002", 2))
+    storage.save_verse(_verse("w", "V0001", 1))
+    assert [v.verse_id for v in storage.list_verses("w")] == ["V0001", "V0002"]
+    assert storage.manual_number_exists("w", "1")
+    assert not storage.manual_number_exists("w", "1", exclude="V0001")
+    assert storage.generate_verse_id("w") == ("V0003", 3)
+
+    storage.save_commentary(_commentary("w", "C-W-V0002-0001", "V0002", ["V0002", "V0001"]))
+    assert [c.commentary_id for c in storage.list_commentary_for_verse("w", "V0001")] == ["C-W-V0002-0001"]
+    assert storage.generate_commentary_id("w", "V0002") == "C-W-V0002-0002"
+
+    storage.delete_verse("w", "V0002", actor="tester")
+    storage.delete_commentary("w", "C-W-V0002-0001", actor="tester")
+    with pytest.raises(FileNotFoundError):
+        storage.load_verse("w", "V0002")
+    assert [t["id"] for t in storage.list_tombstones("w")] == ["V0002", "C-W-V0002-0001"]
+    assert storage.list_commentary_for_verse("w", "V0001") == []
+
+
+def test_sqlite_delete_work_drops_its_review_history(sqlite_backend):
+    storage = sqlite_backend.storage
+    storage.save_work(_work("w"))
+    storage.save_verse(_verse("w", "V0001", 1))
+    storage.append_review_history("verse", "w", "V0001", {"actor": "a@x", "action": "flag", "to": "flagged"})
+
+    storage.delete_work("w")
+    storage.save_work(_work("w"))
+    storage.save_verse(_verse("w", "V0001", 1))
+    assert storage.load_review_history("verse", "w", "V0001") == ([], 0)
+
+
+def test_sqlite_migration_imports_json_tree(backend, tmp_path):
+    storage = backend.storage
+    import storage_sqlite
+
+    storage.save_verse(_verse("w", "V0001", 1))
+    storage.save_commentary(_commentary("w", "C-W-V0001-0001", "V0001", ["V0001"]))
+    (storage.work_dir("w") / storage.WORK_JSON).write_text(
+        json.dumps(
+            {"work_id": "w", "title": {"en": "W"}, "canonical_lang": "bn", "langs": ["bn"], "structure": {}}
+        ),
+        encoding="utf-8",
+    )
+    storage.append_review_log("verse", "w", "V0001", {"actor": "a@example.com", "action": "flag"})
+    # A legacy record with inline history, transitioned again since.
+    path = storage.verse_path("w", "V0001")
+    legacy = json.loads(path.read_text(encoding="utf-8"))
+    legacy["review"]["history"] = [{"ts": "2024-01-01T00:00:00+00:00", "actor": "a@x", "action": "flag", "to": "flagged"}]
+    path.write_text(json.dumps(legacy), encoding="utf-8")
+    storage.append_review_history("verse", "w", "V0001", {"ts": "2024-02-01T00:00:00+00:00", "actor": "a@x", "action": "approve", "to": "approved"})
+
+    database = tmp_path / "migrated.sqlite3"
+    counts = storage_sqlite.import_json_tree(storage.settings.DATA_ROOT, database)
+    assert counts["works"] == 1 and counts["verses"] == 1 and counts["commentary"] == 1
+    assert counts["review_log"] == 1
+    entries = storage_sqlite.connect(database).execute(
+        "SELECT entry FROM review_history WHERE item_id = 'V0001' ORDER BY seq"
+    ).fetchall()
+    assert [json.loads(entry)["action"] for (entry,) in entries] == ["flag", "approve"]
+    rows = storage_sqlite.connect(database).execute("SELECT verse_id, state FROM verses").fetchall()
+    assert rows == [("V0001", "draft")]
+
+    storage.save_verse(_verse("w", "V0002", 2))
+    storage.delete_commentary("w", "C-W-V0001-0001", actor="tester")
+    storage_sqlite.import_json_tree(storage.settings.DATA_ROOT, database)
+    storage.delete_verse("w", "V0002", actor="tester")
+    counts = storage_sqlite.import_json_tree(storage.settings.DATA_ROOT, database)
+    assert counts["verses"] == 1 and counts["commentary"] == 0
+    conn = storage_sqlite.connect(database)
+    assert conn.execute("SELECT verse_id FROM verses").fetchall() == [("V0001",)]
+    assert conn.execute("SELECT COUNT(*) FROM commentary_targets").fetchone() == (0,)
+    assert conn.execute("SELECT verse_id FROM verse_manual_numbers").fetchall() == [("V0001",)]
+    assert conn.execute("SELECT kind, count FROM review_stats WHERE count > 0").fetchall() == [("verses", 1)]
+
+
+def test_user_directory_lookups_follow_saves_and_file_changes(backend, monkeypatch):
+    storage = backend.storage
+    user = User(id="u1", email="Reader@Example.com", password_hash="x", roles=["author"])
+    storage.save_users([user])
+
+    def fail(_path):
+        raise AssertionError("users file re-read")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(storage, "read_json", fail)
+        assert storage.find_user("u1").email == "Reader@Example.com"
+        assert storage.find_user_by_email("reader@example.COM").id == "u1"
+        assert storage.find_user("missing") is None
+
+    renamed = user.copy(update={"email": "new@example.com"}).dict(by_alias=True)
+    storage.users_path().write_text(json.dumps([renamed, renamed | {"id": "u2"}]), encoding="utf-8")
+    assert storage.find_user_by_email("reader@example.com") is None
+    assert storage.find_user("u2").email == "new@example.com"
+    assert storage.find_user_by_email("NEW@example.com").id == "u1"
+
+
+def test_write_json_is_atomic_and_keeps_old_file_on_failure(backend):
+    storage = backend.storage
+    path = storage.work_dir("w") / "record.json"
+    storage.write_json(path, {"value": 1})
+
+    with pytest.raises(TypeError):
+        storage.write_json(path, {"value": object()})
+    assert json.loads(path.read_text(encoding="utf-8")) == {"value": 1}
+    assert [p.name for p in path.parent.iterdir()] == ["record.json"]
+
+
+def test_writes_to_different_works_overlap(backend, monkeypatch):
+    storage = backend.storage
+    write_json_many = storage._write_json_many
+    writing, released = threading.Event(), threading.Event()
+    overlapped = []
+
+    def slow_write(items):
+        if storage.work_dir("a") in items[0][0].parents:
+            writing.set()
+            # Only returns in time if the write to "b" is not queued behind this one.
+            overlapped.append(released.wait(5))
+        return write_json_many(items)
+
+    monkeypatch.setattr(storage, "_write_json_many", slow_write)
+    writer = threading.Thread(target=storage.save_verse, args=(_verse("a", "V0001", 1),))
+    writer.start()
+    assert writing.wait(5)
+    storage.save_verse(_verse("b", "V0001", 1))
+    assert storage.list_verses("b")[0].verse_id == "V0001"
+    released.set()
+    writer.join()
+    assert overlapped == [True]
+    assert storage.list_verses("a")[0].verse_id == "V0001"
+
+
+@pytest.mark.parametrize("policy", ["always", "batch"])
+def test_batch_commit_fsyncs_each_directory_once(backend, monkeypatch, policy):
+    storage = backend.storage
+    storage.work_dir("w").mkdir(parents=True)
+    allocated = [storage.allocate_verse_id("w", str(number)) for number in range(1, 4)]
+    storage.flush_pending_writes()
+    monkeypatch.setattr(storage.settings, "FSYNC_POLICY", policy)
+    synced = []
+    monkeypatch.setattr(storage, "_fsync_path", synced.append)
+    monkeypatch.setattr(storage.os, "fsync", lambda fd: synced.append(fd))
+
+    with storage.batch_commit():
+        for verse_id, order in allocated:
+            storage.save_verse(_verse("w", verse_id, order))
+        # Each record's data is synced before its rename; directories wait.
+        assert synced and all(isinstance(item, int) for item in synced)
+        synced.clear()
+
+    verses_dir = storage.work_dir("w") / storage.VERSES_DIR
+    assert synced.count(verses_dir) == 1
+    assert synced.count(storage.work_dir("w")) == 1
+    assert not [path for path in synced if path.parent == verses_dir]
+
+
+def test_codec_matches_stdlib_output(backend, monkeypatch):
+    codec = backend.storage.codec
+    payload = {"text": "धर्म", "when": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), "n": [1, 2.5]}
+    expected = json.dumps(payload, ensure_ascii=False, indent=2, default=codec.default)
+    for use_orjson in {False, codec.orjson is not None}:
+        monkeypatch.setattr(codec, "USE_ORJSON", use_orjson)
+        assert codec.dumps(payload, compact=False) == expected
+        assert codec.loads(codec.dumps_bytes(payload)) == json.loads(expected)
+
+
+def test_compact_storage_writes_unindented_records(backend, monkeypatch):
+    storage = backend.storage
+    monkeypatch.setattr(storage.settings, "JSON_COMPACT_STORAGE", True)
+    storage.save_verse(_verse("w", "V0001", 1))
+    raw = (storage.work_dir("w") / storage.VERSES_DIR / "V0001.json").read_text(encoding="utf-8")
+    assert "\n" not in raw
+    assert storage.load_verse("w", "V0001").verse_id == "V0001"
+
+
+def test_verse_allocator_reserves_ids_and_manual_numbers(backend):
+    storage = backend.storage
+    storage.save_verse(_verse("w", "V0003", 3).copy(update={"number_manual": "1.3"}))
+
+    assert storage.allocate_verse_id("w", "1.4") == ("V0004", 4)
+    assert storage.manual_number_exists("w", "1.4")
+    assert storage.manual_number_exists("w", "1.3")
+    assert not storage.manual_number_exists("w", "1.3", exclude="V0003")
+    with pytest.raises(storage.DuplicateManualNumber):
+        storage.allocate_verse_id("w", "1.3")
+    storage.release_verse_id("w", "V0004")
+    assert not storage.manual_number_exists("w", "1.4")
+    storage.release_verse_id("w", "V0003")
+    assert storage.manual_number_exists("w", "1.3")
+
+    storage.delete_verse("w", "V0003", actor="tester")
+    assert not storage.manual_number_exists("w", "1.3")
+    assert storage.allocate_verse_id("w")[0] == "V0005"
+
+    (storage.work_dir("w") / storage.ALLOCATOR_JSON).unlink()
+    storage.save_verse(_verse("w", "V0004", 4).copy(update={"number_manual": "1.4"}))
+    assert storage.manual_number_exists("w", "1.4")
+    assert storage.allocate_verse_id("w")[0] == "V0005"
+
+
+def test_sqlite_verse_allocator(sqlite_backend):
+    storage = sqlite_backend.storage
+    storage.save_verse(_verse("w", "V0002", 2).copy(update={"number_manual": "7"}))
+
+    assert storage.allocate_verse_id("w", "8") == ("V0003", 3)
+    with pytest.raises(storage.DuplicateManualNumber):
+        storage.allocate_verse_id("w", "7")
+    storage.release_verse_id("w", "V0002")
+    assert storage.manual_number_exists("w", "7")
+    storage.release_verse_id("w", "V0003")
+    assert not storage.manual_number_exists("w", "8")
+    assert storage.allocate_verse_id("w", "8") == ("V0004", 4)
+    storage.rebuild_verse_allocator("w")
+    assert not storage.manual_number_exists("w", "8")
+    assert storage.allocate_verse_id("w")[0] == "V0003"
+
+
+def test_review_state_counters_follow_saves_and_deletes(backend):
+    storage = backend.storage
+    storage.save_work(_work("w"))
+    storage.save_verse(_verse("w", "V0001", 1))
+    verse = _verse("w", "V0002", 2)
+    storage.save_verse(verse)
+    verse.review.state = "approved"
+    storage.save_verse(verse)
+    storage.save_commentary(_commentary("w", "C-W-V0001-0001", "V0001", []))
+    expected = {"verses": {"approved": 1, "draft": 1}, "commentary": {"review_pending": 1}}
+    assert storage.review_state_counts("w") == expected
+
+    storage.delete_verse("w", "V0001", actor="tester")
+    storage.delete_commentary("w", "C-W-V0001-0001", actor="tester")
+    assert storage.review_state_counts("w") == {"verses": {"approved": 1}, "commentary": {}}
+
+    (storage.work_dir("w") / storage.REVIEW_STATS_JSON).write_text('{"verses": {}, "commentary": {}}')
+    assert storage.count_review_states("w") == {"verses": {"approved": 1}, "commentary": {}}
+    assert storage.rebuild_review_state_counts("w") == {"verses": {"approved": 1}, "commentary": {}}
+
+
+def test_sqlite_review_state_counters(sqlite_backend):
+    storage = sqlite_backend.storage
+    storage.save_work(_work("w"))
+    verse = _verse("w", "V0001", 1)
+    storage.save_verse(verse)
+    verse.review.state = "flagged"
+    storage.save_verse(verse)
+    storage.save_verse(_verse("w", "V0002", 2))
+    assert storage.review_state_counts("w") == {"verses": {"draft": 1, "flagged": 1}, "commentary": {}}
+    storage.delete_verse("w", "V0001", actor="tester")
+    assert storage.review_state_counts("w") == storage.count_review_states("w") == {
+        "verses": {"draft": 1},
+        "commentary": {},
+    }
+
+
+def _log_entry(actor: str, action: str, to_state: str, number: int) -> dict:
+    return {"ts": f"2024-01-01T00:00:{number:02d}+00:00", "actor": actor, "action": action, "to": to_state}
+
+
+def test_review_log_encodes_datetimes(backend):
+    storage = backend.storage
+    stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    storage.append_review_log("verse", "w", "V0001", {"ts": stamp, "actor": "a@x", "action": "flag", "to": "flagged"})
+    storage.close_review_log()
+    entries, _ = storage.query_review_log(work_id="w")
+    assert [entry["ts"] for entry in entries] == [stamp.isoformat()]
+    assert storage.review_activity("a@x")["verse"]["counts"] == {"flag": {"flagged": 1}}
+
+
+def test_review_activity_index_counts_and_keeps_recent_entries(backend, monkeypatch):
+    storage = backend.storage
+    monkeypatch.setattr(storage, "REVIEW_ACTIVITY_RECENT", 3)
+    for number in range(5):
+        storage.append_review_log("verse", "w", f"V000{number}", _log_entry("a@x", "state_change", "approved", number))
+    storage.append_review_log("verse", "w", "V0009", _log_entry("b@x", "flag", "flagged", 9))
+
+    activity = storage.review_activity("a@x")
+    assert activity["verse"]["counts"] == {"state_change": {"approved": 5}}
+    assert [entry["id"] for entry in activity["verse"]["recent"]] == ["V0004", "V0003", "V0002"]
+    assert storage.review_activity("nobody@x") == {}
+
+    shutil.rmtree(storage.REVIEW_ACTIVITY_DIR)
+    assert storage.review_activity("a@x") == activity
+    assert storage.review_activity("b@x")["verse"]["counts"] == {"flag": {"flagged": 1}}
+
+
+def test_sqlite_review_activity(sqlite_backend):
+    storage = sqlite_backend.storage
+    for number in range(3):
+        storage.append_review_log("verse", "w", f"V000{number}", _log_entry("a@x", "issue_add", "rejected", number))
+    activity = storage.review_activity("a@x")
+    assert activity["verse"]["counts"] == {"issue_add": {"rejected": 3}}
+    assert [entry["id"] for entry in activity["verse"]["recent"]] == ["V0002", "V0001", "V0000"]
+
+
+def _reviewed_verse(work_id: str, verse_id: str, order: int, state: str, second: int) -> Verse:
+    verse = _verse(work_id, verse_id, order)
+    verse.review.state = state
+    verse.review.history.append(
+        {"ts": datetime(2024, 1, 1, 0, 0, second, tzinfo=timezone.utc), "actor": "a@x", "action": "flag", "from": "draft", "to": state}
+    )
+    return verse
+
+
+def _assert_pending_queue(storage):
+    storage.save_verse(_reviewed_verse("w", "V0001", 1, "flagged", 10))
+    storage.save_verse(_reviewed_verse("w", "V0002", 2, "approved", 20))
+    storage.save_verse(_reviewed_verse("w", "V0003", 3, "review_pending", 30))
+    storage.save_verse(_reviewed_verse("x", "V0001", 1, "flagged", 20))
+    storage.save_commentary(_commentary("w", "C-W-V0001-0001", "V0001", []))
+
+    page, total = storage.list_pending_reviews(limit=2)
+    assert total == 4
+    assert [(key[1], key[2], key[3]) for key in page] == [("verse", "w", "V0003"), ("verse", "x", "V0001")]
+    page, _ = storage.list_pending_reviews(limit=2, after=page[-1])
+    assert [(key[1], key[2], key[3]) for key in page] == [("verse", "w", "V0001"), ("commentary", "w", "C-W-V0001-0001")]
+
+    storage.save_verse(_reviewed_verse("w", "V0003", 3, "approved", 40))
+    page, total = storage.list_pending_reviews(["w"], limit=10)
+    assert total == 2
+    assert [key[3] for key in page] == ["V0001", "C-W-V0001-0001"]
+
+
+def test_pending_review_queue_is_ordered_and_paginated(backend):
+    storage = backend.storage
+    storage.save_work(_work("w"))
+    storage.save_work(_work("x"))
+    _assert_pending_queue(storage)
+
+
+def test_sqlite_pending_review_queue(sqlite_backend):
+    _assert_pending_queue(sqlite_backend.storage)
+
+
+def _assert_review_history(storage):
+    storage.save_work(_work("w"))
+    legacy = _reviewed_verse("w", "V0001", 1, "flagged", 5)
+    storage.save_verse(legacy)
+    for number in range(1, 4):
+        storage.append_review_history("verse", "w", "V0001", _log_entry("a@x", "approve", "approved", number))
+    storage.append_review_history("verse", "w", "V0002", _log_entry("b@x", "flag", "flagged", 9))
+
+    stored = storage.load_verse("w", "V0001")
+    assert stored.review.history == []
+    assert stored.review.history_count == 1
+    assert stored.review.last_entry.to_state == "flagged"
+
+    entries, total = storage.load_review_history("verse", "w", "V0001")
+    assert total == 4
+    assert [entry["to"] for entry in entries] == ["flagged", "approved", "approved", "approved"]
+    page, total = storage.load_review_history("verse", "w", "V0001", offset=1, limit=2)
+    assert total == 4
+    assert [entry["ts"] for entry in page] == ["2024-01-01T00:00:01+00:00", "2024-01-01T00:00:02+00:00"]
+    assert storage.load_review_history("commentary", "w", "V0001") == ([], 0)
+
+
+def test_review_history_store_pages_and_rebuilds_index(backend):
+    import storage_review
+
+    storage = backend.storage
+    _assert_review_history(storage)
+
+    (storage.work_dir("w") / storage.HISTORY_INDEX).unlink()
+    storage_review._HISTORY_INDEXES.clear()
+    assert storage.load_review_history("verse", "w", "V0001")[1] == 4
+    assert storage.load_review_history("verse", "w", "V0002")[1] == 1
+
+
+def test_migrate_inline_history_moves_entries_out_of_records(backend):
+    storage = backend.storage
+    storage.save_work(_work("w"))
+    legacy = _reviewed_verse("w", "V0001", 1, "flagged", 5)
+    storage.write_json(storage.verse_path("w", "V0001"), json.loads(legacy.json(by_alias=True)))
+
+    assert storage.migrate_inline_history("w") == 1
+    assert storage.migrate_inline_history("w") == 0
+    raw = json.loads(storage.verse_path("w", "V0001").read_text(encoding="utf-8"))
+    assert raw["review"]["history"] == []
+    assert raw["review"]["history_count"] == 1
+    assert storage.load_review_history("verse", "w", "V0001")[1] == 1
+
+
+def test_sqlite_review_history_store(sqlite_backend):
+    _assert_review_history(sqlite_backend.storage)
+
+
+def _assert_review_log_query(storage):
+    for number in range(4):
+        storage.append_review_log("verse", "w", f"V000{number % 2}", _log_entry("a@x", "approve", "approved", number))
+    storage.append_review_log("verse", "x", "V0001", _log_entry("a@x", "flag", "flagged", 5))
+    storage.append_review_log("commentary", "w", "C-W-V0001-0001", _log_entry("b@x", "flag", "flagged", 6))
+
+    entries, after = storage.query_review_log(work_id="w", actor="a@x", limit=3)
+    assert [entry["ts"][-8:-6] for entry in entries] == ["00", "01", "02"]
+    entries, after = storage.query_review_log(work_id="w", actor="a@x", limit=3, after=after)
+    assert [entry["ts"][-8:-6] for entry in entries] == ["03"]
+    assert after is None
+    assert [entry["work_id"] for entry in storage.query_review_log(action="flag")[0]] == ["x", "w"]
+    assert len(storage.query_review_log(work_id="w", item_id="V0001")[0]) == 2
+    assert storage.query_review_log(actor="nobody@x") == ([], None)
+
+
+def test_review_log_query_uses_per_day_index(backend):
+    import storage_review
+
+    storage = backend.storage
+    _assert_review_log_query(storage)
+
+    old = storage.REVIEW_LOG_DIR / "2023-12-31.jsonl"
+    old.write_text(
+        json.dumps({"ts": "2023-12-31T10:00:00+00:00", "work_id": "w", "id": "V0001", "actor": "a@x", "action": "lock"})
+        + "\nnot json\n",
+        encoding="utf-8",
+    )
+    assert [entry["action"] for entry in storage.query_review_log(date_to=date(2023, 12, 31))[0]] == ["lock"]
+    assert (storage.REVIEW_LOG_INDEX_DIR / "2023-12-31.jsonl").exists()
+    assert storage.query_review_log(date_from=date(2024, 1, 1), action="lock") == ([], None)
+
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    (storage.REVIEW_LOG_INDEX_DIR / f"{today}.jsonl").unlink()
+    storage_review._REVIEW_LOG_INDEXES.clear()
+    assert len(storage.query_review_log(date_from=date.fromisoformat(today), work_id="w", actor="a@x")[0]) == 4
+
+
+def test_sqlite_review_log_query(sqlite_backend):
+    storage = sqlite_backend.storage
+    _assert_review_log_query(storage)
+    assert len(storage.query_review_log(date_from=date(2024, 1, 1), date_to=date(2024, 1, 1))[0]) == 6
+    assert storage.query_review_log(date_to=date(2023, 12, 31)) == ([], None)
+
+
+def test_review_log_writer_buffers_batches_and_rolls_over(backend, monkeypatch):
+    import storage_review
+
+    storage = backend.storage
+    writer = storage_review._ReviewLogWriter(max_bytes=1 << 20, interval=3600)
+    monkeypatch.setattr(storage_review, "_REVIEW_LOG_WRITER", writer)
+    day = {"value": datetime(2024, 1, 1, 23, 59, tzinfo=timezone.utc)}
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return day["value"]
+
+    monkeypatch.setattr(storage_review, "datetime", FrozenDatetime)
+    storage.append_review_logs(
+        [("verse", "w", f"V000{number}", _log_entry("a@x", "approve", "approved", number)) for number in range(3)]
+    )
+    day["value"] = datetime(2024, 1, 2, 0, 1, tzinfo=timezone.utc)
+    storage.append_review_log("verse", "w", "V0009", _log_entry("b@x", "flag", "flagged", 9))
+    assert not list(storage.REVIEW_LOG_DIR.glob("*.jsonl"))
+
+    storage.flush_pending_writes()
+    first = (storage.REVIEW_LOG_DIR / "2024-01-01.jsonl").read_text(encoding="utf-8").splitlines()
+    second = (storage.REVIEW_LOG_DIR / "2024-01-02.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in first] == ["V0000", "V0001", "V0002"]
+    assert [json.loads(line)["id"] for line in second] == ["V0009"]
+    assert storage.review_activity("a@x")["verse"]["counts"] == {"approve": {"approved": 3}}
+    assert len(storage.query_review_log(actor="b@x")[0]) == 1
+
+    writer.max_bytes = 1
+    storage.append_review_log("verse", "w", "V0010", _log_entry("b@x", "flag", "flagged", 10))
+    assert len((storage.REVIEW_LOG_DIR / "2024-01-02.jsonl").read_text(encoding="utf-8").splitlines()) == 2
+    writer.close()
+
+
+def test_save_verses_writes_batch_and_counts_once(backend, monkeypatch):
+    storage = backend.storage
+    storage.save_work(_work("w"))
+    storage.save_verses("w", [_verse("w", f"V{number:04d}", number) for number in range(1, 21)])
+    stored = []
+    monkeypatch.setattr(storage, "_store_review_stats", lambda work_id, stats: stored.append(stats.payload()))
+
+    verses = storage.load_verses("w", ["V0003", "V0005", "V0099"])
+    assert sorted(verses) == ["V0003", "V0005"]
+    for verse in verses.values():
+        verse.review.state = "approved"
+    storage.save_verses("w", list(verses.values()))
+
+    assert len(stored) == 1
+    assert stored[0]["verses"]["approved"] == 2
+    assert [verse.review.state for verse in storage.list_verses("w")].count("approved") == 2
+    assert storage.load_verse("w", "V0005").review.state == "approved"
+
+
+def test_normalize_verses_rewrites_only_out_of_shape_records(backend):
+    storage = backend.storage
+    storage.save_work(_work("w"))
+    languages = storage.expected_languages(storage.load_work("w"))
+    assert languages == ["bn", "en", "or", "hi", "as"]
+    shaped = Verse.parse_obj(storage.normalize_language_fields(_verse("w", "V0002", 2).dict(), languages))
+    storage.save_verses("w", [_verse("w", "V0001", 1, "legacy"), shaped])
+
+    assert storage.normalize_verses("w") == 1
+    assert storage.normalize_verses("w") == 0
+    doc = storage.load_verse_doc("w", "V0001")
+    assert list(doc["texts"]) == languages and doc["texts"]["bn"] == "legacy"
+    assert doc["segments"] == {lang: [] for lang in languages}
+    assert [doc["verse_id"] for doc in storage.list_verse_docs("w", offset=1)] == ["V0002"]
+
+
+def _assert_projection(storage):
+    storage.save_work(_work("w"))
+    storage.save_verse(_reviewed_verse("w", "V0002", 2, "flagged", 7))
+    storage.save_verse(_verse("w", "V0001", 1))
+    storage.save_commentary(_commentary("w", "C-W-V0001-0001", "V0001", ["V0001"]))
+    fields = ["verse_id", "order", "review.state", "review.last_entry.ts", "review"]
+
+    rows = storage.list_verses("w", fields=["verse_id", "number_manual", "review.state", "review.last_entry.ts", "meta.missing"])
+    assert rows[0] == {
+        "verse_id": "V0001",
+        "number_manual": "1",
+        "review": {"state": "draft", "last_entry": {"ts": None}},
+        "meta": {"missing": None},
+    }
+    assert rows[1]["review"]["last_entry"]["ts"].startswith("2024-01-01T00:00:07")
+    assert storage.list_verses("w", fields=fields)[0]["review"]["state"] == "draft"
+    assert storage.list_commentary("w", fields=["commentary_id", "targets"]) == [
+        {"commentary_id": "C-W-V0001-0001", "targets": [{"kind": "verse", "ids": ["V0001"]}]}
+    ]
+    assert storage.list_commentary_for_verse("w", "V0001", fields=["commentary_id"]) == [
+        {"commentary_id": "C-W-V0001-0001"}
+    ]
+    assert storage.load_commentary_doc("w", "C-W-V0001-0001")["verse_id"] == "V0001"
+    with pytest.raises(ValueError):
+        storage.list_verses("w", fields=["texts') --"])
+
+
+def test_list_projection_skips_validation(backend):
+    storage = backend.storage
+    _assert_projection(storage)
+
+    path = storage.verse_path("w", "V0003")
+    path.write_text(json.dumps({"verse_id": "V0003", "order": 3, "unexpected": True}), encoding="utf-8")
+    assert [row["verse_id"] for row in storage.list_verses("w", fields=["verse_id"])] == ["V0001", "V0002", "V0003"]
+
+
+def test_sqlite_list_projection(sqlite_backend):
+    _assert_projection(sqlite_backend.storage)
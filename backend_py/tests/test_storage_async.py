@@ -0,0 +1,33 @@
+import asyncio
+import threading
+import time
+
+
+def test_run_io_overlaps_blocking_calls_off_the_event_loop(backend):
+    import storage_async
+
+    def blocking() -> str:
+        time.sleep(0.2)
+        return threading.current_thread().name
+
+    async def main():
+        started = time.perf_counter()
+        names = await asyncio.gather(*(storage_async.run_io(blocking) for _ in range(4)))
+        return names, time.perf_counter() - started
+
+    names, elapsed = asyncio.run(main())
+    assert all(name.startswith("storage-io") for name in names)
+    assert elapsed < 0.6
+
+
+def test_async_wrappers_follow_storage(backend):
+    import storage_async
+    from models import Verse
+
+    verse = Verse(work_id="w", verse_id="V0001", order=1, texts={"bn": "x"})
+
+    async def main():
+        await storage_async.save_verse(verse)
+        return await storage_async.load_verse("w", "V0001")
+
+    assert asyncio.run(main()).texts == {"bn": "x"}
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Export every work in the library and write the library manifest.
+
+Usage::
+
+    python scripts/export_library.py {merge,clean,train} [--full] [--workers N]
+
+Works are exported in parallel on ``--workers`` processes (default
+``EXPORT_PROCESSES``, one per CPU). Each work's output is incremental unless
+``--full`` is given. The manifest listing every output with its record count,
+size and SHA-256 is written to ``data/exports/library.<kind>.json``. The exit
+status is 1 if any work failed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend_py"))
+
+import exports  # noqa: E402
+import storage  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=sorted(exports.EXPORTERS))
+    parser.add_argument("--full", action="store_true", help="rebuild outputs from scratch")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+
+    path = exports.export_library(args.kind, full=args.full, workers=args.workers)
+    manifest = storage.read_json(path)
+    for entry in manifest["works"]:
+        print(f"{entry['work_id']}: {entry['records']} records, {entry['size']} bytes -> {entry['output']}")
+    for entry in manifest["failed"]:
+        print(f"{entry['work_id']}: {entry['error']}", file=sys.stderr)
+    storage.flush_pending_writes()
+    print(f"Wrote {path}")
+    return 1 if manifest["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Move review history embedded in records into the per-work history store.
+
+Usage::
+
+    python scripts/migrate_review_history.py [WORK_ID ...]
+
+Runs against the backend selected by ``STORAGE_BACKEND``. Records are also
+migrated lazily the next time they are saved, so the script only has to be run
+once to slim down every record up front. Records that were already migrated are
+left untouched, so it is safe to re-run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend_py"))
+
+import storage  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("work_ids", nargs="*", metavar="WORK_ID", help="defaults to every work")
+    args = parser.parse_args()
+
+    work_ids = args.work_ids or storage.list_work_ids()
+    total = 0
+    for work_id in work_ids:
+        migrated = storage.migrate_inline_history(work_id)
+        total += migrated
+        print(f"{work_id}: {migrated} records migrated")
+    storage.flush_pending_writes()
+    print(f"Migrated {total} records across {len(work_ids)} works")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
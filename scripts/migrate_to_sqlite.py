@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Convert a JSON ``data/library`` tree into the SQLite storage backend.
+
+Usage::
+
+    python scripts/migrate_to_sqlite.py [--data-root PATH] [--database PATH]
+
+Both paths default to the ``DATA_ROOT`` / ``SQLITE_PATH`` settings. The JSON
+tree is only read, never modified, so the API can keep serving from it until
+``STORAGE_BACKEND=sqlite`` is switched on. Re-running the script makes each
+imported work's rows match the tree again, deleting records that are no
+longer in it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend_py"))
+
+import settings  # noqa: E402
+import storage  # noqa: E402,F401  (import before storage_sqlite; it selects the backend)
+import storage_sqlite  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-root", type=Path, default=settings.DATA_ROOT)
+    parser.add_argument("--database", type=Path, default=settings.SQLITE_PATH)
+    args = parser.parse_args()
+
+    data_root = args.data_root.expanduser().resolve()
+    if not data_root.is_dir():
+        print(f"Data root {data_root} does not exist", file=sys.stderr)
+        return 1
+    counts = storage_sqlite.import_json_tree(data_root, args.database.expanduser().resolve())
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    print(f"Imported {summary} into {args.database}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Rewrite stored verses into their work's language shape.
+
+Usage::
+
+    python scripts/normalize_verses.py [WORK_ID ...]
+
+The API normalizes verses when it writes them and serves stored documents
+as they are, so verses written by older releases (or copied in by hand) must
+be normalized once. Runs against the backend selected by ``STORAGE_BACKEND``;
+verses already in shape are left untouched, so it is safe to re-run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend_py"))
+
+import storage  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("work_ids", nargs="*", metavar="WORK_ID", help="defaults to every work")
+    args = parser.parse_args()
+
+    work_ids = args.work_ids or storage.list_work_ids()
+    total = 0
+    for work_id in work_ids:
+        rewritten = storage.normalize_verses(work_id)
+        total += rewritten
+        print(f"{work_id}: {rewritten} verses normalized")
+    storage.flush_pending_writes()
+    print(f"Normalized {total} verses across {len(work_ids)} works")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
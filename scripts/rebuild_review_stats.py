@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Rebuild or verify the per-work review-state counters.
+
+Usage::
+
+    python scripts/rebuild_review_stats.py [--verify] [WORK_ID ...]
+
+The counters behind the analytics endpoints are updated on every save and
+delete. ``--verify`` recounts every verse and commentary and reports works
+whose stored counters differ, exiting with status 1 if any do; without it the
+stored counters are replaced by the recount. All works are processed unless
+work ids are given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend_py"))
+
+import storage  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verify", action="store_true", help="only report mismatches")
+    parser.add_argument("work_ids", nargs="*", metavar="WORK_ID")
+    args = parser.parse_args()
+
+    mismatched = 0
+    for work_id in args.work_ids or storage.list_work_ids():
+        try:
+            stored = storage.review_state_counts(work_id)
+        except FileNotFoundError:
+            print(f"{work_id}: work not found", file=sys.stderr)
+            return 1
+        if args.verify:
+            actual = storage.count_review_states(work_id)
+            if actual != stored:
+                mismatched += 1
+                print(f"{work_id}: stored {stored} != actual {actual}")
+        else:
+            print(f"{work_id}: {storage.rebuild_review_state_counts(work_id)}")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())